@@ -1,8 +1,25 @@
 # app/ai/checklist.py
 from __future__ import annotations
-from typing import List, Dict, Any
+from functools import lru_cache
+from operator import attrgetter
+from typing import List, Dict, Any, Tuple
 from app.schemas.panel_ir import PanelScheduleIR, NameValuePair
 
+def _param_map(params: List[NameValuePair]) -> Dict[str, str]:
+    # Reversed so the first occurrence of a label wins, matching a front-to-back scan
+    return {
+        p.name_text.strip().upper(): ("" if p.value is None else str(p.value))
+        for p in reversed(params)
+    }
+
+def _left_map(ir: PanelScheduleIR) -> Dict[str, str]:
+    return _param_map(ir.header.left_params)
+
+def _right_map(ir: PanelScheduleIR) -> Dict[str, str]:
+    return _param_map(ir.header.right_params)
+
+# One-off lookups: scan and stop at the first match. Callers needing several labels
+# should build _left_map/_right_map once and index it instead.
 def _get_left(ir: PanelScheduleIR, label: str) -> str:
     for p in ir.header.left_params:
         if p.name_text.strip().upper() == label.upper():
@@ -20,19 +37,32 @@ def build_checklist(ir: PanelScheduleIR) -> List[str]:
     Technical electrical engineering checks - NO formatting/aesthetics.
     Focus on electrical system design, safety, code compliance, and engineering validity.
     """
-    voltage = _get_left(ir, "VOLTAGE")
-    phase   = _get_left(ir, "PHASE")
-    wire    = _get_left(ir, "WIRE")
-    main_bus = _get_left(ir, "MAIN BUS AMPS")
-    mcb      = _get_left(ir, "MAIN CIRCUIT BREAKER")
+    left = _left_map(ir)
+    voltage = left.get("VOLTAGE", "")
+    phase   = left.get("PHASE", "")
+    wire    = left.get("WIRE", "")
+    main_bus = left.get("MAIN BUS AMPS", "")
+    mcb      = left.get("MAIN CIRCUIT BREAKER", "")
     
-    location = _get_right(ir, "LOCATION")
-    fed_from = _get_right(ir, "FED FROM")
-    phase_conductor = _get_right(ir, "PHASE CONDUCTOR")
-    neutral_conductor = _get_right(ir, "NEUTRAL CONDUCTOR")
-    ground_conductor = _get_right(ir, "GROUND CONDUCTOR")
+    right = _right_map(ir)
+    location = right.get("LOCATION", "")
+    fed_from = right.get("FED FROM", "")
+    phase_conductor = right.get("PHASE CONDUCTOR", "")
+    neutral_conductor = right.get("NEUTRAL CONDUCTOR", "")
+    ground_conductor = right.get("GROUND CONDUCTOR", "")
     
-    checks = [
+    return list(_build_checklist_cached(
+        voltage, phase, wire, main_bus, mcb,
+        location, fed_from, phase_conductor, neutral_conductor, ground_conductor,
+    ))
+
+@lru_cache(maxsize=256)
+def _build_checklist_cached(
+    voltage: str, phase: str, wire: str, main_bus: str, mcb: str,
+    location: str, fed_from: str, phase_conductor: str, neutral_conductor: str, ground_conductor: str,
+) -> Tuple[str, ...]:
+    """The checklist depends only on these header values, so identical headers reuse one build."""
+    checks = (
         # System Type Analysis
         f"Based on VOLTAGE '{voltage}', determine if this is a DELTA or WYE system. Verify voltage notation is correct for system type.",
         
@@ -71,10 +101,19 @@ def build_checklist(ir: PanelScheduleIR) -> List[str]:
         
         # Upstream Coordination
         f"Analyze if FED FROM '{fed_from}' provides adequate source capacity for this panel's total load.",
-    ]
+    )
     
     return checks
 
+# Circuit row layout for summarize_for_gpt, parsed once
+_CKT_ROW = "CKT {ckt:>2}: {desc:<40} | Breaker: {breaker}A | Load: {load}A | Poles: {poles} | Phase(s): {phases}".format
+
+# (phA, phB, phC) -> phase label, e.g. (True, False, True) -> "A,C"
+_PHASE_LABELS = {
+    (a, b, c): ','.join(p for p, on in zip("ABC", (a, b, c)) if on) or 'NONE'
+    for a in (False, True) for b in (False, True) for c in (False, True)
+}
+
 def summarize_for_gpt(ir: PanelScheduleIR) -> str:
     """
     Comprehensive electrical engineering data dump for technical review.
@@ -83,44 +122,38 @@ def summarize_for_gpt(ir: PanelScheduleIR) -> str:
     def fmt_pair(p: NameValuePair) -> str:
         return f"- {p.name_text}: {p.value if p.value is not None else 'NOT SPECIFIED'}"
 
-    left = "\n".join(fmt_pair(p) for p in ir.header.left_params)
-    right = "\n".join(fmt_pair(p) for p in ir.header.right_params)
-
-    lines = [
-        f"# PANEL SCHEDULE: {ir.header.panel_name}",
-        "",
-        "## ELECTRICAL SYSTEM PARAMETERS:",
-        left,
-        "",
-        "## INSTALLATION & PROTECTION:",
-        right,
-        "",
-        "## CIRCUIT LOADING ANALYSIS:",
-    ]
+    lines = [f"# PANEL SCHEDULE: {ir.header.panel_name}", "", "## ELECTRICAL SYSTEM PARAMETERS:"]
+    lines.extend([fmt_pair(p) for p in ir.header.left_params])
+    lines.extend(("", "## INSTALLATION & PROTECTION:"))
+    lines.extend([fmt_pair(p) for p in ir.header.right_params])
+    lines.extend(("", "## CIRCUIT LOADING ANALYSIS:"))
     
-    # Calculate phase totals for analysis
-    phase_a_total = sum(c.load_amps for c in ir.circuits if c.phA and c.load_amps)
-    phase_b_total = sum(c.load_amps for c in ir.circuits if c.phB and c.load_amps)
-    phase_c_total = sum(c.load_amps for c in ir.circuits if c.phC and c.load_amps)
+    # Calculate phase totals for analysis (single pass over circuits)
+    phase_a_total = phase_b_total = phase_c_total = 0
+    for c in ir.circuits:
+        if c.load_amps:
+            if c.phA: phase_a_total += c.load_amps
+            if c.phB: phase_b_total += c.load_amps
+            if c.phC: phase_c_total += c.load_amps
     
-    lines.append(f"Phase A Total Load: {phase_a_total:.1f}A")
-    lines.append(f"Phase B Total Load: {phase_b_total:.1f}A")
-    lines.append(f"Phase C Total Load: {phase_c_total:.1f}A")
-    lines.append("")
-    
-    # Show all circuits for complete analysis
-    lines.append(f"## ALL CIRCUITS ({len(ir.circuits)} total):")
-    for rec in sorted(ir.circuits, key=lambda x: x.ckt):
-        phases = []
-        if rec.phA: phases.append('A')
-        if rec.phB: phases.append('B')
-        if rec.phC: phases.append('C')
-        phase_str = ','.join(phases) if phases else 'NONE'
-        
-        lines.append(
-            f"CKT {rec.ckt:>2}: {rec.description or 'NO DESCRIPTION':<40} | "
-            f"Breaker: {rec.breaker_amps}A | Load: {rec.load_amps}A | "
-            f"Poles: {rec.poles or '?'} | Phase(s): {phase_str}"
+    lines.extend((
+        f"Phase A Total Load: {phase_a_total:.1f}A",
+        f"Phase B Total Load: {phase_b_total:.1f}A",
+        f"Phase C Total Load: {phase_c_total:.1f}A",
+        "",
+        # Show all circuits for complete analysis
+        f"## ALL CIRCUITS ({len(ir.circuits)} total):",
+    ))
+    lines.extend(
+        _CKT_ROW(
+            ckt=rec.ckt,
+            desc=rec.description or 'NO DESCRIPTION',
+            breaker=rec.breaker_amps,
+            load=rec.load_amps,
+            poles=rec.poles or '?',
+            phases=_PHASE_LABELS[bool(rec.phA), bool(rec.phB), bool(rec.phC)],
         )
+        for rec in sorted(ir.circuits, key=attrgetter("ckt"))
+    )
     
     return "\n".join(lines)
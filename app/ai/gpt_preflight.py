@@ -2,118 +2,140 @@
 # the newest OpenAI model is "gpt-5" which was released August 7, 2025.
 # do not change this unless explicitly requested by the user
 from __future__ import annotations
-import os, textwrap
-from typing import Dict, Any
-from openai import OpenAI
+import asyncio, os, textwrap
+from typing import Dict, Any, List, Optional, Tuple
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
 from app.schemas.panel_ir import PanelScheduleIR
 from app.ai.checklist import build_checklist, summarize_for_gpt
 from app.core.settings import settings
+from app.ai.llm import HTTP2, HTTP_LIMITS, LoopClients
+from app.utils import fastjson
 
 _MODEL = os.environ.get("OPENAI_MODEL", "gpt-4o-mini")
 
-def run_gpt_preflight(ir: PanelScheduleIR) -> Dict[str, Any]:
+# Panels per batched review call. Small models lose accuracy as more
+# independent items share one prompt, so keep batches modest.
+_MAX_BATCH = 8
+
+# Clients are built on first use (one per event loop), so reviews reuse pooled connections.
+# Use Replit AI Integrations - no personal API key required
+_CLIENTS = LoopClients(lambda: AsyncOpenAI(
+    api_key=settings.effective_api_key,
+    base_url=settings.effective_base_url,
+    http_client=DefaultAsyncHttpxClient(http2=HTTP2, limits=HTTP_LIMITS),
+))
+
+def _get_client() -> AsyncOpenAI:
+    return _CLIENTS.get()
+
+# -------------------------------
+# Prompt pieces (shared by single and batched reviews)
+# -------------------------------
+_SYSTEM_PROMPT = textwrap.dedent("""
+    You are a licensed Professional Electrical Engineer (PE) performing a technical design review.
+
+    YOUR ROLE:
+    - Analyze electrical system design, safety, and code compliance
+    - Validate electrical calculations (KVA, phase balance, conductor sizing)
+    - Identify potential electrical hazards or design issues
+    - Provide engineering insights and recommendations
+
+    DO NOT REVIEW:
+    - Formatting, aesthetics, or visual layout
+    - Template structure or cell positioning
+    - Font sizes, colors, or styling
+    - Document appearance
+
+    BE:
+    - Technical and precise with electrical terminology
+    - Conservative in safety assessments
+    - Factual with NEC code references when applicable
+    - Insightful about system design implications
+""").strip()
+
+# JSON shape of one panel's review
+_REVIEW_FORMAT = textwrap.dedent("""
+    {
+      "items": [
+        {"check": "<checklist item text>", "pass": true|false, "notes": "<engineering analysis>"},
+        ...
+      ],
+      "warnings": ["<critical electrical issues or code violations>"],
+      "recommendations": ["<engineering suggestions for improvement>"],
+      "system_analysis": {
+        "system_type": "<DELTA or WYE, with explanation>",
+        "grounding": "<grounded/ungrounded with rationale>",
+        "phase_balance": "<analysis of phase loading balance>",
+        "conductor_adequacy": "<assessment of conductor sizing>",
+        "panel_usage": "<insights on application and location suitability>",
+        "kva_calculation": "<total KVA with calculation shown>"
+      },
+      "summary": "<brief paragraph summarizing overall electrical design quality and key findings>",
+      "ok_to_build": true|false
+    }
+""").strip()
+
+_ENGINEERING_RULES = textwrap.dedent("""
+    ### ENGINEERING RULES:
+    1. Calculate phase balance: phases should be within ±20% of each other
+    2. Verify conductor sizing meets NEC Table 310.15(B)(16) for given ampacity
+    3. Check if MCB (Main Circuit Breaker) exceeds Main Bus Amps - this is a critical error
+    4. Validate that total connected load per phase doesn't exceed main bus rating
+    5. For 3-phase systems, verify neutral is sized per NEC 220.61
+    6. Identify any circuits where breaker size doesn't protect conductor adequately
+    7. Consider environmental factors based on location (wet, hazardous, outdoor, etc.)
+
+    ### ANALYSIS REQUIREMENTS:
+    - Show KVA calculation: KVA = (Voltage × Total_Amps × √3) / 1000 for 3-phase
+    - Calculate phase imbalance percentage: max((|A-avg|, |B-avg|, |C-avg|)) / avg × 100
+    - Verify ground conductor size per NEC 250.122
+    - Assess if panel location requires special enclosure (NEMA 3R, 4X, etc.)
+
+    IMPORTANT: Set ok_to_build=false if ANY critical electrical safety issues exist.
+""").strip()
+
+# Static scaffolding around the per-panel data, assembled once at import. Byte-for-byte
+# the prompt the review has always sent (6-space indented body, checklist items joined
+# with "- " after a leading "- " line), so precomputing it doesn't change model input.
+_INDENT = " " * 6
+_PREFLIGHT_HEADER = (
+    "Perform a comprehensive ELECTRICAL ENGINEERING REVIEW of this panel schedule.\n"
+    f"{_INDENT}Focus on technical correctness, safety, and code compliance.\n\n"
+    f"{_INDENT}### PANEL DATA\n{_INDENT}"
+)
+_CHECKLIST_HEADER = f"\n\n{_INDENT}### TECHNICAL REVIEW CHECKLIST\n{_INDENT}- \n"
+_PREFLIGHT_CHECKLIST_SEP = "- "
+_PREFLIGHT_FOOTER = "\n\n" + textwrap.indent(
+    f"### OUTPUT FORMAT (strict JSON):\n{_REVIEW_FORMAT}\n\n{_ENGINEERING_RULES}", _INDENT
+)
+
+# The batched prompt lists one checklist item per line
+_CHECKLIST_SEP = "\n- "
+
+_BATCH_FOOTER = (
+    "### OUTPUT FORMAT (strict JSON):\n"
+    '{"results": [{"index": <panel number in brackets>, ...review object...}, ...]}\n'
+    f"with exactly one result per panel, where each review object is:\n{_REVIEW_FORMAT}"
+    f"\n\n{_ENGINEERING_RULES}"
+)
+
+async def _complete_json(user: str) -> Tuple[str, Optional[str]]:
     """
-    Sends electrical engineering data to OpenAI for technical review.
-    Focus: System design, safety, code compliance, electrical calculations.
-    NO formatting or aesthetic review.
-    
-    Uses Replit AI Integrations (no personal API key required).
+    Run one review completion; returns (message text, finish_reason). No max_tokens:
+    a full review (every checklist item with notes) is never cut short by our own cap.
     """
-    checklist = build_checklist(ir)
-    context = summarize_for_gpt(ir)
-
-    system = textwrap.dedent("""
-        You are a licensed Professional Electrical Engineer (PE) performing a technical design review.
-        
-        YOUR ROLE:
-        - Analyze electrical system design, safety, and code compliance
-        - Validate electrical calculations (KVA, phase balance, conductor sizing)
-        - Identify potential electrical hazards or design issues
-        - Provide engineering insights and recommendations
-        
-        DO NOT REVIEW:
-        - Formatting, aesthetics, or visual layout
-        - Template structure or cell positioning
-        - Font sizes, colors, or styling
-        - Document appearance
-        
-        BE:
-        - Technical and precise with electrical terminology
-        - Conservative in safety assessments
-        - Factual with NEC code references when applicable
-        - Insightful about system design implications
-    """).strip()
-    
-    user = textwrap.dedent(f"""
-      Perform a comprehensive ELECTRICAL ENGINEERING REVIEW of this panel schedule.
-      Focus on technical correctness, safety, and code compliance.
-
-      ### PANEL DATA
-      {context}
-
-      ### TECHNICAL REVIEW CHECKLIST
-      - {chr(10)+'- '.join(checklist)}
-
-      ### OUTPUT FORMAT (strict JSON):
-      {{
-        "items": [
-          {{"check": "<checklist item text>", "pass": true|false, "notes": "<engineering analysis>"}},
-          ...
-        ],
-        "warnings": ["<critical electrical issues or code violations>"],
-        "recommendations": ["<engineering suggestions for improvement>"],
-        "system_analysis": {{
-          "system_type": "<DELTA or WYE, with explanation>",
-          "grounding": "<grounded/ungrounded with rationale>",
-          "phase_balance": "<analysis of phase loading balance>",
-          "conductor_adequacy": "<assessment of conductor sizing>",
-          "panel_usage": "<insights on application and location suitability>",
-          "kva_calculation": "<total KVA with calculation shown>"
-        }},
-        "summary": "<brief paragraph summarizing overall electrical design quality and key findings>",
-        "ok_to_build": true|false
-      }}
-
-      ### ENGINEERING RULES:
-      1. Calculate phase balance: phases should be within ±20% of each other
-      2. Verify conductor sizing meets NEC Table 310.15(B)(16) for given ampacity
-      3. Check if MCB (Main Circuit Breaker) exceeds Main Bus Amps - this is a critical error
-      4. Validate that total connected load per phase doesn't exceed main bus rating
-      5. For 3-phase systems, verify neutral is sized per NEC 220.61
-      6. Identify any circuits where breaker size doesn't protect conductor adequately
-      7. Consider environmental factors based on location (wet, hazardous, outdoor, etc.)
-      
-      ### ANALYSIS REQUIREMENTS:
-      - Show KVA calculation: KVA = (Voltage × Total_Amps × √3) / 1000 for 3-phase
-      - Calculate phase imbalance percentage: max((|A-avg|, |B-avg|, |C-avg|)) / avg × 100
-      - Verify ground conductor size per NEC 250.122
-      - Assess if panel location requires special enclosure (NEMA 3R, 4X, etc.)
-      
-      IMPORTANT: Set ok_to_build=false if ANY critical electrical safety issues exist.
-    """).strip()
-
-    # Use Replit AI Integrations - no personal API key required
-    client = OpenAI(
-        api_key=settings.effective_api_key,
-        base_url=settings.effective_base_url
-    )
-    
-    resp = client.chat.completions.create(
+    resp = await _get_client().chat.completions.create(
         model=_MODEL,
         messages=[
-            {"role": "system", "content": system},
+            {"role": "system", "content": _SYSTEM_PROMPT},
             {"role": "user", "content": user},
         ],
         response_format={"type": "json_object"},
     )
+    choice = resp.choices[0]
+    return choice.message.content or "", choice.finish_reason
 
-    content = resp.choices[0].message.content
-    import json
-    try:
-        data = json.loads(content)
-    except Exception:
-        data = {"items": [], "warnings": ["LLM returned non-JSON"], "ok_to_build": False, "__raw__": content}
-    
+def _with_defaults(data: Dict[str, Any]) -> Dict[str, Any]:
     # Guardrail: always present required fields
     data.setdefault("items", [])
     data.setdefault("warnings", [])
@@ -121,5 +143,83 @@ def run_gpt_preflight(ir: PanelScheduleIR) -> Dict[str, Any]:
     data.setdefault("system_analysis", {})
     data.setdefault("summary", "")
     data.setdefault("ok_to_build", False)
-    
     return data
+
+async def run_gpt_preflight(ir: PanelScheduleIR) -> Dict[str, Any]:
+    """
+    Sends electrical engineering data to OpenAI for technical review.
+    Focus: System design, safety, code compliance, electrical calculations.
+    NO formatting or aesthetic review.
+
+    Uses Replit AI Integrations (no personal API key required).
+    """
+    checklist = build_checklist(ir)
+    context = summarize_for_gpt(ir)
+
+    user = _PREFLIGHT_HEADER + context + _CHECKLIST_HEADER + _PREFLIGHT_CHECKLIST_SEP.join(checklist) + _PREFLIGHT_FOOTER
+
+    content, finish_reason = await _complete_json(user)
+    if finish_reason == "length":
+        # Hit the model's output limit: the JSON is incomplete, not malformed
+        data = {"items": [], "warnings": ["LLM review was truncated at the output token limit"],
+                "ok_to_build": False, "__raw__": content}
+        return _with_defaults(data)
+    try:
+        data = fastjson.loads(content)
+    except Exception:
+        data = {"items": [], "warnings": ["LLM returned non-JSON"], "ok_to_build": False, "__raw__": content}
+
+    return _with_defaults(data)
+
+def _batch_user_prompt(irs: List[PanelScheduleIR]) -> str:
+    parts = [
+        f"Perform a comprehensive ELECTRICAL ENGINEERING REVIEW of each of the {len(irs)} panel schedules below.\n"
+        "Review every panel independently; do not mix data between panels.\n"
+        "Focus on technical correctness, safety, and code compliance."
+    ]
+    for i, ir in enumerate(irs, 1):
+        parts.append(f"### PANEL DATA [{i}]\n{summarize_for_gpt(ir)}")
+        parts.append(f"### TECHNICAL REVIEW CHECKLIST [{i}]\n- " + _CHECKLIST_SEP.join(build_checklist(ir)))
+    parts.append(_BATCH_FOOTER)
+    return "\n\n".join(parts)
+
+def _split_batch_results(content: Optional[str], count: int) -> List[Dict[str, Any]]:
+    """Demultiplex a batched response into one review per panel, in input order."""
+    try:
+        results = fastjson.loads(content).get("results", [])
+    except Exception:
+        results = []
+    by_index = {}
+    for r in results:
+        if isinstance(r, dict) and isinstance(r.get("index"), int):
+            by_index.setdefault(r.pop("index"), r)
+
+    out = []
+    for i in range(1, count + 1):
+        data = by_index.get(i)
+        if data is None:
+            data = {"items": [], "warnings": ["LLM returned no review for this panel"], "ok_to_build": False}
+        out.append(_with_defaults(data))
+    return out
+
+async def _run_gpt_preflight_chunk(irs: List[PanelScheduleIR]) -> List[Dict[str, Any]]:
+    content, finish_reason = await _complete_json(_batch_user_prompt(irs))
+    if finish_reason == "length":
+        # Reviews for this group don't fit in one response: review each panel on its own
+        return list(await asyncio.gather(*(run_gpt_preflight(ir) for ir in irs)))
+    return _split_batch_results(content, len(irs))
+
+async def run_gpt_preflight_batch(irs: List[PanelScheduleIR]) -> List[Dict[str, Any]]:
+    """
+    Review several panels with one LLM call per group of up to _MAX_BATCH panels.
+    The system prompt, rules and output format are sent once per group instead of once per panel.
+    Returns one review dict per IR, in input order, shaped like run_gpt_preflight's result.
+
+    Library API for bulk/offline reviews: the app's routes review one panel per request
+    (export_zip calls run_gpt_preflight) and don't call this.
+    """
+    if len(irs) == 1:
+        return [await run_gpt_preflight(irs[0])]
+    chunks = [irs[i:i + _MAX_BATCH] for i in range(0, len(irs), _MAX_BATCH)]
+    grouped = await asyncio.gather(*(_run_gpt_preflight_chunk(c) for c in chunks))
+    return [review for group in grouped for review in group]
@@ -1,30 +1,109 @@
 # app/ai/llm.py
 # LLM service wrapper with safe config, retries, and concise helper functions.
 
+import asyncio
+import copy
+import hashlib
+import importlib.util
 import json
 import logging
+import os
+import re
+import threading
 import time
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
-from openai import OpenAI
+import httpx
+from openai import NOT_GIVEN, AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
 from openai._exceptions import RateLimitError, APIConnectionError, APIStatusError, AuthenticationError
 
 # Import the central settings manager so this module stays in sync with .env
 from app.core.settings import settings
+from app.utils import fastjson
+from app.utils.ttl_cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
 # ---- Client construction (single instance) ----
 # Best practice: build one client per process. This reduces overhead, and is easier to test/mocking.
-client = OpenAI(
-    api_key=settings.effective_api_key,     # supports both direct OpenAI and Replit AI Integrations
-    base_url=settings.effective_base_url,   # optional: for Replit AI Integrations
-    organization=settings.OPENAI_ORG_ID, # optional
-    project=settings.OPENAI_PROJECT,     # optional
-    timeout=settings.OPENAI_TIMEOUT_S,   # best practice: prevent hung requests
-)
+# Built lazily on first use so importing this module never requires an API key, and
+# shared across requests so keep-alive connections to the API are pooled.
+_CLIENT: Optional[OpenAI] = None
+_CLIENT_LOCK = threading.Lock()
+
+# Connection pool shared by every call through a client: enough keep-alive connections
+# that concurrent plan/review calls don't pay a fresh TCP+TLS handshake, held open for a
+# minute between bursts. HTTP/2 (one multiplexed connection) when the h2 package is present.
+HTTP_LIMITS = httpx.Limits(max_connections=256, max_keepalive_connections=64, keepalive_expiry=60)
+HTTP2 = importlib.util.find_spec("h2") is not None
+
+def _get_client() -> OpenAI:
+    global _CLIENT
+    if _CLIENT is None:
+        with _CLIENT_LOCK:
+            if _CLIENT is None:
+                _CLIENT = OpenAI(
+                    api_key=settings.effective_api_key,     # supports both direct OpenAI and Replit AI Integrations
+                    base_url=settings.effective_base_url,   # optional: for Replit AI Integrations
+                    organization=settings.OPENAI_ORG_ID, # optional
+                    project=settings.OPENAI_PROJECT,     # optional
+                    timeout=settings.OPENAI_TIMEOUT_S,   # best practice: prevent hung requests
+                    http_client=DefaultHttpxClient(http2=HTTP2, limits=HTTP_LIMITS),
+                )
+    return _CLIENT
+
+class LoopClients:
+    """One AsyncOpenAI client per event loop, built on first use from that loop.
+
+    httpx async pools are bound to the loop they were created on, so a client is never shared
+    across loops, and one still in use on another loop (e.g. a portal thread) is left alone.
+    Clients of loops that have since closed are dropped when the next one is built: their
+    transports can no longer run a close, and release their sockets once collected.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._clients: Dict[asyncio.AbstractEventLoop, AsyncOpenAI] = {}
+        self._lock = threading.Lock()
+
+    def get(self) -> AsyncOpenAI:
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            with self._lock:
+                for old in [l for l in self._clients if l.is_closed()]:
+                    del self._clients[old]
+                client = self._clients.get(loop)
+                if client is None:
+                    client = self._clients[loop] = self._factory()
+        return client
+
+    async def aclose(self) -> None:
+        """Close the running loop's client, if one was built (app shutdown)."""
+        with self._lock:
+            client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.close()
+
+# Async twin for callers running on the event loop.
+_ASYNC_CLIENTS = LoopClients(lambda: AsyncOpenAI(
+    api_key=settings.effective_api_key,
+    base_url=settings.effective_base_url,
+    organization=settings.OPENAI_ORG_ID,
+    project=settings.OPENAI_PROJECT,
+    timeout=settings.OPENAI_TIMEOUT_S,
+    http_client=DefaultAsyncHttpxClient(http2=HTTP2, limits=HTTP_LIMITS),
+))
+
+def _get_async_client() -> AsyncOpenAI:
+    return _ASYNC_CLIENTS.get()
 
 DEFAULT_MODEL = settings.OPENAI_MODEL  # centralize model selection
+TINY_MODEL = settings.OPENAI_MODEL_TINY  # for throwaway outputs like the 3-5 word confirmation
+
+# Whether any API key is configured. Decided once at import: the public entry points below are
+# bound to either the LLM-backed or the local fallback implementation, with no per-call check.
+_HAS_KEY = bool(settings.AI_INTEGRATIONS_OPENAI_API_KEY or settings.OPENAI_API_KEY)
 
 # --------------------------
 # Health: quick auth check
@@ -35,7 +114,7 @@ def test_auth() -> bool:
     Returns True if authentication works, False otherwise.
     """
     try:
-        client.models.list()
+        _get_client().models.list()
         logger.info("OpenAI authentication successful.")
         return True
     except Exception as e:
@@ -51,7 +130,7 @@ def _chat_with_retries(
     messages: List[Dict[str, str]],
     model: Optional[str] = None,
     temperature: float = 0.2,
-    max_tokens: int = 512,
+    max_tokens: Optional[int] = 512,
     response_format: Optional[Dict[str, str]] = None,
     user: Optional[str] = None,
     max_retries: int = 2,
@@ -69,11 +148,11 @@ def _chat_with_retries(
 
     while attempt <= max_retries:
         try:
-            return client.chat.completions.create(
+            return _get_client().chat.completions.create(
                 model=mdl,
                 messages=messages,
                 temperature=temperature,
-                max_tokens=max_tokens,
+                max_tokens=NOT_GIVEN if max_tokens is None else max_tokens,  # None: no cap
                 response_format=response_format,
                 user=user,
             )
@@ -99,6 +178,52 @@ def _chat_with_retries(
 
     raise RuntimeError(f"LLM call failed after {attempt} attempts: {last_err}")
 
+async def _achat_with_retries(
+    *,
+    messages: List[Dict[str, str]],
+    model: Optional[str] = None,
+    temperature: float = 0.2,
+    max_tokens: Optional[int] = 512,
+    response_format: Optional[Dict[str, str]] = None,
+    user: Optional[str] = None,
+    max_retries: int = 2,
+    backoff_s: float = 0.75,
+):
+    """Async version of _chat_with_retries; backs off without blocking the event loop."""
+    mdl = model or DEFAULT_MODEL
+    attempt = 0
+    last_err: Optional[Exception] = None
+
+    while attempt <= max_retries:
+        try:
+            return await _get_async_client().chat.completions.create(
+                model=mdl,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=NOT_GIVEN if max_tokens is None else max_tokens,  # None: no cap
+                response_format=response_format,
+                user=user,
+            )
+        except (RateLimitError, APIConnectionError) as e:
+            last_err = e
+            delay = backoff_s * (2 ** attempt)
+            logger.warning(f"Transient LLM error (attempt {attempt+1}/{max_retries+1}): {e}. Backing off {delay:.2f}s")
+            await asyncio.sleep(delay)
+            attempt += 1
+        except AuthenticationError as e:
+            logger.error("Authentication error with OpenAI: %s", e)
+            raise
+        except APIStatusError as e:
+            last_err = e
+            logger.error("OpenAI API status error: %s", e)
+            break
+        except Exception as e:
+            last_err = e
+            logger.exception("Unexpected LLM error: %s", e)
+            break
+
+    raise RuntimeError(f"LLM call failed after {attempt} attempts: {last_err}")
+
 # --------------------------
 # Prompts / Schema
 # --------------------------
@@ -132,6 +257,9 @@ SCHEMA = {
   "required": ["task","project"]
 }
 
+# SCHEMA is constant: serialize it once, compactly (fewer prompt tokens than the default separators)
+_SCHEMA_JSON = json.dumps(SCHEMA, separators=(",", ":"))
+
 SYSTEM_PROMPT = (
   "You are a PE electrical design assistant. You must:\n"
   "1) Read the user command and the list of available project files.\n"
@@ -146,45 +274,275 @@ SYSTEM_PROMPT = (
   "7) Look for parameters in ANY user input, not just initial commands. Users may provide missing info in follow-up messages."
 )
 
+# Static instructions + schema lead the conversation so every plan request shares a
+# byte-identical prefix (eligible for OpenAI's automatic prompt caching); only the
+# command and file list vary, and they come last.
+_PLAN_SYSTEM_PROMPT = (
+  f"{SYSTEM_PROMPT}\n\n"
+  f"SCHEMA:\n{_SCHEMA_JSON}\n\n"
+  "Return ONLY JSON conforming to the SCHEMA above."
+)
+
+_CIRCUIT_SYSTEM_PROMPT = """You are a circuit data extraction assistant. Extract circuit information from user input and return STRICT JSON.
+
+Output format:
+{
+  "circuit_numbers": "circuit numbers as they appear in input (e.g., '1' or '3,5' or '2/4/6')",
+  "pole_spaces": [array of integers representing pole space numbers],
+  "poles": integer (1, 2, or 3),
+  "breaker_amps": float (breaker rating in amps),
+  "load_amps": float (actual load in amps),
+  "description": "brief uppercase description of load including location if mentioned"
+}
+
+Rules:
+- If no circuit mentioned, return {}
+- circuit_numbers preserves the original separator format from user input
+- pole_spaces is always an array of integers (e.g., [3, 5] or [2, 4, 6])
+- Pole spaces can be separated by commas, slashes, spaces, or hyphens in the input
+- For "circuit 2/4/6", circuit_numbers="2/4/6" AND pole_spaces=[2, 4, 6]
+- Extract all numeric values accurately
+- Description should include location if mentioned (e.g., 'ROOFTOP MAU UNIT')
+- Remove articles (a, an, the) and breaker/circuit keywords from description
+- load_amps should be the actual load, not breaker rating
+- Keep descriptions concise but meaningful (max 39 characters)
+"""
+
+# --------------------------
+# Text extraction patterns (compiled once at import)
+# --------------------------
+_VOLTAGE_RE = re.compile(r'(\d+(?:/\d+)?)\s*v(?:olt(?:s|age)?)?', re.IGNORECASE)
+_PHASE_RE = re.compile(r'(?:phase\s*(?:is|:)?\s*(\d+|single|three|one)|(\d+|single|three|one)[\s-]*(?:phase|ph)\b)', re.IGNORECASE)
+_WIRE_RE = re.compile(r'(?:wire\s*(?:is|:)?\s*(\d+)|(\d+)\s*w(?:ire)?)', re.IGNORECASE)
+_BUS_AMPS_RE = re.compile(r'(?:main\s+bus(?:\s+amp(?:s|ere)?)?|bus\s+amp(?:s|ere)?)[\s:]+(\d+)\s*a?(?:mp(?:s|ere)?)?', re.IGNORECASE)
+_MLO_RE = re.compile(r'\bMLO\b|main\s+lug\s+only', re.IGNORECASE)
+_BREAKER_RE = re.compile(r'(?:main\s+breaker|breaker|mcb)[\s:]*([A-Z0-9/]+)', re.IGNORECASE)
+_MOUNTING_RE = re.compile(r'(flush|surface|recess(?:ed)?)\s*mount', re.IGNORECASE)
+_FEED_RE = re.compile(r'(?:feed\s+from|fed\s+from)[\s:]*([A-Z0-9\s\-]+)', re.IGNORECASE)
+_LOCATION_RE = re.compile(r'(?:location|located\s+(?:in|at))[\s:]*([^,.]+)', re.IGNORECASE)
+
+def _norm_phase(m: "re.Match") -> str:
+    phase_val = (m.group(1) or m.group(2)).lower()
+    if phase_val in ['three', '3']:
+        return '3'
+    if phase_val in ['single', 'one', '1']:
+        return '1'
+    return phase_val
+
+# (spec key, pattern, normalizer) in output order. "mlo" and "breaker" both feed main_breaker.
+_PANEL_SPEC_FIELDS = (
+    ('voltage', _VOLTAGE_RE, lambda m: m.group(1).upper() + 'V'),
+    ('phase', _PHASE_RE, _norm_phase),
+    ('wire', _WIRE_RE, lambda m: m.group(1) or m.group(2)),
+    ('main_bus_amps', _BUS_AMPS_RE, lambda m: m.group(1)),
+    ('mlo', _MLO_RE, lambda m: 'MLO'),
+    ('breaker', _BREAKER_RE, lambda m: m.group(1).upper()),
+    ('mounting', _MOUNTING_RE, lambda m: m.group(1).upper()),
+    ('feed', _FEED_RE, lambda m: m.group(1).strip()),
+    ('location', _LOCATION_RE, lambda m: m.group(1).strip().lower().title()),
+)
+
+# One scan over the text for every field. Each alternative is a zero-width lookahead so
+# matches never consume input: every field still sees the whole string and we record the
+# leftmost position each one matches at, exactly as an independent re.search would.
+_PANEL_SPEC_SCAN_RE = re.compile(
+    '|'.join(f'(?=(?P<{key}>{rx.pattern}))' for key, rx, _ in _PANEL_SPEC_FIELDS),
+    re.IGNORECASE,
+)
+
+# Every panel-spec pattern needs a digit or one of these (lowercase) substrings to match,
+# so text with neither can skip the scan entirely.
+_PANEL_SPEC_HINTS = ("ph", "mlo", "lug", "breaker", "mcb", "mount", "feed", "fed", "locat")
+_DIGIT_RE = re.compile(r'\d')
+
+_PANEL_NAME_RES = tuple(re.compile(p, re.IGNORECASE) for p in (
+    r'panel\s+name\s+(?:is\s+)?([A-Z0-9][A-Z0-9\-\s]*[A-Z0-9]|[A-Z0-9])',
+    r'panel\s+(?:is\s+)?called\s+([A-Z0-9][A-Z0-9\-\s]*[A-Z0-9]|[A-Z0-9])',
+    r'panel\s+(?:is\s+)?named\s+([A-Z0-9][A-Z0-9\-\s]*[A-Z0-9]|[A-Z0-9])',
+    r'panel\s+identifier\s+(?:is\s+)?([A-Z0-9][A-Z0-9\-\s]*[A-Z0-9]|[A-Z0-9])',
+))
+_CKTS_COUNT_RE = re.compile(r'\b(\d+)\s*(?:circuits?|ckts?|spaces?)?\b')
+
+# Fallback task keywords in priority order; the first task with any keyword in the text wins
+_TASK_KEYWORDS = (
+    ("panel_schedule", ("panel schedule", "panelboard schedule", "panel board schedule", "panelboard", "panel board", "circuit schedule")),
+    ("power_plan", ("power plan", "receptacle plan", "outlet plan", "power layout")),
+    ("lighting_plan", ("lighting plan", "light plan", "fixture plan", "illumination plan")),
+    ("revit_package", ("revit", "dynamo", "bim")),
+    ("one_line", ("one line", "oneline", "one-line", "single line")),
+)
+# All keywords in one pass: lookaheads so overlapping keywords are still seen, and at any
+# position the higher-priority task's alternative is tried first
+_TASK_SCAN_RE = re.compile(
+    '|'.join(f'(?=(?P<{task}>{"|".join(map(re.escape, kws))}))' for task, kws in _TASK_KEYWORDS)
+)
+
+# Circuit utterances (matched against lowercased text)
+_CIRCUIT_NUM_RE = re.compile(r'(?:circuit|ckt|pole\s+space)s?\s+([\d,/\s-]+)')
+_CIRCUIT_SEP_RE = re.compile(r'[,/\s-]+')
+_COMBINED_BREAKER_RE = re.compile(r'(\d+)\s*a[f]?/(\d+)\s*p')
+_POLES_RE = re.compile(r'(\d+)[\s-]*p(?:ole)?(?:s)?\b')
+_CIRCUIT_BREAKER_RE = re.compile(r'(?:breaker(?:\s+amp(?:s|ere)?)?|amp(?:s|ere)?)[\s:]*(\d+)\s*a?|(\d+)\s*a(?:mp)?(?:\s+breaker)')
+_LOAD_RE = re.compile(r'(?:at|load(?:\s+is|\s+of)?|draws?|with\s+a\s+load\s+of)[\s:]*(\d+(?:\.\d+)?)\s*a(?:mp(?:s|ere)?)?')
+_PHASE_AMPS_RE = re.compile(r'(?:phase\s+amp(?:s)?(?:\s+is)?\s+|per\s+phase\s+)(\d+(?:\.\d+)?)')
+_DESC_FEEDING_RE = re.compile(r'feeding\s+(?:a|an|the)?\s*(.+?)\s+(?:and\s+the\s+)?(?:with|load|at|\d+)')
+_DESC_FEEDS_RE = re.compile(r'feeds?\s+(?:and\s+)?(?:a|an|the)?\s*(.+?)\s+(?:and\s+the\s+)?(?:full\s+)?(?:load|at|with|\d+)')
+_DESC_IS_RE = re.compile(r'is\s+(?:a|an|for)?\s*([^,]+?)\s+(?:and|with|at|\d+\s*a)')
+# Breaker/pole/load fields share one lookahead scan, like _PANEL_SPEC_SCAN_RE.
+# None of them can start matching at the same position as another, so the
+# first position recorded per field is the one its own re.search would find.
+_CIRCUIT_SPEC_FIELDS = (
+    ('combined', _COMBINED_BREAKER_RE),
+    ('poles', _POLES_RE),
+    ('breaker', _CIRCUIT_BREAKER_RE),
+    ('load', _LOAD_RE),
+    ('phase_amps', _PHASE_AMPS_RE),
+)
+_CIRCUIT_SPEC_SCAN_RE = re.compile(
+    '|'.join(f'(?=(?P<{key}>{rx.pattern}))' for key, rx in _CIRCUIT_SPEC_FIELDS)
+)
+# (pattern, keyword it cannot match without, strip breaker/pole wording) in priority order:
+#   "feeding [a] <description>"                  - matches "feeding a rooftop MAU unit"
+#   "feeds [a] <description> in <location>/at <load>"
+#   "is [a] <description> [and/with]"
+_DESC_PATTERNS = (
+    (_DESC_FEEDING_RE, 'feeding', False),
+    (_DESC_FEEDS_RE, 'feed', False),
+    (_DESC_IS_RE, 'is', True),
+)
+# Breaker/pole wording stripped from an "is a ..." description
+_DESC_STRIP_RES = tuple(re.compile(p, re.IGNORECASE) for p in (
+    r'\d+\s*a[f]?/\d+\s*p\s+(?:breaker|circuit)',
+    r'\d+[\s-]*p(?:ole)?\s+(?:breaker|circuit)',
+    r'\d+\s*a(?:mp)?\s+(?:breaker|circuit)',
+))
+
 # --------------------------
 # Helpers
 # --------------------------
+# Confirmations for identical prompts (replays, retries) are reused instead of re-asking the LLM
+_SUMMARY_CACHE = TTLCache(maxsize=1024)
+
+# Parsed plans keyed on (user_text, bucket file names); hits skip both the LLM call and JSON decode
+_PLAN_CACHE = TTLCache(maxsize=512, ttl_s=3600)
+
+# Parsed circuit extractions (temperature 0, so deterministic per utterance)
+_CIRCUIT_CACHE = TTLCache(maxsize=1024, ttl_s=3600)
+
+# A circuit reply is six short fields (~60 tokens even pretty-printed); the cap leaves
+# headroom for a 39-char description but stops a model that keeps going.
+_CIRCUIT_MAX_TOKENS = 100
+
+def _plan_cache_key(user_text: str, files: List[str]) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(user_text.encode("utf-8"))
+    for name in sorted(files):
+        h.update(b"\0")
+        h.update(name.encode("utf-8"))
+    return h.hexdigest()
+
+# bucket_dir -> (directory st_mtime_ns, file names). Adding, removing or renaming
+# an entry bumps the directory mtime, so an unchanged mtime means an unchanged listing.
+# Bounded, and entries expire: per-task upload folders are deleted by the daily cleanup.
+_BUCKET_CACHE = TTLCache(maxsize=256, ttl_s=3600)
+
 def _list_bucket(bucket_dir: str) -> List[str]:
-    from pathlib import Path
-    p = Path(bucket_dir)
-    return [f.name for f in p.iterdir() if f.is_file()] if p.exists() else []
+    try:
+        mtime = os.stat(bucket_dir).st_mtime_ns
+    except OSError:
+        return []
+    cached = _BUCKET_CACHE.get(bucket_dir)
+    if cached is not None and cached[0] == mtime:
+        return list(cached[1])
+    # DirEntry carries the file type from readdir, so no per-entry stat() for plain files
+    try:
+        with os.scandir(bucket_dir) as it:
+            names = [e.name for e in it if e.is_file()]
+    except OSError:
+        return []  # removed (or made unreadable) since the stat above
+    _BUCKET_CACHE.put(bucket_dir, (mtime, names))
+    return list(names)
 
 # --------------------------
 # Public API
 # --------------------------
-def summarize_intent(user_text: str) -> str:
+def _summary_messages(user_text: str) -> List[Dict[str, str]]:
+    return [
+        {"role": "system", "content": "Respond with a brief 3-5 word confirmation like 'Got it' or 'Understood'. Be extremely concise."},
+        {"role": "user", "content": user_text},
+    ]
+
+def _summary_from_response(resp) -> Optional[str]:
+    if not resp.choices:
+        logger.error("LLM returned no choices for summarize_intent.")
+        return None
+    return (resp.choices[0].message.content or "").strip() or None
+
+def _summarize_intent_llm(user_text: str) -> str:
     """
     Return a brief, 3–5 word confirmation like 'Got it' or 'Understood'.
     Best practice: reuse the module-level client; keep low temp.
+    Results are cached per user_text; the "Got it." fallback is never cached.
     """
+    cached = _SUMMARY_CACHE.get(user_text)
+    if cached is not None:
+        return cached
     try:
         resp = _chat_with_retries(
-            messages=[
-                {"role": "system", "content": "Respond with a brief 3-5 word confirmation like 'Got it' or 'Understood'. Be extremely concise."},
-                {"role": "user", "content": user_text},
-            ],
-            model=DEFAULT_MODEL,
+            messages=_summary_messages(user_text),
+            model=TINY_MODEL,
             temperature=0.2,
             max_tokens=16,
         )
-        if not resp.choices:
-            logger.error("LLM returned no choices for summarize_intent.")
-            return "Got it."
-        return (resp.choices[0].message.content or "").strip() or "Got it."
+        summary = _summary_from_response(resp)
     except Exception as e:
         logger.warning(f"OpenAI API error during intent summarization: {e.__class__.__name__}: {e}. Using fallback.")
         return "Got it."
-    
-def extract_circuit_from_text(user_text: str) -> Dict[str, Any]:
+    if summary is None:
+        return "Got it."
+    _SUMMARY_CACHE.put(user_text, summary)
+    return summary
+
+async def _summarize_intent_llm_async(user_text: str) -> str:
+    """Async version of _summarize_intent_llm (shares its cache)."""
+    cached = _SUMMARY_CACHE.get(user_text)
+    if cached is not None:
+        return cached
+    try:
+        resp = await _achat_with_retries(
+            messages=_summary_messages(user_text),
+            model=TINY_MODEL,
+            temperature=0.2,
+            max_tokens=16,
+        )
+        summary = _summary_from_response(resp)
+    except Exception as e:
+        logger.warning(f"OpenAI API error during intent summarization: {e.__class__.__name__}: {e}. Using fallback.")
+        return "Got it."
+    if summary is None:
+        return "Got it."
+    _SUMMARY_CACHE.put(user_text, summary)
+    return summary
+
+def _summarize_intent_local(user_text: str) -> str:
+    """Confirm locally; the acknowledgement carries no information worth a round trip."""
+    return "Got it."
+
+async def _summarize_intent_local_async(user_text: str) -> str:
+    return "Got it."
+
+# The LLM confirmation is opt-in (AI_SUMMARY_USE_LLM) and needs a key
+_SUMMARY_USE_LLM = _HAS_KEY and settings.AI_SUMMARY_USE_LLM
+summarize_intent = _summarize_intent_llm if _SUMMARY_USE_LLM else _summarize_intent_local
+summarize_intent_async = _summarize_intent_llm_async if _SUMMARY_USE_LLM else _summarize_intent_local_async
+
+
+def extract_circuit_from_text(user_text: str, text_lower: Optional[str] = None) -> Dict[str, Any]:
     """
     Extract circuit information from voice/text input.
     Returns dict with keys: circuit_numbers, pole_spaces, description, poles, breaker_amps, load_amps
     Returns empty dict if no circuit data found.
+    Pass `text_lower` (user_text.lower()) when the caller already has it.
     
     Example: "circuit 1 is a 20A/1P breaker and feeds and exhaust fan at 8A"
     Returns: {'circuit_numbers': '1', 'pole_spaces': [1], 'poles': 1, 'breaker_amps': 20, 'load_amps': 8, 'description': 'EXHAUST FAN'}
@@ -192,14 +550,17 @@ def extract_circuit_from_text(user_text: str) -> Dict[str, Any]:
     Example: "circuit 3,5 is a 30A/2P circuit that feeds a cold water pump in the basement and the full load is 18A"
     Returns: {'circuit_numbers': '3,5', 'pole_spaces': [3, 5], 'poles': 2, 'breaker_amps': 30, 'load_amps': 18, 'description': 'BASEMENT COLD WATER PUMP'}
     """
-    import re
-    
     circuit_data = {}
-    text_lower = user_text.lower()
+    if text_lower is None:
+        text_lower = user_text.lower()
+    
+    # Substring pre-check for the keywords _CIRCUIT_NUM_RE requires; skips the regexes for chat turns
+    if "circuit" not in text_lower and "ckt" not in text_lower and "pole" not in text_lower:
+        return {}
     
     # Look for circuit number patterns with multiple separators: comma, slash, space, hyphen
     # Matches: "circuit 1", "circuits 1,3,5", "circuit 2/4/6", "circuit 2 4 6", etc.
-    circuit_num_match = re.search(r'(?:circuit|ckt|pole\s+space)s?\s+([\d,/\s-]+)', text_lower)
+    circuit_num_match = _CIRCUIT_NUM_RE.search(text_lower)
     if not circuit_num_match:
         return {}  # Not circuit-related input
     
@@ -208,64 +569,85 @@ def extract_circuit_from_text(user_text: str) -> Dict[str, Any]:
     
     # Parse pole spaces into a list of integers, handling multiple separators
     # Split on comma, slash, space, or hyphen
-    pole_spaces = [int(n.strip()) for n in re.split(r'[,/\s-]+', circuit_nums_raw) if n.strip().isdigit()]
+    pole_spaces = [int(n.strip()) for n in _CIRCUIT_SEP_RE.split(circuit_nums_raw) if n.strip().isdigit()]
     circuit_data['pole_spaces'] = pole_spaces
     
+    # First match per field, from a single pass over the text
+    positions: Dict[str, int] = {}
+    for m in _CIRCUIT_SPEC_SCAN_RE.finditer(text_lower):
+        positions.setdefault(m.lastgroup, m.start())
+        if len(positions) == len(_CIRCUIT_SPEC_FIELDS):
+            break
+    matches = {key: rx.match(text_lower, positions[key]) for key, rx in _CIRCUIT_SPEC_FIELDS if key in positions}
+    
     # Combined breaker format: "20A/1P" or "30AF/2P"
-    combined_match = re.search(r'(\d+)\s*a[f]?/(\d+)\s*p', text_lower)
+    combined_match = matches.get('combined')
     if combined_match:
         circuit_data['breaker_amps'] = int(combined_match.group(1))
         circuit_data['poles'] = int(combined_match.group(2))
     else:
         # Poles: "1 pole", "3-pole", "2P"
-        poles_match = re.search(r'(\d+)[\s-]*p(?:ole)?(?:s)?\b', text_lower)
+        poles_match = matches.get('poles')
         if poles_match:
             circuit_data['poles'] = int(poles_match.group(1))
         
         # Breaker amps: "20A breaker", "30 amp"
-        breaker_match = re.search(r'(?:breaker(?:\s+amp(?:s|ere)?)?|amp(?:s|ere)?)[\s:]*(\d+)\s*a?|(\d+)\s*a(?:mp)?(?:\s+breaker)', text_lower)
+        breaker_match = matches.get('breaker')
         if breaker_match:
             circuit_data['breaker_amps'] = int(breaker_match.group(1) or breaker_match.group(2))
     
     # Load amps: "at 8A", "feeds at 8 amps", "load is 10A", "with a load of 40A", "load of 40A"
-    load_match = re.search(r'(?:at|load(?:\s+is|\s+of)?|draws?|with\s+a\s+load\s+of)[\s:]*(\d+(?:\.\d+)?)\s*a(?:mp(?:s|ere)?)?', text_lower)
+    load_match = matches.get('load')
     if load_match:
         circuit_data['load_amps'] = float(load_match.group(1))
     else:
         # Also check for "phase amp" patterns as fallback
-        phase_amps_match = re.search(r'(?:phase\s+amp(?:s)?(?:\s+is)?\s+|per\s+phase\s+)(\d+(?:\.\d+)?)', text_lower)
+        phase_amps_match = matches.get('phase_amps')
         if phase_amps_match:
             circuit_data['load_amps'] = float(phase_amps_match.group(1))
     
-    # Description: extract from various patterns
-    # Pattern 1: "feeding [a] <description>" - matches "feeding a rooftop MAU unit"
-    desc_match = re.search(r'feeding\s+(?:a|an|the)?\s*(.+?)\s+(?:and\s+the\s+)?(?:with|load|at|\d+)', text_lower)
-    if desc_match:
+    # Description: the first pattern (in priority order) that matches wins. Each needs a
+    # literal keyword, so patterns whose keyword is absent are skipped without a scan.
+    for desc_re, keyword, strip_ratings in _DESC_PATTERNS:
+        if keyword not in text_lower:
+            continue
+        desc_match = desc_re.search(text_lower)
+        if not desc_match:
+            continue
         desc_text = desc_match.group(1).strip()
-        circuit_data['description'] = desc_text.strip().upper()
-    else:
-        # Pattern 2: "feeds [a] <description> in <location>" or "feeds [a] <description> at <load>"
-        desc_match = re.search(r'feeds?\s+(?:and\s+)?(?:a|an|the)?\s*(.+?)\s+(?:and\s+the\s+)?(?:full\s+)?(?:load|at|with|\d+)', text_lower)
-        if desc_match:
-            desc_text = desc_match.group(1).strip()
-            circuit_data['description'] = desc_text.strip().upper()
+        if strip_ratings:
+            # Remove breaker/pole info from description
+            for strip_re in _DESC_STRIP_RES:
+                desc_text = strip_re.sub('', desc_text)
+            desc_text = desc_text.strip()
+            if desc_text:
+                circuit_data['description'] = desc_text.upper()
         else:
-            # Pattern 3: "is [a] <description> [and/with]"
-            desc_match = re.search(r'is\s+(?:a|an|for)?\s*([^,]+?)\s+(?:and|with|at|\d+\s*a)', text_lower)
-            if desc_match:
-                desc_text = desc_match.group(1).strip()
-                # Remove breaker/pole info from description
-                desc_text = re.sub(r'\d+\s*a[f]?/\d+\s*p\s+(?:breaker|circuit)', '', desc_text, flags=re.IGNORECASE)
-                desc_text = re.sub(r'\d+[\s-]*p(?:ole)?\s+(?:breaker|circuit)', '', desc_text, flags=re.IGNORECASE)
-                desc_text = re.sub(r'\d+\s*a(?:mp)?\s+(?:breaker|circuit)', '', desc_text, flags=re.IGNORECASE)
-                desc_text = desc_text.strip()
-                if desc_text:
-                    circuit_data['description'] = desc_text.upper()
+            circuit_data['description'] = desc_text.upper()
+        break
     
     logger.info(f"Extracted circuit data from regex: {circuit_data}")
     return circuit_data
 
 
+def _circuit_messages(user_text: str) -> List[Dict[str, str]]:
+    return [
+        {"role": "system", "content": _CIRCUIT_SYSTEM_PROMPT},
+        {"role": "user", "content": user_text},
+    ]
+
+def _circuit_from_response(resp) -> Optional[Dict[str, Any]]:
+    """Parsed circuit JSON, or None if the model returned nothing (not worth caching)."""
+    if not resp.choices:
+        logger.warning("LLM returned no choices for circuit extraction.")
+        return None
+    content = (resp.choices[0].message.content or "").strip()
+    if not content:
+        return None
+    data = fastjson.loads(content)
+    logger.info(f"Extracted circuit data from LLM: {data}")
+    return data
+
 def extract_circuit_from_text_llm(user_text: str) -> Dict[str, Any]:
     """
     Use OpenAI LLM to extract circuit information from natural language.
@@ -273,6 +655,7 @@ def extract_circuit_from_text_llm(user_text: str) -> Dict[str, Any]:
     
     Returns dict with keys: circuit_numbers, pole_spaces, description, poles, breaker_amps, load_amps
     Returns empty dict if no circuit data found or if API key is not configured.
+    Parsed replies are cached per user_text for an hour; callers get a copy.
     
     Example: "circuit 1 is a 20A/1P breaker and feeds and exhaust fan at 8A"
     Returns: {'circuit_numbers': '1', 'pole_spaces': [1], 'poles': 1, 'breaker_amps': 20, 'load_amps': 8, 'description': 'EXHAUST FAN'}
@@ -280,162 +663,114 @@ def extract_circuit_from_text_llm(user_text: str) -> Dict[str, Any]:
     Example: "circuit 3,5 is a 30A/2P circuit that feeds a cold water pump in the basement and the full load is 18A"
     Returns: {'circuit_numbers': '3,5', 'pole_spaces': [3, 5], 'poles': 2, 'breaker_amps': 30, 'load_amps': 18, 'description': 'BASEMENT COLD WATER PUMP'}
     """
-    if not settings.OPENAI_API_KEY:
+    if not _HAS_KEY:
         logger.info("OpenAI API key not configured. Skipping LLM circuit extraction.")
         return {}
     
+    cached = _CIRCUIT_CACHE.get(user_text)
+    if cached is not None:
+        return copy.deepcopy(cached)
+    
     try:
-        system_prompt = """You are a circuit data extraction assistant. Extract circuit information from user input and return STRICT JSON.
-
-Output format:
-{
-  "circuit_numbers": "circuit numbers as they appear in input (e.g., '1' or '3,5' or '2/4/6')",
-  "pole_spaces": [array of integers representing pole space numbers],
-  "poles": integer (1, 2, or 3),
-  "breaker_amps": float (breaker rating in amps),
-  "load_amps": float (actual load in amps),
-  "description": "brief uppercase description of load including location if mentioned"
-}
-
-Rules:
-- If no circuit mentioned, return {}
-- circuit_numbers preserves the original separator format from user input
-- pole_spaces is always an array of integers (e.g., [3, 5] or [2, 4, 6])
-- Pole spaces can be separated by commas, slashes, spaces, or hyphens in the input
-- For "circuit 2/4/6", circuit_numbers="2/4/6" AND pole_spaces=[2, 4, 6]
-- Extract all numeric values accurately
-- Description should include location if mentioned (e.g., 'ROOFTOP MAU UNIT')
-- Remove articles (a, an, the) and breaker/circuit keywords from description
-- load_amps should be the actual load, not breaker rating
-- Keep descriptions concise but meaningful (max 39 characters)
-"""
-        
         resp = _chat_with_retries(
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_text},
-            ],
+            messages=_circuit_messages(user_text),
             model=DEFAULT_MODEL,
             temperature=0.0,  # Deterministic for data extraction
-            max_tokens=150,
+            max_tokens=_CIRCUIT_MAX_TOKENS,
             response_format={"type": "json_object"},
         )
-        
-        if not resp.choices:
-            logger.warning("LLM returned no choices for circuit extraction.")
-            return {}
-        
-        content = (resp.choices[0].message.content or "").strip()
-        if not content:
-            return {}
-        
-        data = json.loads(content)
-        logger.info(f"Extracted circuit data from LLM: {data}")
-        return data
-        
+        data = _circuit_from_response(resp)
+    except Exception as e:
+        logger.warning(f"LLM circuit extraction failed: {e.__class__.__name__}: {e}")
+        return {}
+    if data is None:
+        return {}
+    _CIRCUIT_CACHE.put(user_text, data)
+    return copy.deepcopy(data)
+
+async def extract_circuit_from_text_llm_async(user_text: str) -> Dict[str, Any]:
+    """Async version of extract_circuit_from_text_llm (shares its cache)."""
+    if not _HAS_KEY:
+        logger.info("OpenAI API key not configured. Skipping LLM circuit extraction.")
+        return {}
+    
+    cached = _CIRCUIT_CACHE.get(user_text)
+    if cached is not None:
+        return copy.deepcopy(cached)
+    
+    try:
+        resp = await _achat_with_retries(
+            messages=_circuit_messages(user_text),
+            model=DEFAULT_MODEL,
+            temperature=0.0,
+            max_tokens=_CIRCUIT_MAX_TOKENS,
+            response_format={"type": "json_object"},
+        )
+        data = _circuit_from_response(resp)
     except Exception as e:
         logger.warning(f"LLM circuit extraction failed: {e.__class__.__name__}: {e}")
         return {}
+    if data is None:
+        return {}
+    _CIRCUIT_CACHE.put(user_text, data)
+    return copy.deepcopy(data)
 
 
-def extract_panel_specs_from_text(user_text: str) -> Dict[str, str]:
+def extract_panel_specs_from_text(user_text: str, text_lower: Optional[str] = None) -> Dict[str, str]:
     """
     Extract panel specifications from voice/text input.
     Similar to OCR extraction but for conversational input.
     Returns dict with keys: voltage, phase, wire, main_bus_amps, main_breaker, mounting, feed, location
+    Pass `text_lower` (user_text.lower()) when the caller already has it.
     """
-    import re
-    
-    specs = {}
-    text_lower = user_text.lower()
-    
-    # Voltage patterns: "480/277V", "480 volt", "208V"
-    voltage_match = re.search(r'(\d+(?:/\d+)?)\s*v(?:olt(?:s|age)?)?', text_lower)
-    if voltage_match:
-        specs['voltage'] = voltage_match.group(1).upper() + 'V'
-        logger.info(f"Extracted voltage: {specs['voltage']}")
-    
-    # Phase patterns: "3 phase", "3ph", "3-ph", "single phase", "1-phase", "phase is 3", "phase: 3"
-    phase_match = re.search(r'(?:phase\s*(?:is|:)?\s*(\d+|single|three|one)|(\d+|single|three|one)[\s-]*(?:phase|ph)\b)', text_lower)
-    if phase_match:
-        phase_val = phase_match.group(1) or phase_match.group(2)
-        if phase_val in ['three', '3']:
-            specs['phase'] = '3'
-        elif phase_val in ['single', 'one', '1']:
-            specs['phase'] = '1'
-        else:
-            specs['phase'] = phase_val
-        logger.info(f"Extracted phase: {specs['phase']}")
-    
-    # Wire patterns: "4 wire", "3W", "wire is 4", "wire: 4"
-    wire_match = re.search(r'(?:wire\s*(?:is|:)?\s*(\d+)|(\d+)\s*w(?:ire)?)', text_lower)
-    if wire_match:
-        specs['wire'] = wire_match.group(1) or wire_match.group(2)
-        logger.info(f"Extracted wire: {specs['wire']}")
-    
-    # Main bus amps patterns: "400A", "400 amps", "main bus amps 400", "bus amps 400"
-    # MUST have "bus" or "main" keyword to avoid matching circuit breaker amps
-    bus_amps_match = re.search(r'(?:main\s+bus(?:\s+amp(?:s|ere)?)?|bus\s+amp(?:s|ere)?)[\s:]+(\d+)\s*a?(?:mp(?:s|ere)?)?', text_lower)
-    if bus_amps_match:
-        specs['main_bus_amps'] = bus_amps_match.group(1)
-        logger.info(f"Extracted main_bus_amps: {specs['main_bus_amps']}")
-    
-    # Main breaker: "100AF/70AT" or "MLO" (Main Lug Only)
-    # Check for MLO first (specific pattern)
-    if re.search(r'\bMLO\b|main\s+lug\s+only', user_text, re.IGNORECASE):
-        specs['main_breaker'] = 'MLO'
-        logger.info(f"Extracted main_breaker: MLO (Main Lug Only)")
-    else:
-        # Then check for standard breaker ratings
-        breaker_match = re.search(r'(?:main\s+breaker|breaker|mcb)[\s:]*([A-Z0-9/]+)', user_text, re.IGNORECASE)
-        if breaker_match:
-            specs['main_breaker'] = breaker_match.group(1).upper()
-            logger.info(f"Extracted main_breaker: {specs['main_breaker']}")
+    # Cheap pre-check: most chat turns carry no panel specs at all
+    if not _DIGIT_RE.search(user_text):
+        if text_lower is None:
+            text_lower = user_text.lower()
+        if not any(hint in text_lower for hint in _PANEL_SPEC_HINTS):
+            return {}
     
-    # Mounting: "flush", "surface", "recess"
-    mounting_match = re.search(r'(flush|surface|recess(?:ed)?)\s*mount', text_lower)
-    if mounting_match:
-        specs['mounting'] = mounting_match.group(1).upper()
-        logger.info(f"Extracted mounting: {specs['mounting']}")
+    # First match position per field, from a single pass over the text
+    positions: Dict[str, int] = {}
+    for m in _PANEL_SPEC_SCAN_RE.finditer(user_text):
+        positions.setdefault(m.lastgroup, m.start())
+        if len(positions) == len(_PANEL_SPEC_FIELDS):
+            break
     
-    # Feed from: "MDP", "panel A"
-    feed_match = re.search(r'(?:feed\s+from|fed\s+from)[\s:]*([A-Z0-9\s\-]+)', user_text, re.IGNORECASE)
-    if feed_match:
-        specs['feed'] = feed_match.group(1).strip()
-        logger.info(f"Extracted feed: {specs['feed']}")
+    found: Dict[str, str] = {}
+    for key, rx, normalize in _PANEL_SPEC_FIELDS:
+        if key in positions:
+            found[key] = normalize(rx.match(user_text, positions[key]))
     
-    # Location: "room 101", "first floor"
-    location_match = re.search(r'(?:location|located\s+(?:in|at))[\s:]*([^,.]+)', text_lower)
-    if location_match:
-        specs['location'] = location_match.group(1).strip().title()
-        logger.info(f"Extracted location: {specs['location']}")
+    # Main breaker: "MLO" (Main Lug Only) takes priority over any breaker rating
+    specs = {}
+    for key, value in found.items():
+        if key == 'mlo':
+            key = 'main_breaker'
+        elif key == 'breaker':
+            if 'mlo' in found:
+                continue
+            key = 'main_breaker'
+        specs[key] = value
+        logger.info(f"Extracted {key}: {value}")
     
     return specs
 
 
 def _keyword_based_fallback(user_text: str, files: List[str], reason: str = "") -> Dict[str, Any]:
     """Keyword-based fallback plan when LLM is not available or fails."""
-    import re
     text_lower = user_text.lower().strip()
-    task = None
-    
-    if any(kw in text_lower for kw in ["panel schedule", "panelboard schedule", "panel board schedule", "panelboard", "panel board", "circuit schedule"]):
-        task = "panel_schedule"
-    elif any(kw in text_lower for kw in ["power plan", "receptacle plan", "outlet plan", "power layout"]):
-        task = "power_plan"
-    elif any(kw in text_lower for kw in ["lighting plan", "light plan", "fixture plan", "illumination plan"]):
-        task = "lighting_plan"
-    elif any(kw in text_lower for kw in ["revit", "dynamo", "bim"]):
-        task = "revit_package"
-    elif any(kw in text_lower for kw in ["one line", "oneline", "one-line", "single line"]):
-        task = "one_line"
-    else:
-        task = "panel_schedule"
+    found = set()
+    for m in _TASK_SCAN_RE.finditer(text_lower):
+        found.add(m.lastgroup)
+        if m.lastgroup == "panel_schedule":  # top priority; nothing can outrank it
+            break
+    task = next((t for t, _ in _TASK_KEYWORDS if t in found), "panel_schedule")
     
     number_of_ckts = None
     panel_name = None
     
-    num_match = re.search(r'\b(\d+)\s*(?:circuits?|ckts?|spaces?)?\b', text_lower)
+    num_match = _CKTS_COUNT_RE.search(text_lower)
     if num_match:
         try:
             num = int(num_match.group(1))
@@ -445,14 +780,8 @@ def _keyword_based_fallback(user_text: str, files: List[str], reason: str = "")
         except ValueError:
             pass
     
-    panel_patterns = [
-        r'panel\s+name\s+(?:is\s+)?([A-Z0-9][A-Z0-9\-\s]*[A-Z0-9]|[A-Z0-9])',
-        r'panel\s+(?:is\s+)?called\s+([A-Z0-9][A-Z0-9\-\s]*[A-Z0-9]|[A-Z0-9])',
-        r'panel\s+(?:is\s+)?named\s+([A-Z0-9][A-Z0-9\-\s]*[A-Z0-9]|[A-Z0-9])',
-        r'panel\s+identifier\s+(?:is\s+)?([A-Z0-9][A-Z0-9\-\s]*[A-Z0-9]|[A-Z0-9])'
-    ]
-    for pattern in panel_patterns:
-        match = re.search(pattern, user_text, re.IGNORECASE)
+    for pattern in _PANEL_NAME_RES:
+        match = pattern.search(user_text)
         if match:
             panel_name = match.group(1).strip().upper()
             logger.info(f"Extracted panel_name={panel_name} from text")
@@ -474,32 +803,120 @@ def _keyword_based_fallback(user_text: str, files: List[str], reason: str = "")
     return plan
 
 
-def plan_from_prompt(user_text: str, bucket_dir: str) -> Dict[str, Any]:
+def _plan_messages(user_text: str, files: List[str]) -> List[Dict[str, str]]:
+    # Sorted so the same bucket always renders the same message (scandir order is arbitrary)
+    user = f"Command: {user_text}\nAvailable files: {sorted(files)}"
+    return [{"role":"system","content":_PLAN_SYSTEM_PROMPT},{"role":"user","content":user}]
+
+def _plan_from_content(content: str) -> Dict[str, Any]:
+    data = fastjson.loads(content)
+    data["project"] = data.get("project") or "Untitled Project"
+    data["task"] = data.get("task") or "one_line"
+    return data
+
+class _PlanTruncatedError(ValueError):
+    """The model hit the output token limit before finishing the plan JSON."""
+
+def _plan_from_choice(choice: Any) -> Dict[str, Any]:
+    if getattr(choice, "finish_reason", None) == "length":
+        raise _PlanTruncatedError("plan reply was cut off at the output token limit")
+    return _plan_from_content(choice.message.content)
+
+def _plan_error_fallback(e: Exception, user_text: str, files: List[str]) -> Dict[str, Any]:
+    if isinstance(e, _PlanTruncatedError):
+        logger.error(f"OpenAI plan reply was truncated: {e}. Using fallback plan.")
+        return _keyword_based_fallback(user_text, files, "AI reply was cut off at the output token limit.")
+    if isinstance(e, fastjson.JSONDecodeError):
+        logger.error(f"OpenAI returned invalid JSON: {e}. Using fallback plan.")
+        return _keyword_based_fallback(user_text, files, "AI returned invalid JSON format.")
+    logger.error(f"OpenAI API error during plan generation: {e.__class__.__name__}: {e}. Using keyword-based fallback.")
+    return _keyword_based_fallback(user_text, files, f"LLM error: {e.__class__.__name__}")
+
+def _plan_from_prompt_llm(user_text: str, bucket_dir: str) -> Dict[str, Any]:
     """
     Main planner: sends the schema + files to the LLM and expects JSON back.
     Falls back to a keyword-based plan if the LLM call fails.
+    Successful plans are cached for an hour per (user_text, bucket files); callers get a copy.
     """
     files = _list_bucket(bucket_dir)
+    key = _plan_cache_key(user_text, files)
+    cached = _PLAN_CACHE.get(key)
+    if cached is not None:
+        return copy.deepcopy(cached)
     
     try:
-        user = (
-          f"Command: {user_text}\n"
-          f"Available files: {files}\n"
-          f"Return ONLY JSON conforming to this schema: {json.dumps(SCHEMA)}"
+        # Transient rate-limit/connection errors are retried before falling back to keywords
+        resp = _chat_with_retries(
+            messages=_plan_messages(user_text, files),
+            response_format={"type": "json_object"},
+            max_tokens=None,  # plans grow with rooms/devices; a cap would cut the JSON short
+            temperature=0,  # structured output: same request, same plan (and cacheable)
         )
-        resp = client.chat.completions.create(
-            model=DEFAULT_MODEL,
-            messages=[{"role":"system","content":SYSTEM_PROMPT},{"role":"user","content":user}],
+        data = _plan_from_choice(resp.choices[0])
+    except Exception as e:
+        return _plan_error_fallback(e, user_text, files)
+    _PLAN_CACHE.put(key, data)
+    return copy.deepcopy(data)
+
+
+async def _plan_from_prompt_llm_async(user_text: str, bucket_dir: str) -> Dict[str, Any]:
+    """Async version of _plan_from_prompt_llm."""
+    files = _list_bucket(bucket_dir)
+    key = _plan_cache_key(user_text, files)
+    cached = _PLAN_CACHE.get(key)
+    if cached is not None:
+        return copy.deepcopy(cached)
+    
+    try:
+        resp = await _achat_with_retries(
+            messages=_plan_messages(user_text, files),
             response_format={"type": "json_object"},
-            temperature=0.2
+            max_tokens=None,  # plans grow with rooms/devices; a cap would cut the JSON short
+            temperature=0,  # structured output: same request, same plan (and cacheable)
         )
-        data = json.loads(resp.choices[0].message.content)
-        data["project"] = data.get("project") or "Untitled Project"
-        data["task"] = data.get("task") or "one_line"
-        return data
-    except json.JSONDecodeError as e:
-        logger.error(f"OpenAI returned invalid JSON: {e}. Using fallback plan.")
-        return _keyword_based_fallback(user_text, files, "AI returned invalid JSON format.")
+        data = _plan_from_choice(resp.choices[0])
     except Exception as e:
-        logger.error(f"OpenAI API error during plan generation: {e.__class__.__name__}: {e}. Using keyword-based fallback.")
-        return _keyword_based_fallback(user_text, files, f"LLM error: {e.__class__.__name__}")
+        return _plan_error_fallback(e, user_text, files)
+    _PLAN_CACHE.put(key, data)
+    return copy.deepcopy(data)
+
+
+def _plan_from_prompt_fallback(user_text: str, bucket_dir: str) -> Dict[str, Any]:
+    """No API key configured: go straight to the keyword-based plan."""
+    return _keyword_based_fallback(user_text, _list_bucket(bucket_dir), "OpenAI API key not configured.")
+
+async def _plan_from_prompt_fallback_async(user_text: str, bucket_dir: str) -> Dict[str, Any]:
+    return _plan_from_prompt_fallback(user_text, bucket_dir)
+
+plan_from_prompt = _plan_from_prompt_llm if _HAS_KEY else _plan_from_prompt_fallback
+plan_from_prompt_async = _plan_from_prompt_llm_async if _HAS_KEY else _plan_from_prompt_fallback_async
+
+
+async def summarize_and_plan(user_text: str, bucket_dir: str) -> Tuple[str, Dict[str, Any]]:
+    """
+    Run summarize_intent and plan_from_prompt concurrently for a new command.
+    Total latency is the slower of the two calls instead of their sum.
+    """
+    summary, plan = await asyncio.gather(
+        summarize_intent_async(user_text),
+        plan_from_prompt_async(user_text, bucket_dir),
+    )
+    return summary, plan
+
+
+async def plan_and_extract_circuit(
+    user_text: str, bucket_dir: str, text_lower: Optional[str] = None
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Plan a follow-up message and pull any circuit data out of it.
+    The regex extractor runs first; only when it finds nothing does the LLM
+    extraction run, concurrently with the plan call rather than after it.
+    """
+    circuit_data = extract_circuit_from_text(user_text, text_lower)
+    if circuit_data:
+        return await plan_from_prompt_async(user_text, bucket_dir), circuit_data
+    plan, circuit_data = await asyncio.gather(
+        plan_from_prompt_async(user_text, bucket_dir),
+        extract_circuit_from_text_llm_async(user_text),
+    )
+    return plan, circuit_data
@@ -0,0 +1,173 @@
+# app/ai/llm_batch.py
+# Offline bulk planning through the OpenAI Batch API (about half the per-token price of
+# interactive calls, results within the completion window). Meant for import scripts,
+# not for request handlers.
+
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.ai import llm
+from app.utils import fastjson
+
+logger = logging.getLogger(__name__)
+
+_ENDPOINT = "/v1/chat/completions"
+_TERMINAL_STATES = {"completed", "failed", "expired", "cancelled"}
+
+
+def submit_batch(
+    items: List[Tuple[str, List[Dict[str, str]]]],
+    *,
+    model: Optional[str] = None,
+    temperature: float = 0.2,
+    max_tokens: Optional[int] = 512,
+    response_format: Optional[Dict[str, str]] = None,
+) -> str:
+    """
+    Upload one chat completion request per (custom_id, messages) item and start a batch.
+    Returns the batch id; poll it with batch_status() and read it with batch_results().
+    """
+    lines = []
+    for custom_id, messages in items:
+        body: Dict[str, Any] = {
+            "model": model or llm.DEFAULT_MODEL,
+            "messages": messages,
+            "temperature": temperature,
+        }
+        if max_tokens is not None:
+            body["max_tokens"] = max_tokens
+        if response_format:
+            body["response_format"] = response_format
+        lines.append(json.dumps({"custom_id": custom_id, "method": "POST", "url": _ENDPOINT, "body": body}))
+
+    client = llm._get_client()
+    upload = client.files.create(file=("batch.jsonl", "\n".join(lines).encode("utf-8")), purpose="batch")
+    batch = client.batches.create(input_file_id=upload.id, endpoint=_ENDPOINT, completion_window="24h")
+    logger.info(f"Submitted batch {batch.id} with {len(items)} requests")
+    return batch.id
+
+
+def batch_status(batch_id: str) -> str:
+    return llm._get_client().batches.retrieve(batch_id).status
+
+
+def batch_results(batch_id: str) -> Dict[str, Optional[str]]:
+    """
+    Message content per custom_id for a completed batch.
+    Requests that errored, or whose reply was cut off at the token limit, map to None.
+    """
+    client = llm._get_client()
+    batch = client.batches.retrieve(batch_id)
+    results: Dict[str, Optional[str]] = {}
+    for file_id in (batch.output_file_id, batch.error_file_id):
+        if not file_id:
+            continue
+        # Raw bytes straight into the decoder: no text decode pass over large result files
+        for line in client.files.content(file_id).content.splitlines():
+            if not line.strip():
+                continue
+            row = fastjson.loads(line)
+            content = None
+            response = row.get("response") or {}
+            if response.get("status_code") == 200:
+                choices = response.get("body", {}).get("choices") or []
+                if choices and choices[0].get("finish_reason") == "length":
+                    logger.warning(f"Batch {batch_id}: reply for {row['custom_id']} was truncated")
+                elif choices:
+                    content = choices[0].get("message", {}).get("content")
+            results[row["custom_id"]] = content
+    return results
+
+
+def _read_checkpoint(path: Path) -> Tuple[Optional[str], Dict[str, Dict[str, Any]]]:
+    batch_id, plans = None, {}
+    if path.exists():
+        for line in path.read_bytes().splitlines():
+            if not line.strip():
+                continue
+            row = fastjson.loads(line)
+            if "batch_id" in row:
+                batch_id = row["batch_id"]
+            else:
+                plans[row["custom_id"]] = row["plan"]
+    return batch_id, plans
+
+
+def _append_checkpoint(path: Path, row: Dict[str, Any]) -> None:
+    with path.open("a", encoding="utf-8") as f:
+        f.write(json.dumps(row) + "\n")
+
+
+def plan_from_prompt_batch(
+    texts: List[str],
+    bucket_dir: str,
+    checkpoint: Path,
+    poll_s: float = 30.0,
+) -> List[Dict[str, Any]]:
+    """
+    Plan many commands with one batch job instead of one interactive call each.
+    Progress is appended to the `checkpoint` JSONL file (the batch id, then each finished
+    plan), so re-running after an interruption polls the same batch instead of
+    resubmitting, and skips plans that are already done. Commands the checkpointed batch
+    doesn't cover (the inputs changed since it was submitted) go into a new batch.
+    Returns one plan per text, in input order; failed requests get the keyword-based plan,
+    which is not checkpointed, so the next run retries them.
+    """
+    checkpoint = Path(checkpoint)
+    files = llm._list_bucket(bucket_dir)
+    ids = [llm._plan_cache_key(text, files) for text in texts]
+    batch_id, done = _read_checkpoint(checkpoint)
+
+    pending = {cid: text for cid, text in zip(ids, texts) if cid not in done}
+    fallbacks: Dict[str, Dict[str, Any]] = {}
+    while pending:
+        resumed = batch_id is not None
+        if not resumed:
+            batch_id = submit_batch(
+                [(cid, llm._plan_messages(text, files)) for cid, text in pending.items()],
+                temperature=0,
+                max_tokens=None,
+                response_format={"type": "json_object"},
+            )
+            _append_checkpoint(checkpoint, {"batch_id": batch_id})
+
+        status = batch_status(batch_id)
+        while status not in _TERMINAL_STATES:
+            time.sleep(poll_s)
+            status = batch_status(batch_id)
+        if status != "completed":
+            # Forget the dead batch so the next run resubmits; don't checkpoint the fallbacks
+            logger.error(f"Batch {batch_id} ended as {status}; using keyword-based plans")
+            _append_checkpoint(checkpoint, {"batch_id": None})
+            error = RuntimeError(f"batch {status}")
+            fallbacks.update({cid: llm._plan_error_fallback(error, text, files) for cid, text in pending.items()})
+            break
+
+        contents = batch_results(batch_id)
+        missing = {}
+        for cid, text in pending.items():
+            if cid not in contents:
+                missing[cid] = text
+                continue
+            try:
+                plan = llm._plan_from_content(contents[cid])
+            except Exception as e:
+                fallbacks[cid] = llm._plan_error_fallback(e, text, files)
+                continue
+            done[cid] = plan
+            _append_checkpoint(checkpoint, {"custom_id": cid, "plan": plan})
+        # The batch is consumed: a later run must not poll it again
+        _append_checkpoint(checkpoint, {"batch_id": None})
+        batch_id = None
+
+        if not resumed:
+            # Our own batch left these out; don't resubmit in a loop
+            error = KeyError("no result in batch output")
+            fallbacks.update({cid: llm._plan_error_fallback(error, text, files) for cid, text in missing.items()})
+            break
+        pending = missing
+
+    return [done.get(cid) or fallbacks[cid] for cid in ids]
@@ -3,35 +3,25 @@
 from __future__ import annotations
 
 from pathlib import Path
-import json as _json
 import logging
+import re
 from typing import Optional
 
 import ezdxf
-from ezdxf.enums import TextEntityAlignment
-from pydantic import ValidationError
 
 from app.schemas.models import PlanRequest
-from app.schemas.standards import StandardsConfig
+from app.schemas.standards import StandardsConfig, load_standards_file
 from app.utils.dxf_blocks import import_dxf_as_block, insert_block
 
 logger = logging.getLogger(__name__)
 
 
 # -- standards loader ---------------------------------------------------------
+_STANDARDS_PATH = Path(__file__).resolve().parents[1] / "standards" / "active.json"
+
 def _load_standards() -> StandardsConfig:
-    here = Path(__file__).resolve().parents[1]
-    cfg_path = here / "standards" / "active.json"
-    if cfg_path.exists():
-        try:
-            return StandardsConfig(**_json.loads(cfg_path.read_text(encoding="utf-8")))
-        except _json.JSONDecodeError as e:
-            logger.warning(f"Standards file is not valid JSON: {cfg_path}. Error: {e}. Using defaults.")
-        except ValidationError as e:
-            logger.warning(f"Standards file does not match expected schema: {cfg_path}. Error: {e}. Using defaults.")
-        except Exception as e:
-            logger.error(f"Unexpected error loading standards from {cfg_path}: {e}. Using defaults.")
-    return StandardsConfig()
+    # Cached by file mtime: repeated generations cost one stat() and skip the re-read and re-validation
+    return load_standards_file(_STANDARDS_PATH)
 
 
 # -- layer helper -------------------------------------------------------------
@@ -44,27 +34,18 @@ def _ensure_layer(doc: ezdxf.EzDxf, name: str, color: int = 7):
             pass
 
 
-# -- text placement (ezdxf version-safe) -------------------------------------
-def _place_text(ent, pos, align=TextEntityAlignment.LEFT):
-    if hasattr(ent, "set_pos"):
-        ent.set_pos(pos, align=align)
-    else:
-        ent.dxf.insert = pos
-
-
 # -- optional symbol resolver -------------------------------------------------
+# All alternatives are anchored at the start and tried in priority order:
+#   rec*/r-* -> receptacle, l* or *lum* -> luminaire, pnl* or *panel* -> panel,
+#   s* containing "switch" or at most 3 chars -> switch
+_SYMBOL_RE = re.compile(
+    r"(?P<receptacle>rec|r-)|(?P<luminaire>l|.*lum)|(?P<panel>pnl|.*panel)|(?=.*switch|.{1,3}\Z)(?P<switch>s)",
+    re.DOTALL,
+)
+
 def _symbol_for(tag: Optional[str], cfg: StandardsConfig) -> Optional[str]:
-    mapping = (cfg.symbols or {})
-    t = (tag or "").lower()
-    if t.startswith("rec") or t.startswith("r-"):
-        return mapping.get("receptacle")
-    if t.startswith("l") or "lum" in t:
-        return mapping.get("luminaire")
-    if "panel" in t or t.startswith("pnl"):
-        return mapping.get("panel")
-    if t.startswith("s") and ("switch" in t or len(t) <= 3):
-        return mapping.get("switch")
-    return None
+    m = _SYMBOL_RE.match((tag or "").lower())
+    return (cfg.symbols or {}).get(m.lastgroup) if m else None
 
 
 # -- main generator -----------------------------------------------------------
@@ -92,7 +73,7 @@ def generate_lighting_plan_dxf(req: PlanRequest, out_path: Path) -> Path:
     ## v5 titleblock+symbols --------------------------------------------------
     if cfg.titleblock:
         tb_path = (
-            Path(__file__).resolve().parents[1] / "standards" / cfg.titleblock
+            _STANDARDS_PATH.parent / cfg.titleblock
             if not Path(cfg.titleblock).is_absolute()
             else Path(cfg.titleblock)
         )
@@ -104,13 +85,18 @@ def generate_lighting_plan_dxf(req: PlanRequest, out_path: Path) -> Path:
             except Exception:
                 pass
 
+    # One attribute dict per entity kind, shared across the loops below (ezdxf copies
+    # dxfattribs, so sharing is safe). Text is created with its insert point (LEFT
+    # alignment) instead of being placed after creation.
+    room_attribs = {"closed": True, "layer": lyr_rooms}
+    room_text_attribs = {"height": 0.15, "layer": lyr_ann}
+    fixture_attribs = {"closed": True, "layer": lyr_lighting}
+    marker_attribs = {"layer": lyr_lighting}
+    tag_attribs = {"height": 0.12, "layer": lyr_ann}
+
     # -- title / sheet note ---------------------------------------------------
     project_title = getattr(req, "project", "Project")
-    _place_text(
-        msp.add_text(f"{project_title} - Lighting Plan", dxfattribs={"height": 0.3, "layer": lyr_ann}),
-        (0, 7),
-        align=TextEntityAlignment.LEFT,
-    )
+    msp.add_text(f"{project_title} - Lighting Plan", dxfattribs={"height": 0.3, "layer": lyr_ann, "insert": (0, 7)})
 
     # -- rooms ----------------------------------------------------------------
     for r in (getattr(req, "rooms", []) or []):
@@ -122,43 +108,29 @@ def generate_lighting_plan_dxf(req: PlanRequest, out_path: Path) -> Path:
                 (r.x, r.y + r.h),
                 (r.x, r.y),
             ],
-            dxfattribs={"closed": True, "layer": lyr_rooms},
-        )
-        _place_text(
-            msp.add_text(r.name, dxfattribs={"height": 0.15, "layer": lyr_ann}),
-            (r.x + 0.1, r.y + r.h - 0.2),
-            align=TextEntityAlignment.LEFT,
+            dxfattribs=room_attribs,
         )
+        room_text_attribs["insert"] = (r.x + 0.1, r.y + r.h - 0.2)
+        msp.add_text(r.name, dxfattribs=room_text_attribs)
 
     # -- devices --------------------------------------------------------------
     for d in (getattr(req, "devices", []) or []):
         tag = (getattr(d, "tag", "") or "").upper()
         x, y = d.x, d.y
+        tag_attribs["insert"] = (x + 0.1, y - 0.05)
         if tag.startswith("L"):
             # luminaire marker (triangle)
             msp.add_lwpolyline(
                 [(x - 0.08, y - 0.08), (x + 0.08, y - 0.08), (x, y + 0.08), (x - 0.08, y - 0.08)],
-                dxfattribs={"closed": True, "layer": lyr_lighting},
-            )
-            _place_text(
-                msp.add_text(tag, dxfattribs={"height": 0.12, "layer": lyr_ann}),
-                (x + 0.1, y - 0.05),
-                align=TextEntityAlignment.LEFT,
+                dxfattribs=fixture_attribs,
             )
+            msp.add_text(tag, dxfattribs=tag_attribs)
         elif tag.startswith("S"):
-            msp.add_circle((x, y), radius=0.05, dxfattribs={"layer": lyr_lighting})
-            _place_text(
-                msp.add_text("S", dxfattribs={"height": 0.12, "layer": lyr_ann}),
-                (x + 0.1, y - 0.05),
-                align=TextEntityAlignment.LEFT,
-            )
+            msp.add_circle((x, y), radius=0.05, dxfattribs=marker_attribs)
+            msp.add_text("S", dxfattribs=tag_attribs)
         else:
-            msp.add_circle((x, y), radius=0.05, dxfattribs={"layer": lyr_lighting})
-            _place_text(
-                msp.add_text(tag or "?", dxfattribs={"height": 0.12, "layer": lyr_ann}),
-                (x + 0.1, y - 0.05),
-                align=TextEntityAlignment.LEFT,
-            )
+            msp.add_circle((x, y), radius=0.05, dxfattribs=marker_attribs)
+            msp.add_text(tag or "?", dxfattribs=tag_attribs)
 
     # -- save -----------------------------------------------------------------
     out_path.parent.mkdir(parents=True, exist_ok=True)
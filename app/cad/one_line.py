@@ -3,34 +3,23 @@
 from __future__ import annotations
 
 from pathlib import Path
-import json as _json
 import logging
 from typing import Optional
 
 import ezdxf
-from ezdxf.enums import TextEntityAlignment
-from pydantic import ValidationError
 
 from app.schemas.models import PlanRequest
-from app.schemas.standards import StandardsConfig
+from app.schemas.standards import StandardsConfig, load_standards_file
 
 logger = logging.getLogger(__name__)
 
 
 # -- standards loader ---------------------------------------------------------
+_STANDARDS_PATH = Path(__file__).resolve().parents[1] / "standards" / "active.json"
+
 def _load_standards() -> StandardsConfig:
-    here = Path(__file__).resolve().parents[1]
-    cfg_path = here / "standards" / "active.json"
-    if cfg_path.exists():
-        try:
-            return StandardsConfig(**_json.loads(cfg_path.read_text(encoding="utf-8")))
-        except _json.JSONDecodeError as e:
-            logger.warning(f"Standards file is not valid JSON: {cfg_path}. Error: {e}. Using defaults.")
-        except ValidationError as e:
-            logger.warning(f"Standards file does not match expected schema: {cfg_path}. Error: {e}. Using defaults.")
-        except Exception as e:
-            logger.error(f"Unexpected error loading standards from {cfg_path}: {e}. Using defaults.")
-    return StandardsConfig()
+    # Cached by file mtime: repeated generations cost one stat() and skip the re-read and re-validation
+    return load_standards_file(_STANDARDS_PATH)
 
 
 # -- layer helper -------------------------------------------------------------
@@ -43,14 +32,6 @@ def _ensure_layer(doc: ezdxf.EzDxf, name: str, color: int = 7):
             pass
 
 
-# -- text placement (ezdxf version-safe) -------------------------------------
-def _place_text(ent, pos, align=TextEntityAlignment.LEFT):
-    if hasattr(ent, "set_pos"):
-        ent.set_pos(pos, align=align)
-    else:
-        ent.dxf.insert = pos
-
-
 # -- utilities ----------------------------------------------------------------
 def _is_panelish(tag: str) -> bool:
     t = (tag or "").upper()
@@ -64,13 +45,29 @@ def _is_panelish(tag: str) -> bool:
     )
 
 
-def _draw_box(msp, x: float, y: float, w: float, h: float, layer: str):
-    msp.add_lwpolyline([(x, y), (x + w, y), (x + w, y + h), (x, y + h), (x, y)], dxfattribs={"closed": True, "layer": layer})
-
-
-def _label(msp, text: str, pos: tuple[float, float], layer: str, height: float = 0.12):
-    ent = msp.add_text(text, dxfattribs={"height": height, "layer": layer})
-    _place_text(ent, pos, align=TextEntityAlignment.LEFT)
+def _chain_segments(lines):
+    """
+    Join two-point segments that share an endpoint into vertex chains, so connected
+    runs become one polyline instead of one LINE per segment. A segment only extends
+    a chain at its free ends; segments meeting at an interior vertex start a new chain.
+    """
+    chains: list[list[tuple[float, float]]] = []
+    for a, b in lines:
+        for chain in chains:
+            if chain[-1] == a:
+                chain.append(b)
+            elif chain[-1] == b:
+                chain.append(a)
+            elif chain[0] == b:
+                chain.insert(0, a)
+            elif chain[0] == a:
+                chain.insert(0, b)
+            else:
+                continue
+            break
+        else:
+            chains.append([a, b])
+    return chains
 
 
 # -- main generator -----------------------------------------------------------
@@ -94,19 +91,26 @@ def generate_one_line_dxf(req: PlanRequest, out_path: Path) -> Path:
     lyr_equip = cfg.layers.get("one_line_equip", "E-POWR-1L-EQ"); _ensure_layer(doc, lyr_equip)
     lyr_feeder = cfg.layers.get("one_line_feeder", "E-POWR-1L-FDR"); _ensure_layer(doc, lyr_feeder)
 
+    # Geometry is collected first, then emitted per entity type with one shared
+    # attribute dict each (ezdxf copies dxfattribs, so sharing is safe). Text is
+    # created with its insert point instead of being placed after creation.
+    texts: list[tuple[str, tuple[float, float], float]] = []
+    lines: list[tuple[tuple[float, float], tuple[float, float]]] = []
+    boxes: list[tuple[float, float, float, float]] = []
+
     # -- title ----------------------------------------------------------------
     project_title = getattr(req, "project", "Project")
-    _label(msp, f"{project_title} - One-Line Diagram", (0, 7), lyr_ann, height=0.30)
+    texts.append((f"{project_title} - One-Line Diagram", (0, 7), 0.30))
 
     # -- service + main -------------------------------------------------------
     # Utility/Service
-    _draw_box(msp, -2.0, 5.0, 1.8, 0.8, lyr_equip)
-    _label(msp, "UTILITY", (-1.9, 5.1), lyr_ann)
+    boxes.append((-2.0, 5.0, 1.8, 0.8))
+    texts.append(("UTILITY", (-1.9, 5.1), 0.12))
     # Riser to MSB
-    msp.add_line((-1.1, 5.0), (0.0, 4.2), dxfattribs={"layer": lyr_feeder})
+    lines.append(((-1.1, 5.0), (0.0, 4.2)))
     # Main Switchboard (MSB/SWGR)
-    _draw_box(msp, 0.0, 3.7, 2.6, 1.4, lyr_equip)
-    _label(msp, "MSB", (0.2, 4.6), lyr_ann)
+    boxes.append((0.0, 3.7, 2.6, 1.4))
+    texts.append(("MSB", (0.2, 4.6), 0.12))
 
     # -- panels from devices --------------------------------------------------
     panels: list[str] = []
@@ -125,10 +129,28 @@ def generate_one_line_dxf(req: PlanRequest, out_path: Path) -> Path:
     for i, p in enumerate(panels):
         y = y_start - i * spacing
         # Feeder line
-        msp.add_line((x0 + 1.3, 4.0), (x0 + 3.3, y + 0.25), dxfattribs={"layer": lyr_feeder})
+        lines.append(((x0 + 1.3, 4.0), (x0 + 3.3, y + 0.25)))
         # Panel box
-        _draw_box(msp, x0 + 3.3, y, 2.2, 0.5, lyr_equip)
-        _label(msp, p, (x0 + 3.45, y + 0.1), lyr_ann)
+        boxes.append((x0 + 3.3, y, 2.2, 0.5))
+        texts.append((p, (x0 + 3.45, y + 0.1), 0.12))
+
+    # -- emit -----------------------------------------------------------------
+    box_attribs = {"closed": True, "layer": lyr_equip}
+    for x, y, w, h in boxes:
+        msp.add_lwpolyline([(x, y), (x + w, y), (x + w, y + h), (x, y + h), (x, y)], dxfattribs=box_attribs)
+
+    # Feeders fan out from one MSB tap point, so pairs of them share a vertex
+    feeder_attribs = {"layer": lyr_feeder}
+    for chain in _chain_segments(lines):
+        if len(chain) == 2:
+            msp.add_line(chain[0], chain[1], dxfattribs=feeder_attribs)
+        else:
+            msp.add_lwpolyline(chain, dxfattribs=feeder_attribs)
+
+    text_attribs = {"layer": lyr_ann}
+    for text, pos, height in texts:
+        text_attribs["insert"] = pos
+        msp.add_text(text, height=height, dxfattribs=text_attribs)
 
     # -- save -----------------------------------------------------------------
     out_path.parent.mkdir(parents=True, exist_ok=True)
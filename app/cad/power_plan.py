@@ -2,35 +2,25 @@
 from __future__ import annotations
 
 from pathlib import Path
-import json as _json
 import logging
+import re
 from typing import Optional
 
 import ezdxf
-from ezdxf.enums import TextEntityAlignment
-from pydantic import ValidationError
 
 from app.schemas.models import PlanRequest
-from app.schemas.standards import StandardsConfig
+from app.schemas.standards import StandardsConfig, load_standards_file
 from app.utils.dxf_blocks import import_dxf_as_block, insert_block
 
 logger = logging.getLogger(__name__)
 
 
 # -- standards loader ---------------------------------------------------------
+_STANDARDS_PATH = Path(__file__).resolve().parents[1] / "standards" / "active.json"
+
 def _load_standards() -> StandardsConfig:
-    here = Path(__file__).resolve().parents[1]  # repo root candidate
-    cfg_path = here / "standards" / "active.json"
-    if cfg_path.exists():
-        try:
-            return StandardsConfig(**_json.loads(cfg_path.read_text(encoding="utf-8")))
-        except _json.JSONDecodeError as e:
-            logger.warning(f"Standards file is not valid JSON: {cfg_path}. Error: {e}. Using defaults.")
-        except ValidationError as e:
-            logger.warning(f"Standards file does not match expected schema: {cfg_path}. Error: {e}. Using defaults.")
-        except Exception as e:
-            logger.error(f"Unexpected error loading standards from {cfg_path}: {e}. Using defaults.")
-    return StandardsConfig()
+    # Cached by file mtime: repeated generations cost one stat() and skip the re-read and re-validation
+    return load_standards_file(_STANDARDS_PATH)
 
 
 # -- layer helper -------------------------------------------------------------
@@ -43,28 +33,18 @@ def _ensure_layer(doc: ezdxf.EzDxf, name: str, color: int = 7):
             pass
 
 
-# -- text placement (ezdxf version-safe) -------------------------------------
-def _place_text(ent, pos, align=TextEntityAlignment.LEFT):
-    """Use set_pos if available; otherwise set insertion point directly."""
-    if hasattr(ent, "set_pos"):
-        ent.set_pos(pos, align=align)
-    else:
-        ent.dxf.insert = pos  # LEFT align fallback
-
-
 # -- optional symbol resolver -------------------------------------------------
+# All alternatives are anchored at the start and tried in priority order:
+#   rec*/r-* -> receptacle, l* or *lum* -> luminaire, pnl* or *panel* -> panel,
+#   s* containing "switch" or at most 3 chars -> switch
+_SYMBOL_RE = re.compile(
+    r"(?P<receptacle>rec|r-)|(?P<luminaire>l|.*lum)|(?P<panel>pnl|.*panel)|(?=.*switch|.{1,3}\Z)(?P<switch>s)",
+    re.DOTALL,
+)
+
 def _symbol_for(tag: Optional[str], cfg: StandardsConfig) -> Optional[str]:
-    mapping = (cfg.symbols or {})
-    t = (tag or "").lower()
-    if t.startswith("rec") or t.startswith("r-"):
-        return mapping.get("receptacle")
-    if t.startswith("l") or "lum" in t:
-        return mapping.get("luminaire")
-    if "panel" in t or t.startswith("pnl"):
-        return mapping.get("panel")
-    if t.startswith("s") and ("switch" in t or len(t) <= 3):
-        return mapping.get("switch")
-    return None
+    m = _SYMBOL_RE.match((tag or "").lower())
+    return (cfg.symbols or {}).get(m.lastgroup) if m else None
 
 
 # -- main generator -----------------------------------------------------------
@@ -93,7 +73,7 @@ def generate_power_plan_dxf(req: PlanRequest, out_path: Path) -> Path:
     ## v5 titleblock+symbols --------------------------------------------------
     if cfg.titleblock:
         tb_path = (
-            Path(__file__).resolve().parents[1] / "standards" / cfg.titleblock
+            _STANDARDS_PATH.parent / cfg.titleblock
             if not Path(cfg.titleblock).is_absolute()
             else Path(cfg.titleblock)
         )
@@ -108,39 +88,41 @@ def generate_power_plan_dxf(req: PlanRequest, out_path: Path) -> Path:
 
     # -- title / sheet note ---------------------------------------------------
     project_title = getattr(req, "project", "Project")
-    _place_text(
-        msp.add_text(f"{project_title} - Power Plan", dxfattribs={"height": 0.3, "layer": lyr_ann}),
-        (0, 7),
-        align=TextEntityAlignment.LEFT,
-    )
-
-    # -- rooms ----------------------------------------------------------------
-    for r in (getattr(req, "rooms", []) or []):
-        msp.add_lwpolyline(
-            [
-                (r.x, r.y),
-                (r.x + r.w, r.y),
-                (r.x + r.w, r.y + r.h),
-                (r.x, r.y + r.h),
-                (r.x, r.y),
-            ],
-            dxfattribs={"closed": True, "layer": lyr_rooms},
-        )
-        _place_text(
-            msp.add_text(r.name, dxfattribs={"height": 0.15, "layer": lyr_ann}),
-            (r.x + 0.1, r.y + r.h - 0.2),
-            align=TextEntityAlignment.LEFT,
-        )
-
-    # -- devices --------------------------------------------------------------
-    for d in (getattr(req, "devices", []) or []):
-        msp.add_circle((d.x, d.y), radius=0.06, dxfattribs={"layer": lyr_power_devices})
-        tag = getattr(d, "tag", "") or "DEV"
-        _place_text(
-            msp.add_text(tag, dxfattribs={"height": 0.12, "layer": lyr_ann}),
-            (d.x + 0.1, d.y - 0.05),
-            align=TextEntityAlignment.LEFT,
-        )
+    msp.add_text(f"{project_title} - Power Plan", dxfattribs={"height": 0.3, "layer": lyr_ann, "insert": (0, 7)})
+
+    # -- rooms + devices ------------------------------------------------------
+    # Geometry is computed up front, then emitted per entity type with one shared
+    # attribute dict each (ezdxf copies dxfattribs, so sharing is safe). Text is
+    # created with its insert point (LEFT alignment) instead of being placed after.
+    rooms = getattr(req, "rooms", []) or []
+    devices = getattr(req, "devices", []) or []
+    outlines = [
+        [(r.x, r.y), (r.x + r.w, r.y), (r.x + r.w, r.y + r.h), (r.x, r.y + r.h), (r.x, r.y)]
+        for r in rooms
+    ]
+    room_labels = [(r.name, (r.x + 0.1, r.y + r.h - 0.2)) for r in rooms]
+    markers = [(d.x, d.y) for d in devices]
+    tags = [(getattr(d, "tag", "") or "DEV", (d.x + 0.1, d.y - 0.05)) for d in devices]
+
+    add_lwpolyline, add_circle, add_text = msp.add_lwpolyline, msp.add_circle, msp.add_text
+
+    room_attribs = {"closed": True, "layer": lyr_rooms}
+    for points in outlines:
+        add_lwpolyline(points, dxfattribs=room_attribs)
+
+    device_attribs = {"layer": lyr_power_devices}
+    for center in markers:
+        add_circle(center, radius=0.06, dxfattribs=device_attribs)
+
+    text_attribs = {"height": 0.15, "layer": lyr_ann}
+    for text, pos in room_labels:
+        text_attribs["insert"] = pos
+        add_text(text, dxfattribs=text_attribs)
+
+    text_attribs["height"] = 0.12
+    for text, pos in tags:
+        text_attribs["insert"] = pos
+        add_text(text, dxfattribs=text_attribs)
 
     # -- save -----------------------------------------------------------------
     out_path.parent.mkdir(parents=True, exist_ok=True)
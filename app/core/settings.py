@@ -2,6 +2,7 @@
 # Best practice: centralize configuration in one place using Pydantic BaseSettings.
 # This ensures type-checked, documented, and testable config loading.
 from __future__ import annotations
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
@@ -34,14 +35,6 @@ def _load_env_files() -> None:
         # print(f"[settings] No .env found at {env_candidates}")
         pass
 
-# Attempt to load env files before reading settings
-try:
-    _load_env_files()
-except Exception as e:
-    # Best practice: avoid hard crash on config load path; you'll fail below if required vars are missing.
-    # print(f"[settings] Env load warning: {e}")
-    pass
-
 class Settings(BaseSettings):
     # Support both direct OpenAI keys and Replit AI Integrations
     OPENAI_API_KEY: Optional[str] = Field(None, description="Project-scoped OpenAI API key starting with 'sk-'")
@@ -52,7 +45,9 @@ class Settings(BaseSettings):
 
     # ---- Tunables (env-overridable) ----
     OPENAI_MODEL: str = Field("gpt-4o-mini", description="Default chat model")
+    OPENAI_MODEL_TINY: str = Field("gpt-4o-mini", description="Smallest adequate model for trivial outputs (intent confirmation)")
     OPENAI_TIMEOUT_S: int = Field(30, description="HTTP timeout in seconds")
+    AI_SUMMARY_USE_LLM: bool = Field(False, description="Ask the model for the short 'Got it' confirmation instead of answering locally")
     
     @property
     def effective_api_key(self) -> str:
@@ -81,7 +76,27 @@ class Settings(BaseSettings):
     model_config = SettingsConfigDict(
         case_sensitive=True,  # Best practice: avoid surprises on env names
         extra="ignore",       # Ignore unknown env vars instead of erroring
+        defer_build=True,     # Build the validator on first instantiation, not at class creation
     )
 
-# Instantiate once and reuse
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Load env files and instantiate Settings on first use, then reuse the instance.
+    Importing Settings or ROOT alone no longer pays for the .env scan or the model build.
+    """
+    # Attempt to load env files before reading settings
+    try:
+        _load_env_files()
+    except Exception as e:
+        # Best practice: avoid hard crash on config load path; you'll fail below if required vars are missing.
+        # print(f"[settings] Env load warning: {e}")
+        pass
+    return Settings()
+
+def __getattr__(name: str):
+    # `from app.core.settings import settings` resolves through here, so existing imports
+    # still get the shared instance, just built on first access instead of at import.
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,26 +1,97 @@
 import os
-import json
 import logging
+import threading
 import uuid
-from sqlalchemy import create_engine, Column, String, Text, DateTime
+from collections import OrderedDict
+from sqlalchemy import create_engine, Column, String, Text, DateTime, bindparam, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
 
+from app.utils import fastjson
+from app.utils.ttl_cache import TTLCache
+
 logger = logging.getLogger(__name__)
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 DATABASE_ENABLED = bool(DATABASE_URL)
 
-# In-memory fallback when database is not available
-_MEMORY_STORE = {}
+
+class _LRUStore:
+    """
+    Thread-safe session -> task state map. Past maxsize it evicts the least recently
+    used sessions whose task is no longer active; active tasks are never dropped.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            excess = len(self._data) - self.maxsize
+            if excess > 0:
+                # Oldest first; stops as soon as enough finished sessions are found
+                stale = []
+                for k, task in self._data.items():
+                    if task.get("status") != "active":
+                        stale.append(k)
+                        if len(stale) == excess:
+                            break
+                for k in stale:
+                    del self._data[k]
+
+    def values(self):
+        """Snapshot of the stored task states, safe to iterate while others read and write."""
+        with self._lock:
+            return list(self._data.values())
+
+
+# In-memory fallback when database is not available; bounded so session churn
+# in a long-running process can't grow it without limit
+_MEMORY_STORE = _LRUStore(maxsize=int(os.getenv("TASK_MEMORY_MAX", "10000")))
+
+# Active task rows per session as (task_type, parameters JSON, created_at), so repeated
+# polls skip the database. Writes in this process invalidate their session; the short
+# TTL bounds staleness from writes made by other workers.
+_TASK_CACHE = TTLCache(maxsize=4096, ttl_s=1.0)
+
+# Write generations, striped by session id. A write bumps its stripe once its transaction
+# has ended, and a lookup only caches the row it read if its stripe did not move in the
+# meantime: a read that raced a write could otherwise re-cache the old row.
+_WRITE_GEN_STRIPES = 256
+_WRITE_GEN = [0] * _WRITE_GEN_STRIPES
+_WRITE_GEN_LOCK = threading.Lock()
+
+def _task_written(session_id: str) -> None:
+    """Invalidate the cached row for a session after a write to it has ended."""
+    with _WRITE_GEN_LOCK:
+        _WRITE_GEN[hash(session_id) % _WRITE_GEN_STRIPES] += 1
+        _TASK_CACHE.pop(session_id)
 
 if DATABASE_ENABLED:
     try:
         engine = create_engine(
             DATABASE_URL,
             pool_pre_ping=True,
-            pool_recycle=300
+            pool_recycle=300,
+            # Keep enough warm connections for concurrent requests so task lookups
+            # don't pay connection setup under load
+            pool_size=10,
+            max_overflow=20,
         )
         SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
         Base = declarative_base()
@@ -44,6 +115,14 @@ if DATABASE_ENABLED and Base is not None:
         status = Column(String(20), nullable=False, default="active")
         created_at = Column(DateTime, default=datetime.utcnow)
         updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Statements built once; SQLAlchemy caches their compiled form across calls
+    _ACTIVE_COUNT = select(func.count()).select_from(TaskState).where(TaskState.status == "active")
+    _BY_SESSION = select(TaskState).where(TaskState.session_id == bindparam("sid"))
+    _ACTIVE_BY_SESSION = _BY_SESSION.where(TaskState.status == "active")
+
+    # Dialects with INSERT ... ON CONFLICT DO UPDATE; others use select-then-write
+    _UPSERT_INSERT = {"postgresql": pg_insert, "sqlite": sqlite_insert}.get(engine.dialect.name)
 else:
     TaskState = None
 
@@ -64,12 +143,8 @@ def count_active_tasks():
         return sum(1 for task in _MEMORY_STORE.values() if task.get("status") == "active")
     
     try:
-        db = SessionLocal()
-        try:
-            count = db.query(TaskState).filter(TaskState.status == "active").count()
-            return count
-        finally:
-            db.close()
+        with SessionLocal() as db:
+            return db.execute(_ACTIVE_COUNT).scalar_one()
     except Exception as e:
         logger.error(f"Error counting active tasks: {e}")
         return 0
@@ -86,25 +161,35 @@ def get_active_task(session_id: str):
             }
         return None
     
-    try:
-        db = SessionLocal()
+    row = _TASK_CACHE.get(session_id)
+    if row is None:
+        stripe = hash(session_id) % _WRITE_GEN_STRIPES
+        gen = _WRITE_GEN[stripe]
         try:
-            task = db.query(TaskState).filter(
-                TaskState.session_id == session_id,
-                TaskState.status == "active"
-            ).first()
-            if task:
-                return {
-                    "task_type": task.task_type,
-                    "parameters": json.loads(task.parameters),
-                    "created_at": task.created_at.isoformat()
-                }
+            with SessionLocal() as db:
+                task = db.execute(_ACTIVE_BY_SESSION, {"sid": session_id}).scalar_one_or_none()
+                # "No active task" is cached too; False marks it apart from a cache miss
+                row = (task.task_type, task.parameters, task.created_at.isoformat()) if task else False
+        except Exception as e:
+            logger.error(f"Error getting active task: {e}")
             return None
-        finally:
-            db.close()
-    except Exception as e:
+        with _WRITE_GEN_LOCK:
+            if _WRITE_GEN[stripe] == gen:
+                _TASK_CACHE.put(session_id, row)
+    if not row:
+        return None
+    task_type, parameters, created_at = row
+    # Decoded per call so callers can mutate their parameters freely
+    try:
+        parameters = fastjson.loads(parameters)
+    except fastjson.JSONDecodeError as e:
         logger.error(f"Error getting active task: {e}")
         return None
+    return {
+        "task_type": task_type,
+        "parameters": parameters,
+        "created_at": created_at
+    }
 
 def save_task_state(session_id: str, task_type: str, parameters: dict):
     # Check if this is a new task (no existing active task for this session)
@@ -136,12 +221,32 @@ def save_task_state(session_id: str, task_type: str, parameters: dict):
         return
     
     try:
-        db = SessionLocal()
-        try:
-            task = db.query(TaskState).filter(TaskState.session_id == session_id).first()
+        # begin(): commits on exit, rolls back on error, always closes
+        with SessionLocal.begin() as db:
+            if _UPSERT_INSERT is not None:
+                # One round-trip, and no window between the read and the write
+                stmt = _UPSERT_INSERT(TaskState).values(
+                    session_id=session_id,
+                    task_type=task_type,
+                    parameters=fastjson.dumps(parameters),
+                    status="active",
+                )
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[TaskState.session_id],
+                    set_={
+                        "task_type": stmt.excluded.task_type,
+                        "parameters": stmt.excluded.parameters,
+                        "status": "active",
+                        "updated_at": datetime.utcnow(),
+                    },
+                )
+                db.execute(stmt)
+                logger.info(f"Saved task state for session {session_id} with task_id {parameters.get('task_id')}")
+                return
+            task = db.execute(_BY_SESSION, {"sid": session_id}).scalar_one_or_none()
             if task:
                 task.task_type = task_type
-                task.parameters = json.dumps(parameters)
+                task.parameters = fastjson.dumps(parameters)
                 task.status = "active"
                 task.updated_at = datetime.utcnow()
                 logger.info(f"Updated existing task state for session {session_id} with task_id {parameters.get('task_id')}")
@@ -149,16 +254,15 @@ def save_task_state(session_id: str, task_type: str, parameters: dict):
                 task = TaskState(
                     session_id=session_id,
                     task_type=task_type,
-                    parameters=json.dumps(parameters),
+                    parameters=fastjson.dumps(parameters),
                     status="active"
                 )
                 db.add(task)
                 logger.info(f"Created new task state for session {session_id} with task_id {parameters.get('task_id')}")
-            db.commit()
-        finally:
-            db.close()
     except Exception as e:
         logger.error(f"Error saving task state: {e}")
+    finally:
+        _task_written(session_id)
 
 def update_task_parameters(session_id: str, new_parameters: dict):
     if not DATABASE_ENABLED or not SessionLocal:
@@ -185,14 +289,10 @@ def update_task_parameters(session_id: str, new_parameters: dict):
         return False
     
     try:
-        db = SessionLocal()
-        try:
-            task = db.query(TaskState).filter(
-                TaskState.session_id == session_id,
-                TaskState.status == "active"
-            ).first()
+        with SessionLocal.begin() as db:
+            task = db.execute(_ACTIVE_BY_SESSION, {"sid": session_id}).scalar_one_or_none()
             if task:
-                params = json.loads(task.parameters)
+                params = fastjson.loads(task.parameters)
                 # Preserve task_id - it should NEVER be changed once created (enforce immutability)
                 existing_task_id = params.get("task_id")
                 
@@ -207,17 +307,16 @@ def update_task_parameters(session_id: str, new_parameters: dict):
                 if existing_task_id:
                     params["task_id"] = existing_task_id
                 
-                task.parameters = json.dumps(params)
+                task.parameters = fastjson.dumps(params)
                 task.updated_at = datetime.utcnow()
-                db.commit()
                 logger.info(f"Updated task parameters for session {session_id}, task_id: {params.get('task_id')}")
                 return True
             return False
-        finally:
-            db.close()
     except Exception as e:
         logger.error(f"Error updating task parameters: {e}")
         return False
+    finally:
+        _task_written(session_id)
 
 def clear_task_state(session_id: str):
     """Mark task as completed and trigger directory cleanup."""
@@ -233,20 +332,18 @@ def clear_task_state(session_id: str):
             logger.info(f"Cleared task state for session {session_id}, task_id: {task_id_to_cleanup}")
     else:
         try:
-            db = SessionLocal()
-            try:
-                task = db.query(TaskState).filter(TaskState.session_id == session_id).first()
+            with SessionLocal.begin() as db:
+                task = db.execute(_BY_SESSION, {"sid": session_id}).scalar_one_or_none()
                 if task:
-                    params = json.loads(task.parameters)
+                    params = fastjson.loads(task.parameters)
                     task_id_to_cleanup = params.get("task_id", "unknown")
                     task.status = "completed"
                     task.updated_at = datetime.utcnow()
-                    db.commit()
                     logger.info(f"Cleared task state for session {session_id}, task_id: {task_id_to_cleanup}")
-            finally:
-                db.close()
         except Exception as e:
             logger.error(f"Error clearing task state: {e}")
+        finally:
+            _task_written(session_id)
     
     # Clean up task directories
     if task_id_to_cleanup:
@@ -0,0 +1,171 @@
+"""
+Warm LibreOffice for spreadsheet -> PDF conversion.
+
+`libreoffice --headless --convert-to pdf` boots a whole office instance per call,
+which costs seconds before any conversion work starts. This module keeps one
+headless soffice running with a UNO socket listener and converts documents
+through it, so only the first conversion pays the startup.
+
+Requires the `uno` Python bindings that ship with LibreOffice (python3-uno).
+When they or the soffice binary are missing, available() is False and callers
+keep using the one-shot command line conversion.
+"""
+from __future__ import annotations
+import atexit
+import logging
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import uno
+    from com.sun.star.beans import PropertyValue
+except ImportError:  # LibreOffice Python bindings not installed
+    uno = None
+
+_HOST = "127.0.0.1"
+_STARTUP_TIMEOUT_S = 30.0
+# Same limit as the one-shot `libreoffice --convert-to` run
+_CONVERT_TIMEOUT_S = 60.0
+
+_SOFFICE = shutil.which("soffice") or shutil.which("libreoffice")
+
+# One office process and desktop per worker; UNO calls into it are serialized.
+# Each worker's office gets its own port and user profile, so it never talks to (or kills)
+# another worker's instance, and a one-shot `libreoffice --convert-to` run with the default
+# profile isn't handed to it.
+_LOCK = threading.Lock()
+_PROC: Optional[subprocess.Popen] = None
+_PORT: Optional[int] = None
+_PROFILE: Optional[Path] = None
+_DESKTOP = None
+
+
+def available() -> bool:
+    return uno is not None and _SOFFICE is not None
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind((_HOST, 0))
+        return s.getsockname()[1]
+
+
+def _listening() -> bool:
+    try:
+        with socket.create_connection((_HOST, _PORT), timeout=0.5):
+            return True
+    except OSError:
+        return False
+
+
+def _start_office() -> None:
+    global _PROC, _PORT, _PROFILE
+    if _PROC is not None and _PROC.poll() is None:
+        return
+    if _PROFILE is None:
+        _PROFILE = Path(tempfile.mkdtemp(prefix="soffice-warm-"))
+    _PORT = _free_port()
+    _PROC = subprocess.Popen(
+        [
+            _SOFFICE,
+            "--headless", "--invisible", "--nologo", "--norestore", "--nodefault",
+            f"-env:UserInstallation={_PROFILE.as_uri()}",
+            f"--accept=socket,host={_HOST},port={_PORT};urp;StarOffice.ComponentContext",
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + _STARTUP_TIMEOUT_S
+    while not _listening():
+        if _PROC.poll() is not None or time.monotonic() > deadline:
+            _kill_office()
+            raise RuntimeError("soffice listener did not come up")
+        time.sleep(0.2)
+    logger.info(f"Started headless soffice listener on port {_PORT}")
+
+
+def _kill_office() -> None:
+    """Drop the connection and kill the office; a UNO call blocked in it then fails."""
+    global _DESKTOP
+    _DESKTOP = None
+    if _PROC is not None and _PROC.poll() is None:
+        _PROC.kill()
+
+
+def _desktop():
+    global _DESKTOP
+    if _DESKTOP is None:
+        _start_office()
+        local_ctx = uno.getComponentContext()
+        resolver = local_ctx.ServiceManager.createInstanceWithContext(
+            "com.sun.star.bridge.UnoUrlResolver", local_ctx
+        )
+        ctx = resolver.resolve(f"uno:socket,host={_HOST},port={_PORT};urp;StarOffice.ComponentContext")
+        _DESKTOP = ctx.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", ctx)
+    return _DESKTOP
+
+
+def _prop(name: str, value) -> "PropertyValue":
+    p = PropertyValue()
+    p.Name, p.Value = name, value
+    return p
+
+
+def convert_to_pdf(src: Path, dst: Path, timeout_s: float = _CONVERT_TIMEOUT_S) -> Path:
+    """
+    Convert a spreadsheet to PDF through the warm office instance.
+    A conversion still running after `timeout_s` kills the office (the next call starts a
+    fresh one) and raises TimeoutError, as does waiting that long behind another conversion.
+    """
+    global _DESKTOP
+    if not _LOCK.acquire(timeout=timeout_s):
+        raise TimeoutError("warm office is busy with another conversion")
+    timed_out = threading.Event()
+
+    def _expire() -> None:
+        timed_out.set()
+        _kill_office()
+
+    watchdog = threading.Timer(timeout_s, _expire)
+    watchdog.daemon = True
+    watchdog.start()
+    try:
+        doc = _desktop().loadComponentFromURL(
+            uno.systemPathToFileUrl(str(Path(src).resolve())), "_blank", 0, (_prop("Hidden", True),)
+        )
+        try:
+            doc.storeToURL(
+                uno.systemPathToFileUrl(str(Path(dst).resolve())), (_prop("FilterName", "calc_pdf_Export"),)
+            )
+        finally:
+            doc.close(True)
+    except Exception as e:
+        # Office died, hung or the bridge dropped: reconnect on the next call
+        _DESKTOP = None
+        if timed_out.is_set():
+            raise TimeoutError(f"warm office conversion took longer than {timeout_s:.0f}s") from e
+        raise
+    finally:
+        watchdog.cancel()
+        _LOCK.release()
+    return Path(dst)
+
+
+@atexit.register
+def _shutdown() -> None:
+    if _PROC is not None and _PROC.poll() is None:
+        _PROC.terminate()
+        try:
+            _PROC.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            _PROC.kill()
+    if _PROFILE is not None:
+        shutil.rmtree(_PROFILE, ignore_errors=True)
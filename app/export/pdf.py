@@ -14,15 +14,27 @@ from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
 from reportlab.lib.units import inch
 from app.schemas.panel_ir import PanelScheduleIR
+from app.export import office_pool
 
 logger = logging.getLogger(__name__)
 
+# Circuit summary line in export_pdf_from_ir
+_ROW_FMT = "{ckt:<4} {side:<4} {row:<3} {poles:<5} {brk:<6} {load:<6} {ph:<7} {desc}"
+
+# (phA, phB, phC) -> phase letters; flags may be None, False or True
+_PHASES = {
+    (a, b, c): "".join(ch for ch, flag in zip("ABC", (a, b, c)) if flag)
+    for a in (None, False, True) for b in (None, False, True) for c in (None, False, True)
+}
+
 
 def convert_excel_to_pdf(excel_path: str, output_pdf: str) -> str:
     """
     Convert Excel file to PDF using LibreOffice.
     
-    This produces an exact visual copy of the spreadsheet.
+    This produces an exact visual copy of the spreadsheet. Goes through the
+    long-lived office instance in office_pool when the UNO bindings are
+    installed, otherwise runs `libreoffice --convert-to` per call.
     
     Args:
         excel_path: Path to the Excel file
@@ -37,6 +49,15 @@ def convert_excel_to_pdf(excel_path: str, output_pdf: str) -> str:
     if not excel_path.exists():
         raise FileNotFoundError(f"Excel file not found: {excel_path}")
     
+    # Prefer the warm office instance; a one-shot soffice run pays seconds of startup
+    if office_pool.available():
+        try:
+            office_pool.convert_to_pdf(excel_path, output_pdf)
+            logger.info(f"Successfully converted {excel_path} to {output_pdf}")
+            return str(output_pdf)
+        except Exception as e:
+            logger.warning(f"Warm LibreOffice conversion failed, running one-shot conversion: {e}")
+    
     # Create temp directory for LibreOffice output
     with tempfile.TemporaryDirectory() as temp_dir:
         temp_dir = Path(temp_dir)
@@ -121,31 +142,40 @@ def _fallback_excel_to_pdf(excel_path: str, output_pdf: str) -> str:
     """
     from openpyxl import load_workbook
     
-    wb = load_workbook(excel_path)
-    ws = wb.active
-    
-    c = canvas.Canvas(output_pdf, pagesize=letter)
-    width, height = letter
-    
-    c.setFont("Helvetica-Bold", 12)
-    c.drawString(0.5*inch, height - 0.5*inch, f"Panel Schedule (Fallback Export)")
-    
-    c.setFont("Helvetica", 8)
-    y = height - 0.8*inch
-    
-    # Export visible rows
-    for row in ws.iter_rows(min_row=1, max_row=min(ws.max_row, 100), values_only=True):
-        if y < 0.5*inch:
-            c.showPage()
-            y = height - 0.5*inch
-            c.setFont("Helvetica", 8)
+    # Read-only mode streams rows from the sheet XML instead of building every cell
+    # (and its style) up front; only the first 100 rows are printed anyway
+    wb = load_workbook(excel_path, read_only=True)
+    try:
+        ws = wb.active
         
-        # Build row text
-        row_text = "  ".join(str(cell) if cell is not None else "" for cell in row[:15])
-        c.drawString(0.5*inch, y, row_text[:120])  # Truncate long rows
-        y -= 10
-    
-    c.save()
+        c = canvas.Canvas(output_pdf, pagesize=letter)
+        width, height = letter
+        
+        c.setFont("Helvetica-Bold", 12)
+        c.drawString(0.5*inch, height - 0.5*inch, f"Panel Schedule (Fallback Export)")
+        
+        c.setFont("Helvetica", 8)
+        y = height - 0.8*inch
+        
+        # Export visible rows (max_row may be unknown in read-only mode; iteration
+        # stops at the last row anyway). Loop invariants are bound once.
+        draw = c.drawString
+        margin = 0.5*inch
+        top = height - margin
+        for row in ws.iter_rows(min_row=1, max_row=100, max_col=15, values_only=True):
+            if y < margin:
+                c.showPage()
+                y = top
+                c.setFont("Helvetica", 8)
+            
+            # Build row text (rows are already capped at 15 columns)
+            row_text = "  ".join(["" if cell is None else str(cell) for cell in row])
+            draw(margin, y, row_text[:120])  # Truncate long rows
+            y -= 10
+        
+        c.save()
+    finally:
+        wb.close()  # read-only workbooks keep the file open until closed
     return output_pdf
 
 
@@ -197,21 +227,24 @@ def export_pdf_from_ir(ir: PanelScheduleIR, out_pdf: str) -> str:
     y -= 8
 
     # Rows
-    def phases(rec) -> str:
-        return "".join(ch for ch, flag in zip("ABC", [rec.phA, rec.phB, rec.phC]) if flag)
-
     for rec in sorted(ir.circuits, key=lambda r: r.ckt):
         if y < 1.0*inch:
             c.showPage()
             y = height - 0.9*inch
             c.setFont("Helvetica", 8)
 
-        phs = phases(rec)
-        poles = "" if rec.poles is None else str(rec.poles)
         c.drawString(
             0.75*inch, y,
-            f"{rec.ckt:<4} {rec.side:<4} {rec.excel_row:<3} {poles:<5} "
-            f"{int(rec.breaker_amps):<6} {int(rec.load_amps):<6} {phs:<7} {rec.description or ''}"
+            _ROW_FMT.format(
+                ckt=rec.ckt,
+                side=rec.side,
+                row=rec.excel_row,
+                poles="" if rec.poles is None else str(rec.poles),
+                brk=int(rec.breaker_amps),
+                load=int(rec.load_amps),
+                ph=_PHASES[(rec.phA, rec.phB, rec.phC)],
+                desc=rec.description or "",
+            )
         )
         y -= 10
 
@@ -1,8 +1,10 @@
 from __future__ import annotations
+import re
+from io import BytesIO
 from pathlib import Path
-from typing import Optional, Dict
+from typing import Optional, Dict, Tuple
 from openpyxl import load_workbook
-from openpyxl.utils import range_boundaries
+from openpyxl.utils import column_index_from_string, range_boundaries
 
 from app.schemas.panel_ir import PanelScheduleIR
 
@@ -11,6 +13,8 @@ TEMPLATE_PATH = ROOT / "templates" / "panelboard_template.xlsx"  # master templa
 
 ODD_COLS  = {"desc": "A", "phaseA": "B", "phaseB": "C", "phaseC": "D", "pole": "E", "breaker": "F", "load_type": "G"}
 EVEN_COLS = {"desc": "O", "phaseA": "L", "phaseB": "M", "phaseC": "N", "pole": "K", "breaker": "J", "load_type": "I"}
+ODD_COL_IDX  = {k: column_index_from_string(v) for k, v in ODD_COLS.items()}
+EVEN_COL_IDX = {k: column_index_from_string(v) for k, v in EVEN_COLS.items()}
 
 def _phase_slot_for_circuit(ckt: int) -> str:
     i = (ckt - 1) % 6
@@ -30,38 +34,62 @@ def _write_raw(ws, addr: str, value):
     else:
         ws[addr].value = value
 
-def _get_param(ir: PanelScheduleIR, label: str) -> str:
-    """Fetch a header parameter (by label)."""
+def _left_params_by_label(ir: PanelScheduleIR) -> Dict[str, object]:
+    """Left header values keyed by normalized label (first occurrence wins)."""
+    by_label: Dict[str, object] = {}
     for p in ir.header.left_params:
-        if p.name_text.strip().upper() == label.upper():
-            return "" if p.value is None else str(p.value).strip()
-    return ""
+        by_label.setdefault(p.name_text.strip().upper(), p.value)
+    return by_label
+
+def _param_text(value) -> str:
+    return "" if value is None else str(value).strip()
+
+_TRAILING_COLONS_RE = re.compile(r"[\s:]+$")
+
+def _normalize_label(s: str) -> str:
+    """Upper-case label text without surrounding whitespace or trailing colons."""
+    return _TRAILING_COLONS_RE.sub("", (s or "").strip().upper())
+
+# Label cells every panelboard template must carry, with their expected text
+_SENTINELS = {
+    "A2":"VOLTAGE","A3":"PHASE","A4":"WIRE","A5":"MAIN BUS AMPS","A6":"MAIN CIRCUIT BREAKER",
+    "A7":"MOUNTING","A8":"FEED","A9":"FEED-THRU LUGS",
+    "I2":"LOCATION","I3":"FED FROM","I4":"UL LISTED EQUIPMENT SHORT CIRCUIT RATING",
+    "I5":"MAXIMUM AVAILABLE SHORT CIRCUIT CURRENT","I6":"PHASE CONDUCTOR",
+    "I7":"NEUTRAL CONDUCTOR","I8":"GROUND CONDUCTOR",
+}
 
 def _assert_template(ws):
-    def normalize(s: str) -> str:
-        s = (s or "").strip().upper()
-        while s.endswith(":"):
-            s = s[:-1].rstrip()
-        return s
-    sentinels = {
-        "A2":"VOLTAGE","A3":"PHASE","A4":"WIRE","A5":"MAIN BUS AMPS","A6":"MAIN CIRCUIT BREAKER",
-        "A7":"MOUNTING","A8":"FEED","A9":"FEED-THRU LUGS",
-        "I2":"LOCATION","I3":"FED FROM","I4":"UL LISTED EQUIPMENT SHORT CIRCUIT RATING",
-        "I5":"MAXIMUM AVAILABLE SHORT CIRCUIT CURRENT","I6":"PHASE CONDUCTOR",
-        "I7":"NEUTRAL CONDUCTOR","I8":"GROUND CONDUCTOR",
-    }
-    for addr, exp in sentinels.items():
-        got = normalize(ws[addr].value)
-        if got != normalize(exp):
-            raise ValueError(f"Template mismatch at {addr}: expected '{exp}', got '{ws[addr].value}'")
+    for addr, exp in _SENTINELS.items():
+        got = ws[addr].value
+        if _normalize_label(got) != exp:
+            raise ValueError(f"Template mismatch at {addr}: expected '{exp}', got '{got}'")
+
+# template path -> (st_mtime_ns, file bytes) for templates that passed _assert_template.
+# Each export still parses its own workbook from the bytes, but skips the disk read
+# and the sentinel checks until the file changes.
+_TEMPLATE_CACHE: Dict[Path, Tuple[int, bytes]] = {}
+
+def _load_template(tpl: Path):
+    mtime = tpl.stat().st_mtime_ns
+    cached = _TEMPLATE_CACHE.get(tpl)
+    if cached is not None and cached[0] == mtime:
+        return load_workbook(BytesIO(cached[1]), data_only=False, keep_vba=False)
+    data = tpl.read_bytes()
+    wb = load_workbook(BytesIO(data), data_only=False, keep_vba=False)
+    _assert_template(wb.active)
+    _TEMPLATE_CACHE[tpl] = (mtime, data)
+    return wb
+
+# Characters not allowed in file names / sheet titles, mapped to "_" in one C-level pass
+_FILENAME_TABLE = str.maketrans(dict.fromkeys('\\/:*?"<>| ', "_"))
+_SHEET_TITLE_TABLE = str.maketrans(dict.fromkeys('[]:*?/\\', "_"))
 
 def _sanitize_filename(s: str) -> str:
-    return "".join(ch if ch not in '\\/:*?"<>|' else "_" for ch in s).replace(" ", "_")
+    return s.translate(_FILENAME_TABLE)
 
 def _sanitize_sheet_title(s: str) -> str:
-    invalid = set('[]:*?/\\')
-    s = "".join("_" if ch in invalid else ch for ch in s).strip() or "SCHEDULE"
-    return s[:31]
+    return (s.translate(_SHEET_TITLE_TABLE).strip() or "SCHEDULE")[:31]
 
 def write_excel_from_ir(
     ir: PanelScheduleIR,
@@ -74,11 +102,9 @@ def write_excel_from_ir(
     if not tpl.exists():
         raise FileNotFoundError(f"Panelboard template not found: {tpl}")
 
-    wb = load_workbook(tpl, data_only=False, keep_vba=False)
+    wb = _load_template(tpl)  # validated against the sentinel labels
     ws = wb.active
 
-    _assert_template(ws)
-
     # --- Header / labels ---
     _write_raw(ws, ir.header.panel_name_cell, ir.header.panel_name)
     for p in ir.header.left_params:
@@ -88,25 +114,27 @@ def write_excel_from_ir(
     _write_raw(ws, ir.header.right_unused_value_cell, None)
 
     # --- Circuits (rows 12..53) ---
+    # Cells are addressed by (row, column index): no "A12"-style string to build and parse per write
+    cell = ws.cell
     for c in ir.circuits:
         r = c.excel_row
-        cols = ODD_COLS if c.side == "odd" else EVEN_COLS
+        cols = ODD_COL_IDX if c.side == "odd" else EVEN_COL_IDX
         poles = c.poles or 1
 
         # Write first row with actual data
         if c.description is not None:
-            ws[f"{cols['desc']}{r}"].value = c.description
-        ws[f"{cols['breaker']}{r}"].value = float(c.breaker_amps)
-        ws[f"{cols['pole']}{r}"].value = int(poles)
+            cell(row=r, column=cols["desc"]).value = c.description
+        cell(row=r, column=cols["breaker"]).value = float(c.breaker_amps)
+        cell(row=r, column=cols["pole"]).value = int(poles)
         
         # Write load type if available (LTG, RCP, MTR, C, NC)
         if c.load_type:
-            ws[f"{cols['load_type']}{r}"].value = c.load_type
+            cell(row=r, column=cols["load_type"]).value = c.load_type
         
         # Write load amps to the phase slot for THIS circuit number
         # Maintain row/column integrity: each circuit gets its own phase column
         phase_slot = _phase_slot_for_circuit(c.ckt)
-        ws[f"{cols[phase_slot]}{r}"].value = float(c.load_amps)
+        cell(row=r, column=cols[phase_slot]).value = float(c.load_amps)
 
         # Write continuation rows for multi-pole circuits (2-pole or 3-pole)
         for continuation_offset in range(1, poles):
@@ -117,20 +145,20 @@ def write_excel_from_ir(
                 break
             
             # Write "-" for description, breaker, pole, and load_type in continuation rows
-            ws[f"{cols['desc']}{continuation_row}"].value = "-"
-            ws[f"{cols['breaker']}{continuation_row}"].value = "-"
-            ws[f"{cols['pole']}{continuation_row}"].value = "-"
-            ws[f"{cols['load_type']}{continuation_row}"].value = "-"
+            cell(row=continuation_row, column=cols["desc"]).value = "-"
+            cell(row=continuation_row, column=cols["breaker"]).value = "-"
+            cell(row=continuation_row, column=cols["pole"]).value = "-"
+            cell(row=continuation_row, column=cols["load_type"]).value = "-"
             
             # For load_amps, maintain row/column integrity:
             # Write load_amps to the correct phase column based on continuation circuit number
             continuation_phase_slot = _phase_slot_for_circuit(continuation_circuit)
-            ws[f"{cols[continuation_phase_slot]}{continuation_row}"].value = float(c.load_amps)
+            cell(row=continuation_row, column=cols[continuation_phase_slot]).value = float(c.load_amps)
             
             # Write "-" to the other phase columns
             for phase in ["phaseA", "phaseB", "phaseC"]:
                 if phase != continuation_phase_slot:
-                    ws[f"{cols[phase]}{continuation_row}"].value = "-"
+                    cell(row=continuation_row, column=cols[phase]).value = "-"
 
     # --- KVA formulas (once) ---
     if formulas:
@@ -139,10 +167,8 @@ def write_excel_from_ir(
 
     # --- File naming & sheet title ---
     from pathlib import Path as P
-    file_voltage = _sanitize_filename(str(next(
-        (p.value for p in ir.header.left_params if p.name_text.upper() == "VOLTAGE"),
-        "UNKNOWN",
-    )).strip())
+    left_params = _left_params_by_label(ir)  # one pass instead of a scan per lookup
+    file_voltage = _sanitize_filename(str(left_params.get("VOLTAGE", "UNKNOWN")).strip())
     panel_name = _sanitize_filename(ir.header.panel_name.strip())
     
     # Use provided outputs_dir or fallback to global OUT directory
@@ -154,9 +180,9 @@ def write_excel_from_ir(
     outputs_dir.mkdir(parents=True, exist_ok=True)
     out_p = outputs_dir / f"panel_{panel_name}_{file_voltage}.xlsx"
 
-    tab_voltage = _get_param(ir, "VOLTAGE")
-    tab_phase   = _get_param(ir, "PHASE")
-    tab_wire    = _get_param(ir, "WIRE")
+    tab_voltage = _param_text(left_params.get("VOLTAGE"))
+    tab_phase   = _param_text(left_params.get("PHASE"))
+    tab_wire    = _param_text(left_params.get("WIRE"))
     ws.title = _sanitize_sheet_title(f"{tab_voltage}, {tab_phase}, {tab_wire}".strip(", "))
 
     # Add document metadata to help reduce antivirus false positives
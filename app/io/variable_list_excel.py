@@ -5,13 +5,136 @@ Creates a four-column spreadsheet listing all panel schedule
 variables, their current values, confidence scores, and load types.
 """
 import logging
+from functools import lru_cache
+from operator import itemgetter
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Alignment, Border, Side, PatternFill, NamedStyle
+from openpyxl.styles.fonts import DEFAULT_FONT
 
 logger = logging.getLogger(__name__)
 
+# Style objects are immutable, so one instance of each is shared by every cell and export
+_THIN = Side(style='thin', color='000000')
+CELL_BORDER = Border(left=_THIN, right=_THIN, top=_THIN, bottom=_THIN)
+# A section title is a filled band across A:D outlined only on its outer edges,
+# which renders like a merged range without the merge
+BAND_START_BORDER = Border(left=_THIN, top=_THIN, bottom=_THIN)
+BAND_BORDER = Border(top=_THIN, bottom=_THIN)
+BAND_END_BORDER = Border(right=_THIN, top=_THIN, bottom=_THIN)
+LEFT_ALIGN = Alignment(horizontal='left')
+CENTER_ALIGN = Alignment(horizontal='center')
+HEADER_FONT = Font(bold=True, size=12, color="FFFFFF")
+HEADER_FILL = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+SECTION_FONT = Font(bold=True, size=11)
+SECTION_FILL = PatternFill(start_color="D9E2F3", end_color="D9E2F3", fill_type="solid")
+HIGH_CONF_FILL = PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid")
+MED_CONF_FILL = PatternFill(start_color="FFEB9C", end_color="FFEB9C", fill_type="solid")
+LOW_CONF_FILL = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")
+# Indexed by how many of the 0.5 / 0.8 thresholds a confidence reaches
+_CONF_FILLS = (LOW_CONF_FILL, MED_CONF_FILL, HIGH_CONF_FILL)
+
+# Per-circuit variable names and confidence keys, filled with the circuit number
+_DESC_NAME, _DESC_KEY = "Pole Space %s Description", "circuit_%s_description"
+_BREAKER_NAME, _BREAKER_KEY = "Pole Space %s Breaker Amps", "circuit_%s_breaker"
+_POLES_NAME, _POLES_KEY = "Pole Space %s Poles", "circuit_%s_poles"
+_LOAD_NAME, _LOAD_KEY = "Pole Space %s Load Amps", "circuit_%s_load"
+
+
+def _confidence_fill(confidence: float) -> PatternFill:
+    """Return color based on confidence level."""
+    return _CONF_FILLS[(confidence >= 0.5) + (confidence >= 0.8)]
+
+
+@lru_cache(maxsize=256)
+def _confidence_display(confidence: float) -> Tuple[str, PatternFill]:
+    """Percent text and fill for a confidence; scores repeat heavily across rows."""
+    return f"{confidence:.0%}", _confidence_fill(confidence)
+
+
+# (label, panel_specs key) for the PANEL SPECIFICATIONS section, in sheet order
+_SPEC_VARIABLES = (
+    ("Voltage", "voltage"),
+    ("Phase", "phase"),
+    ("Wire", "wire"),
+    ("Main Bus Amps", "main_bus_amps"),
+    ("Main Circuit Breaker", "main_breaker"),
+    ("Mounting", "mounting"),
+    ("Feed", "feed"),
+    ("Location", "location"),
+    ("Fed From", "fed_from"),
+)
+
+
+def _variable_row(
+    name: str, value: Any, confidence: Optional[Dict[str, Any]], load_type_value: Optional[str] = None
+) -> Tuple[Tuple[str, str, str, str], Optional[PatternFill]]:
+    """One variable row: (name, value, confidence text, load type) and its confidence fill."""
+    conf_text, conf_fill = "", None
+    if confidence is not None:
+        conf_text, conf_fill = _confidence_display(confidence.get('effective_confidence', 0))
+    
+    # Most values (specs, descriptions) are already plain strings
+    if type(value) is not str:
+        value = "" if value is None else str(value)
+    return (name, value, conf_text, load_type_value if load_type_value else "NA"), conf_fill
+
+
+def _row_plan(
+    panel_name: str,
+    panel_specs: Dict[str, Any],
+    circuits: Dict[str, Dict[str, Any]],
+    confidence_data: Dict[str, Dict[str, Any]],
+) -> List[tuple]:
+    """
+    Rows below the column header, in sheet order: (title, None) for a section
+    header, otherwise a _variable_row() tuple.
+    """
+    conf = confidence_data.get
+    rows = [
+        ("PANEL IDENTIFICATION", None),
+        _variable_row("Panel Name", panel_name, conf("panel_name")),
+        ("PANEL SPECIFICATIONS", None),
+    ]
+    rows += [_variable_row(label, panel_specs.get(key, ""), conf(key)) for label, key in _SPEC_VARIABLES]
+    rows.append(_variable_row(
+        "Number of Circuits", panel_specs.get("number_of_ckts", len(circuits)), conf("number_of_ckts")
+    ))
+    
+    if circuits:
+        rows.append(("CIRCUIT DATA", None))
+        
+        # Continuation spaces are dropped before sorting; each number is parsed once
+        decorated = [
+            (int(num) if num.isdigit() else 999, num, data)
+            for num, data in circuits.items()
+            if not data.get('is_continuation')
+        ]
+        decorated.sort(key=itemgetter(0))
+        
+        # Up to four rows per circuit; bind append once for the loop
+        add = rows.append
+        for _, circuit_num, circuit_data in decorated:
+            desc = circuit_data.get('description', '')
+            breaker_amps = circuit_data.get('breaker_amps', 0)
+            poles = circuit_data.get('poles', 1)
+            load_amps = circuit_data.get('load_amps', 0)
+            load_type = circuit_data.get('load_type', '')
+            
+            add(_variable_row(_DESC_NAME % circuit_num, desc, conf(_DESC_KEY % circuit_num)))
+            add(_variable_row(
+                _BREAKER_NAME % circuit_num, f"{breaker_amps}A" if breaker_amps else "", conf(_BREAKER_KEY % circuit_num)
+            ))
+            add(_variable_row(_POLES_NAME % circuit_num, f"{poles}P" if poles else "", conf(_POLES_KEY % circuit_num)))
+            if load_amps:
+                add(_variable_row(
+                    _LOAD_NAME % circuit_num, f"{load_amps}A", conf(_LOAD_KEY % circuit_num), load_type if load_type else None
+                ))
+    
+    return rows
+
 
 def generate_variable_list_excel(
     output_path: Path,
@@ -34,137 +157,66 @@ def generate_variable_list_excel(
     Returns:
         Path to the generated Excel file
     """
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Variable List"
+    # Write-only: rows stream to the sheet XML as they are appended instead of
+    # being kept as a Cell graph; widths and freeze panes must be set before then
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Variable List")
     
     confidence_data = confidence_data or {}
     
-    header_font = Font(bold=True, size=12)
-    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-    header_font_white = Font(bold=True, size=12, color="FFFFFF")
-    border = Side(style='thin', color='000000')
-    cell_border = Border(left=border, right=border, top=border, bottom=border)
+    # NamedStyles are bound to the workbook they are added to, so they are built
+    # per call from the shared module-level pieces
+    header_style = NamedStyle(
+        name="var_header", font=HEADER_FONT, fill=HEADER_FILL, border=CELL_BORDER, alignment=CENTER_ALIGN
+    )
+    section_style = NamedStyle(name="var_section", font=SECTION_FONT, fill=SECTION_FILL, border=BAND_START_BORDER)
+    text_style = NamedStyle(name="var_text", font=DEFAULT_FONT, border=CELL_BORDER, alignment=LEFT_ALIGN)
+    flag_style = NamedStyle(name="var_flag", font=DEFAULT_FONT, border=CELL_BORDER, alignment=CENTER_ALIGN)
+    # Confidence cells get a complete style per fill rather than a fill override
+    conf_styles = {None: flag_style}
+    for name, fill in zip(("var_conf_low", "var_conf_med", "var_conf_high"), _CONF_FILLS):
+        conf_styles[fill] = NamedStyle(
+            name=name, font=DEFAULT_FONT, fill=fill, border=CELL_BORDER, alignment=CENTER_ALIGN
+        )
+    for style in (header_style, section_style, text_style, *conf_styles.values()):
+        wb.add_named_style(style)
     
     ws.column_dimensions['A'].width = 35
     ws.column_dimensions['B'].width = 40
     ws.column_dimensions['C'].width = 15
     ws.column_dimensions['D'].width = 12
     
-    ws['A1'] = "Variable Name"
-    ws['B1'] = "Value"
-    ws['C1'] = "Confidence"
-    ws['D1'] = "Load Type"
-    ws['A1'].font = header_font_white
-    ws['B1'].font = header_font_white
-    ws['C1'].font = header_font_white
-    ws['D1'].font = header_font_white
-    ws['A1'].fill = header_fill
-    ws['B1'].fill = header_fill
-    ws['C1'].fill = header_fill
-    ws['D1'].fill = header_fill
-    ws['A1'].border = cell_border
-    ws['B1'].border = cell_border
-    ws['C1'].border = cell_border
-    ws['D1'].border = cell_border
-    ws['A1'].alignment = Alignment(horizontal='center')
-    ws['B1'].alignment = Alignment(horizontal='center')
-    ws['C1'].alignment = Alignment(horizontal='center')
-    ws['D1'].alignment = Alignment(horizontal='center')
-    
-    row = 2
-    
-    section_font = Font(bold=True, size=11)
-    section_fill = PatternFill(start_color="D9E2F3", end_color="D9E2F3", fill_type="solid")
-    
-    high_conf_fill = PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid")
-    med_conf_fill = PatternFill(start_color="FFEB9C", end_color="FFEB9C", fill_type="solid")
-    low_conf_fill = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")
-    
-    def get_confidence_fill(confidence: float) -> PatternFill:
-        """Return color based on confidence level."""
-        if confidence >= 0.8:
-            return high_conf_fill
-        elif confidence >= 0.5:
-            return med_conf_fill
-        else:
-            return low_conf_fill
-    
-    def add_section_header(title: str):
-        nonlocal row
-        ws.merge_cells(f'A{row}:D{row}')
-        ws[f'A{row}'] = title
-        ws[f'A{row}'].font = section_font
-        ws[f'A{row}'].fill = section_fill
-        ws[f'A{row}'].border = cell_border
-        ws[f'B{row}'].border = cell_border
-        ws[f'C{row}'].border = cell_border
-        ws[f'D{row}'].border = cell_border
-        row += 1
-    
-    def add_variable(name: str, value: Any, param_key: Optional[str] = None, load_type_value: Optional[str] = None):
-        nonlocal row
-        ws[f'A{row}'] = name
-        ws[f'B{row}'] = str(value) if value is not None else ""
-        ws[f'A{row}'].border = cell_border
-        ws[f'B{row}'].border = cell_border
-        ws[f'C{row}'].border = cell_border
-        ws[f'D{row}'].border = cell_border
-        ws[f'A{row}'].alignment = Alignment(horizontal='left')
-        ws[f'B{row}'].alignment = Alignment(horizontal='left')
-        ws[f'C{row}'].alignment = Alignment(horizontal='center')
-        ws[f'D{row}'].alignment = Alignment(horizontal='center')
-        
-        if param_key and param_key in confidence_data:
-            conf = confidence_data[param_key].get('effective_confidence', 0)
-            ws[f'C{row}'] = f"{conf:.0%}"
-            ws[f'C{row}'].fill = get_confidence_fill(conf)
-        else:
-            ws[f'C{row}'] = ""
-        
-        ws[f'D{row}'] = load_type_value if load_type_value else "NA"
-        
-        row += 1
-    
-    add_section_header("PANEL IDENTIFICATION")
-    add_variable("Panel Name", panel_name, "panel_name")
-    
-    add_section_header("PANEL SPECIFICATIONS")
-    add_variable("Voltage", panel_specs.get("voltage", ""), "voltage")
-    add_variable("Phase", panel_specs.get("phase", ""), "phase")
-    add_variable("Wire", panel_specs.get("wire", ""), "wire")
-    add_variable("Main Bus Amps", panel_specs.get("main_bus_amps", ""), "main_bus_amps")
-    add_variable("Main Circuit Breaker", panel_specs.get("main_breaker", ""), "main_breaker")
-    add_variable("Mounting", panel_specs.get("mounting", ""), "mounting")
-    add_variable("Feed", panel_specs.get("feed", ""), "feed")
-    add_variable("Location", panel_specs.get("location", ""), "location")
-    add_variable("Fed From", panel_specs.get("fed_from", ""), "fed_from")
-    add_variable("Number of Circuits", panel_specs.get("number_of_ckts", len(circuits)), "number_of_ckts")
-    
-    if circuits:
-        add_section_header("CIRCUIT DATA")
-        
-        sorted_circuits = sorted(circuits.items(), key=lambda x: int(x[0]) if x[0].isdigit() else 999)
-        
-        for circuit_num, circuit_data in sorted_circuits:
-            if circuit_data.get('is_continuation'):
-                continue
-                
-            desc = circuit_data.get('description', '')
-            breaker_amps = circuit_data.get('breaker_amps', 0)
-            poles = circuit_data.get('poles', 1)
-            load_amps = circuit_data.get('load_amps', 0)
-            load_type = circuit_data.get('load_type', '')
-            circuit_conf = circuit_data.get('confidence', 0)
-            
-            add_variable(f"Pole Space {circuit_num} Description", desc, f"circuit_{circuit_num}_description")
-            add_variable(f"Pole Space {circuit_num} Breaker Amps", f"{breaker_amps}A" if breaker_amps else "", f"circuit_{circuit_num}_breaker")
-            add_variable(f"Pole Space {circuit_num} Poles", f"{poles}P" if poles else "", f"circuit_{circuit_num}_poles")
-            if load_amps:
-                add_variable(f"Pole Space {circuit_num} Load Amps", f"{load_amps}A", f"circuit_{circuit_num}_load", load_type if load_type else None)
+    rows = _row_plan(panel_name, panel_specs, circuits, confidence_data)
     
     ws.freeze_panes = 'A2'
     
+    def styled(value: Any, style: NamedStyle) -> WriteOnlyCell:
+        cell = WriteOnlyCell(ws, value=value)
+        cell.style = style
+        return cell
+    
+    ws.append([styled(v, header_style) for v in ("Variable Name", "Value", "Confidence", "Load Type")])
+    
+    # The rest of a section title band is identical for every section; a
+    # write-only row is serialized as soon as it is appended, so one set is reused
+    band = [WriteOnlyCell(ws) for _ in range(3)]
+    for cell, edge in zip(band, (BAND_BORDER, BAND_BORDER, BAND_END_BORDER)):
+        cell.fill = SECTION_FILL
+        cell.border = edge
+    
+    # Variable rows reuse styled template cells the same way, with one
+    # Confidence cell per fill, so the hot loop only assigns values
+    name_cell, value_cell, load_type_cell = (styled(None, style) for style in (text_style, text_style, flag_style))
+    conf_cells = {fill: styled(None, style) for fill, style in conf_styles.items()}
+    
+    for values, conf_fill in rows:
+        if isinstance(values, str):
+            ws.append([styled(values, section_style)] + band)
+            continue
+        conf_cell = conf_cells[conf_fill]
+        name_cell.value, value_cell.value, conf_cell.value, load_type_cell.value = values
+        ws.append([name_cell, value_cell, conf_cell, load_type_cell])
+    
     wb.save(output_path)
     logger.info(f"Generated variable list Excel: {output_path}")
     
@@ -1,11 +1,17 @@
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException
-from fastapi.responses import FileResponse, HTMLResponse, JSONResponse
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from pathlib import Path
-import shutil, uuid, json, logging, os
+import shutil, uuid, json, logging, os, re, stat, threading
+import asyncio
+import anyio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from typing import List
 from datetime import datetime
+from functools import lru_cache
 
 # Load config first so all downstream imports see correct envs.
 from app.core.settings import settings  # centralizes env/.env loading and validation
@@ -14,9 +20,11 @@ from app.schemas.models import OneLineRequest, PlanRequest
 from app.cad.one_line import generate_one_line_dxf
 from app.cad.power_plan import generate_power_plan_dxf
 from app.cad.lighting_plan import generate_lighting_plan_dxf
-from app.ai.llm import plan_from_prompt, summarize_intent, extract_panel_specs_from_text, extract_circuit_from_text
+from app.ai import gpt_preflight, llm
+from app.ai.llm import summarize_and_plan, plan_and_extract_circuit, extract_panel_specs_from_text
 from app.db import init_db, get_active_task, save_task_state, update_task_parameters, clear_task_state
 from app.utils.excel_template import find_template, extract_template_parameters
+from app.utils import fastjson
 from app.routers import panel as panel_router
 from app.routers import preflight
 from app.routers import ocr as ocr_router
@@ -73,15 +81,15 @@ def cleanup_old_task_directories():
     if TASK_TMP_ROOT.exists():
         cutoff = time.time() - (24 * 60 * 60)  # 24 hours ago
         
-        for task_dir in TASK_TMP_ROOT.iterdir():
-            if task_dir.is_dir():
-                # Check directory creation/modification time
-                if task_dir.stat().st_mtime < cutoff:
-                    try:
-                        shutil.rmtree(task_dir)
-                        logger.info(f"Deleted old task directory (>24hrs): {task_dir}")
-                    except Exception as e:
-                        logger.error(f"Failed to delete old task directory {task_dir}: {e}")
+        # Check directory creation/modification time
+        with os.scandir(TASK_TMP_ROOT) as it:
+            old_dirs = [Path(e.path) for e in it if e.is_dir() and e.stat().st_mtime < cutoff]
+        for task_dir in old_dirs:
+            try:
+                shutil.rmtree(task_dir)
+                logger.info(f"Deleted old task directory (>24hrs): {task_dir}")
+            except Exception as e:
+                logger.error(f"Failed to delete old task directory {task_dir}: {e}")
     
     # Clean up old active tasks in database (mark as completed)
     if DATABASE_ENABLED and SessionLocal:
@@ -106,7 +114,18 @@ def cleanup_old_task_directories():
         except Exception as e:
             logger.error(f"Failed to cleanup old active tasks from database: {e}")
 
-app = FastAPI(title="AI Design Engineer Voice & Text Assistant")
+# Serialize JSON bodies with orjson when it is installed; it encodes the large
+# plan/review dicts several times faster and emits compact output.
+try:
+    import orjson  # noqa: F401
+    _DEFAULT_RESPONSE_CLASS = ORJSONResponse
+except ImportError:
+    _DEFAULT_RESPONSE_CLASS = JSONResponse
+
+app = FastAPI(
+    title="AI Design Engineer Voice & Text Assistant",
+    default_response_class=_DEFAULT_RESPONSE_CLASS,
+)
 
 # Register panel preflight checks
 app.include_router(preflight.router)
@@ -125,10 +144,71 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# DXF drawing and DXF -> PDF rendering are CPU-bound; worker processes let concurrent
+# builds use every core instead of taking turns on the GIL. CAD_WORKERS=0 keeps it inline.
+# The default splits the cores between uvicorn workers (WEB_CONCURRENCY) rather than
+# giving each of them a pool the size of the machine.
+_CAD_WORKERS = int(os.getenv(
+    "CAD_WORKERS",
+    str(max(1, (os.cpu_count() or 1) // max(1, int(os.getenv("WEB_CONCURRENCY", "1"))))),
+))
+_CAD_POOL: ProcessPoolExecutor | None = None
+_CAD_POOL_LOCK = threading.Lock()
+
+def _new_cad_pool() -> ProcessPoolExecutor:
+    # spawn, not fork: the server process already runs threads
+    return ProcessPoolExecutor(max_workers=_CAD_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+
+def _replace_cad_pool(broken: ProcessPoolExecutor) -> ProcessPoolExecutor | None:
+    """Swap a broken pool for a fresh one (once, however many callers saw it break)."""
+    global _CAD_POOL
+    with _CAD_POOL_LOCK:
+        if _CAD_POOL is broken:
+            broken.shutdown(wait=False, cancel_futures=True)
+            _CAD_POOL = _new_cad_pool()
+        return _CAD_POOL
+
+def _run_cad(fn, *args):
+    """Run fn(*args) in the CAD process pool (inline when no pool is running)."""
+    pool = _CAD_POOL
+    if pool is None:
+        return fn(*args)
+    try:
+        return pool.submit(fn, *args).result()
+    except BrokenProcessPool:
+        # A worker died (OOM kill, crash in a native library): retry once in a fresh pool
+        logger.warning(f"CAD worker pool broke running {fn.__name__}; restarting it")
+        pool = _replace_cad_pool(pool)
+        if pool is None:
+            return fn(*args)
+        return pool.submit(fn, *args).result()
+
 @app.on_event("startup")
 def startup_event():
+    global _CAD_POOL
     init_db()
+    # Shared output/config folders are created once here, not on every request
+    for d in (BUCKET, OUT):
+        d.mkdir(parents=True, exist_ok=True)
+    STANDARDS_DIR.mkdir(exist_ok=True)
     cleanup_old_task_directories()
+    if _CAD_WORKERS > 0:
+        with _CAD_POOL_LOCK:
+            _CAD_POOL = _new_cad_pool()
+
+@app.on_event("shutdown")
+def shutdown_event():
+    global _CAD_POOL
+    with _CAD_POOL_LOCK:
+        pool, _CAD_POOL = _CAD_POOL, None
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
+
+@app.on_event("shutdown")
+async def close_llm_clients():
+    # Close the pooled async OpenAI connections opened from the server's event loop
+    await llm._ASYNC_CLIENTS.aclose()
+    await gpt_preflight._CLIENTS.aclose()
 
 # Static frontend
 app.mount("/static", StaticFiles(directory=str(STATIC), html=True), name="static")
@@ -160,6 +240,24 @@ def favicon():
     return Response(status_code=204)
 
 # ---- Bucket (drag & drop) ----
+def _save_upload(src, dest: Path) -> None:
+    with dest.open("wb") as out:
+        shutil.copyfileobj(src, out, 1 << 20)
+
+_TEMPLATE_SUFFIXES = ('.xlsx', '.xlsm')
+# Uploaded images that get visual-enhanced OCR right away
+_VISUAL_OCR_SUFFIXES = ('.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.gif')
+
+# Visual OCR (OpenCV + tesseract) is CPU- and memory-heavy. It gets its own thread budget,
+# shared by all uploads, instead of drawing on the default limiter every sync route needs.
+_OCR_LIMITER = anyio.CapacityLimiter(os.cpu_count() or 1)
+
+def _visual_ocr(path: Path) -> dict:
+    from app.skills.ocr_visual_enhanced import analyze_panel_image_visual_enhanced
+    # Combines text OCR + visual breaker + visual nameplate; debug=True saves images to /tmp/
+    return analyze_panel_image_visual_enhanced(str(path), enable_preprocessing=True, debug=False)
+
+
 @app.post("/bucket/upload")
 async def upload(files: List[UploadFile] = File(...), session: str | None = None):
     if not session:
@@ -174,29 +272,40 @@ async def upload(files: List[UploadFile] = File(...), session: str | None = None
     template_detected = False
     ocr_results = []
     
-    for f in files:
-        filename = f.filename  # No prefix needed - task isolation by directory
-        dest = uploads_dir / filename
-        with dest.open("wb") as out:
-            shutil.copyfileobj(f.file, out)
+    # No prefix needed - task isolation by directory
+    dests = [uploads_dir / f.filename for f in files]
+    names_lower = [f.filename.lower() for f in files]
+    if len(set(dests)) == len(dests):
+        # Copies run in worker threads so the event loop stays free, all files at once
+        await asyncio.gather(*(anyio.to_thread.run_sync(_save_upload, f.file, d) for f, d in zip(files, dests)))
+    else:
+        # Repeated names overwrite each other in order, as a sequential copy would
+        for f, d in zip(files, dests):
+            await anyio.to_thread.run_sync(_save_upload, f.file, d)
+    
+    # OCR the images concurrently (up to the OCR limiter); results are applied to task state
+    # below one file at a time, in upload order. Failures are reported per file.
+    ocr_jobs = {
+        i: anyio.to_thread.run_sync(_visual_ocr, d, limiter=_OCR_LIMITER)
+        for i, (name_lower, d) in enumerate(zip(names_lower, dests))
+        if name_lower.endswith(_VISUAL_OCR_SUFFIXES)
+    }
+    visual_results = dict(zip(ocr_jobs, await asyncio.gather(*ocr_jobs.values(), return_exceptions=True)))
+    
+    for i, (f, name_lower) in enumerate(zip(files, names_lower)):
+        filename = f.filename
         saved.append(filename)
         
         # Detect if this is a template file
-        if 'template' in f.filename.lower() and f.filename.lower().endswith(('.xlsx', '.xlsm')):
+        if name_lower.endswith(_TEMPLATE_SUFFIXES) and 'template' in name_lower:
             template_detected = True
         
-        # Auto-trigger visual-enhanced OCR for image files
-        image_extensions = ['.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.gif']
-        if any(f.filename.lower().endswith(ext) for ext in image_extensions):
+        # Auto-triggered visual-enhanced OCR for image files
+        if i in visual_results:
             try:
-                from app.skills.ocr_visual_enhanced import analyze_panel_image_visual_enhanced
-                
-                # Run visual-enhanced OCR (combines text OCR + visual breaker + visual nameplate)
-                visual_result = analyze_panel_image_visual_enhanced(
-                    str(dest),
-                    enable_preprocessing=True,
-                    debug=False  # Set to True to save debug images to /tmp/
-                )
+                visual_result = visual_results[i]
+                if isinstance(visual_result, Exception):
+                    raise visual_result
                 
                 # Graceful degradation: warn but don't fail if visual detection has issues
                 if not visual_result.get('success'):
@@ -365,6 +474,21 @@ async def upload(files: List[UploadFile] = File(...), session: str | None = None
     
     return response
 
+IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png", ".tif", ".tiff", ".bmp")
+
+def _list_files(directory: Path, suffixes: tuple | None = None) -> List[str]:
+    """
+    Sorted names of the regular files in `directory`, optionally only those ending in
+    one of `suffixes` (lowercase). scandir: no per-entry stat.
+    """
+    try:
+        with os.scandir(directory) as it:
+            if suffixes is None:
+                return sorted(e.name for e in it if e.is_file())
+            return sorted(e.name for e in it if e.name.lower().endswith(suffixes) and e.is_file())
+    except FileNotFoundError:
+        return []
+
 @app.get("/bucket/list")
 def bucket_list(session: str | None = None):
     if not session:
@@ -372,11 +496,23 @@ def bucket_list(session: str | None = None):
     
     # Use task-specific uploads directory
     uploads_dir, _ = get_task_directories(session)
-    if not uploads_dir or not uploads_dir.exists():
+    if not uploads_dir:
         return {"files": []}
     
-    files = sorted([p.name for p in uploads_dir.iterdir() if p.is_file()])
-    return {"files": files}
+    return {"files": _list_files(uploads_dir)}
+
+def _download_stat(path: Path) -> os.stat_result:
+    """
+    Stat a file about to be served; 404 unless it is a regular file. Passing the result
+    to FileResponse saves it a second stat before streaming.
+    """
+    try:
+        st = path.stat()
+    except OSError:
+        raise HTTPException(404, "Not found")
+    if not stat.S_ISREG(st.st_mode):
+        raise HTTPException(404, "Not found")
+    return st
 
 @app.get("/bucket/file/{name}")
 def bucket_file(name: str, session: str | None = None):
@@ -389,9 +525,7 @@ def bucket_file(name: str, session: str | None = None):
         raise HTTPException(404, "No active task")
     
     path = uploads_dir / name
-    if not path.exists():
-        raise HTTPException(404, "Not found")
-    return FileResponse(str(path))
+    return FileResponse(path, stat_result=_download_stat(path))
 
 @app.post("/bucket/clear")
 def bucket_clear(session: str | None = None):
@@ -401,9 +535,10 @@ def bucket_clear(session: str | None = None):
     # Clear task-specific uploads directory
     uploads_dir, _ = get_task_directories(session)
     if uploads_dir and uploads_dir.exists():
-        for p in list(uploads_dir.iterdir()):
-            if p.is_file():
-                p.unlink()
+        with os.scandir(uploads_dir) as it:
+            for e in it:
+                if e.is_file():
+                    os.unlink(e.path)
     return {"status": "cleared"}
 
 # ---- Outputs list (for UI) ----
@@ -414,11 +549,18 @@ def outputs_list(session: str | None = None):
     
     # Use task-specific outputs directory
     _, outputs_dir = get_task_directories(session)
-    if not outputs_dir or not outputs_dir.exists():
+    if not outputs_dir:
         return {"files": []}
     
-    files = sorted([p.name for p in outputs_dir.iterdir() if p.is_file()])
-    return {"files": files}
+    return {"files": _list_files(outputs_dir)}
+
+_OUTPUT_MIME_TYPES = {
+    ".xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    ".pdf": "application/pdf",
+    ".zip": "application/zip",
+    ".dxf": "application/dxf",
+}
 
 @app.get("/out/{name}")
 def out_file(name: str, session: str | None = None):
@@ -431,23 +573,15 @@ def out_file(name: str, session: str | None = None):
         raise HTTPException(404, "No active task")
     
     path = outputs_dir / name
-    if not path.exists():
-        raise HTTPException(404, "Not found")
+    st = _download_stat(path)
     
     # Set proper MIME types and headers to help browsers handle files correctly
     # This can help reduce false positive virus warnings on Windows
-    ext = path.suffix.lower()
-    mime_types = {
-        ".xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-        ".pdf": "application/pdf",
-        ".zip": "application/zip",
-        ".dxf": "application/dxf",
-    }
-    media_type = mime_types.get(ext, "application/octet-stream")
+    media_type = _OUTPUT_MIME_TYPES.get(path.suffix.lower(), "application/octet-stream")
     
     return FileResponse(
-        str(path),
+        path,
+        stat_result=st,
         media_type=media_type,
         filename=path.name,
         headers={
@@ -463,30 +597,50 @@ def out_file(name: str, session: str | None = None):
 # ---- CAD endpoints (unchanged programmatic access) ----
 @app.post("/cad/one_line")
 def cad_one_line(req: OneLineRequest):
-    OUT.mkdir(parents=True, exist_ok=True)
     out_path = OUT / _short_filename('one_line', 'dxf')
-    generate_one_line_dxf(req, out_path)
+    _run_cad(generate_one_line_dxf, req, out_path)
     return {"file": out_path.name}
 
 @app.post("/cad/power_plan")
 def cad_power_plan(req: PlanRequest):
-    OUT.mkdir(parents=True, exist_ok=True)
     out_path = OUT / _short_filename('power_plan', 'dxf')
-    generate_power_plan_dxf(req, out_path)
+    _run_cad(generate_power_plan_dxf, req, out_path)
     return {"file": out_path.name}
 
 @app.post("/cad/lighting_plan")
 def cad_lighting_plan(req: PlanRequest):
-    OUT.mkdir(parents=True, exist_ok=True)
     out_path = OUT / _short_filename('lighting_plan', 'dxf')
-    generate_lighting_plan_dxf(req, out_path)
+    _run_cad(generate_lighting_plan_dxf, req, out_path)
     return {"file": out_path.name}
 
 # ---- Voice/typed command dispatcher ----
 
-def _filter_plan_params(params: dict) -> dict:
-    """Remove internal state flags from parameters before including in plan response."""
-    return {k: v for k, v in params.items() if k not in ["pending_confirmation", "pending_finish", "prompt_count"]}
+# Internal state flags kept out of plan responses
+_PLAN_HIDDEN_PARAMS = frozenset({"pending_confirmation", "pending_finish", "prompt_count"})
+
+def _build_plan(task_type: str, params: dict) -> dict:
+    """Plan response for a task: task, project, then its parameters minus internal state flags."""
+    plan = {"task": task_type, "project": params.get("project", "Project")}
+    for k, v in params.items():
+        if k not in _PLAN_HIDDEN_PARAMS:
+            plan[k] = v
+    return plan
+
+def _add_template_parameters(session: str, params: dict) -> None:
+    """Add the uploaded template's parameters to params once; the caller saves params."""
+    if "template_parameters" in params:
+        return
+    uploads_dir, _ = get_task_directories(session)
+    if uploads_dir:
+        template_path = find_template(uploads_dir, "")  # No prefix needed with task isolation
+        if template_path:
+            params["template_parameters"] = extract_template_parameters(template_path)
+
+# Whole-message replies to a pending confirmation
+_YES_REPLIES = frozenset({"yes", "y", "yeah", "yep", "sure", "ok", "okay"})
+_NO_REPLIES = frozenset({"no", "n", "nope", "nah", "cancel"})
+# Finish intent: any of these anywhere in the message (substring match, e.g. "completed")
+_FINISH_RE = re.compile(r"finished|done|complete|stop")
 
 @app.post("/commands/run")
 def run_command(payload: dict):
@@ -498,15 +652,10 @@ def run_command(payload: dict):
     if not session:
         raise HTTPException(400, "Session ID required.")
     
-    # Check for reference files in task-specific uploads directory
-    uploads_dir, _ = get_task_directories(session)
-    session_files = []
-    if uploads_dir and uploads_dir.exists():
-        session_files = [p.name for p in uploads_dir.iterdir() if p.is_file()]
-    
     # Check for Yes/No responses
-    text_lower = text.lower().strip()
-    if text_lower in ["yes", "y", "yeah", "yep", "sure", "ok", "okay"]:
+    lowered = text.lower()  # reused by the extractors below
+    text_lower = lowered.strip()
+    if text_lower in _YES_REPLIES:
         # User confirmed something - check what we're confirming
         active_task = get_active_task(session)
         
@@ -535,25 +684,18 @@ def run_command(payload: dict):
                 params["panel_name"] = f"Panel{panel_number}"
                 logger.info(f"Fallback panel_name generation: {params['panel_name']} for task_id: {params.get('task_id')}")
             
+            # For panel_schedule, extract template parameters (saved with the rest below)
+            if task_type == "panel_schedule":
+                _add_template_parameters(session, params)
             update_task_parameters(session, params)
             
-            # For panel_schedule, extract template parameters and start the design
+            # For panel_schedule, start the design
             if task_type == "panel_schedule":
-                # Extract template parameters if not already done
-                if "template_parameters" not in params:
-                    uploads_dir, _ = get_task_directories(session)
-                    if uploads_dir:
-                        template_path = find_template(uploads_dir, "")  # No prefix needed with task isolation
-                        if template_path:
-                            template_params = extract_template_parameters(template_path)
-                            params["template_parameters"] = template_params
-                            update_task_parameters(session, params)
-                
                 return {
                     "summary": "Got it.",
                     "message": "Panelboard schedule build starting. Please provide information via voice/text or document uploads via drag and drop window. Press Build for output documents and type 'finished' when you want to end the task.",
                     "tts_override": "Build starting.",
-                    "plan": {"task": task_type, "project": params.get("project", "Project"), **_filter_plan_params(params)}
+                    "plan": _build_plan(task_type, params)
                 }
             
             # For other tasks, ready to go
@@ -561,13 +703,13 @@ def run_command(payload: dict):
                 "summary": "Got it.",
                 "message": f"{task_name.title()} build starting. Please provide information via voice/text or document uploads. Press Build for output documents and type 'finished' when you want to end the task.",
                 "tts_override": "Build starting.",
-                "plan": {"task": task_type, "project": params.get("project", "Project"), **_filter_plan_params(params)}
+                "plan": _build_plan(task_type, params)
             }
         else:
             # Generic yes without context - treat as continue
             pass
     
-    if text_lower in ["no", "n", "nope", "nah", "cancel"]:
+    if text_lower in _NO_REPLIES:
         # User declined something - check what we're declining
         active_task = get_active_task(session)
         if active_task and active_task.get("parameters", {}).get("pending_confirmation"):
@@ -590,12 +732,11 @@ def run_command(payload: dict):
             return {
                 "summary": "Got it.",
                 "message": f"Continuing work on {task_name}. What else do you need?",
-                "plan": {"task": task_type, "project": params.get("project", "Project"), **_filter_plan_params(params)}
+                "plan": _build_plan(task_type, params)
             }
     
     # Check if user wants to finish the current task
-    finish_keywords = ["finished", "done", "complete", "stop"]
-    if any(kw in text_lower for kw in finish_keywords):
+    if _FINISH_RE.search(text_lower):
         active_task = get_active_task(session)
         if active_task:
             task_type = active_task["task_type"]
@@ -609,7 +750,7 @@ def run_command(payload: dict):
             return {
                 "summary": "Got it.",
                 "message": "End Task?",
-                "plan": {"task": task_type, "project": params.get("project", "Project"), **_filter_plan_params(params)},
+                "plan": _build_plan(task_type, params),
                 "needs_finish_confirmation": True,
                 "task_name": task_name
             }
@@ -628,30 +769,19 @@ def run_command(payload: dict):
         task_type = active_task["task_type"]
         params = active_task["parameters"]
         
-        # Parse the user's response to extract parameters
-        new_plan = plan_from_prompt(text, str(BUCKET))
+        # Parse the user's response to extract parameters, and circuit information
+        # (circuit-level input): regex first, LLM extraction alongside the plan if that finds nothing
+        new_plan, circuit_data = anyio.from_thread.run(plan_and_extract_circuit, text, str(BUCKET), lowered)
         
         # Track which parameters were newly extracted or updated
         extracted_params = []
         
-        # First, try to extract circuit information (circuit-level input)
-        from app.ai.llm import extract_circuit_from_text, extract_circuit_from_text_llm
-        circuit_data = extract_circuit_from_text(text)
-        
-        # If regex extraction didn't find anything, try LLM-powered extraction
-        if not circuit_data:
-            circuit_data = extract_circuit_from_text_llm(text)
-        
         if circuit_data:
             # Validate pole count - reject circuits with more than 3 poles
             poles_count = circuit_data.get('poles', 1)
             if poles_count > 3:
                 # Build plan with current parameters for display
-                current_plan = {
-                    "task": task_type,
-                    "project": params.get("project", "Project"),
-                    **_filter_plan_params(params)
-                }
+                current_plan = _build_plan(task_type, params)
                 return {
                     "summary": "Invalid circuit.",
                     "message": "circuit not valid, 3 pole max",
@@ -716,7 +846,7 @@ def run_command(payload: dict):
                 extracted_params.append(" ".join(parts))
         else:
             # Not circuit data - try to extract panel specs (voltage, phase, etc.)
-            panel_specs_from_text = extract_panel_specs_from_text(text)
+            panel_specs_from_text = extract_panel_specs_from_text(text, lowered)
             if panel_specs_from_text:
                 if "panel_specs" not in params:
                     params["panel_specs"] = {}
@@ -757,7 +887,6 @@ def run_command(payload: dict):
                 extracted_params.append(f"number of poles is {new_value}")
         # Only update panel_name if user explicitly mentioned it in their text
         # Check for explicit panel name patterns to avoid AI defaulting to 'default_panel' etc.
-        import re
         panel_name_mentioned = bool(re.search(
             r'(?:panel\s*(?:name|id|identifier)?\s*(?:is|called|named|:)?\s*["\']?([A-Z0-9][-A-Z0-9\s]*)|(?:name|call|rename)\s*(?:the\s*)?panel)',
             text,
@@ -792,15 +921,13 @@ def run_command(payload: dict):
                 params["panel_name"] = new_value
                 extracted_params.append(f"panel name is {new_value}")
         
-        # Save updated parameters
-        update_task_parameters(session, params)
-        
         # Build the plan with updated parameters (exclude internal state flags)
-        plan = {
-            "task": task_type,
-            "project": params.get("project", "Project"),
-            **_filter_plan_params(params)
-        }
+        plan = _build_plan(task_type, params)
+        
+        # Ensure template parameters are extracted, then save everything in one write
+        if task_type == "panel_schedule":
+            _add_template_parameters(session, params)
+        update_task_parameters(session, params)
         
         # Build confirmation message
         confirmation = "Got it."
@@ -809,16 +936,6 @@ def run_command(payload: dict):
         
         # Check if we have all required parameters for panel_schedule
         if task_type == "panel_schedule":
-            # Ensure template parameters are extracted
-            if "template_parameters" not in params:
-                uploads_dir, _ = get_task_directories(session)
-                if uploads_dir:
-                    template_path = find_template(uploads_dir, "")  # No prefix needed with task isolation
-                    if template_path:
-                        template_params = extract_template_parameters(template_path)
-                        params["template_parameters"] = template_params
-                        update_task_parameters(session, params)
-            
             number_of_ckts = params.get("number_of_ckts")
             
             # All parameters collected (number_of_ckts is now optional - AI will detect from input)
@@ -839,11 +956,11 @@ def run_command(payload: dict):
         }
     
     # No active task, parse as new command
-    summary = summarize_intent(text)
     # Note: plan_from_prompt doesn't actually use the bucket path for task creation
     uploads_dir, _ = get_task_directories(session)
     bucket_path = str(uploads_dir) if uploads_dir else ""
-    plan = plan_from_prompt(text, bucket_path)
+    # Summary and plan are independent LLM calls; run them concurrently on the server loop
+    summary, plan = anyio.from_thread.run(summarize_and_plan, text, bucket_path)
     task = (plan.get("task") or "").lower()
     
     # Check if this is a recognized task that needs confirmation
@@ -1034,30 +1151,28 @@ def build_panel_from_session(payload: dict):
     return ir.model_dump()
 
 
-from app.schemas.standards import StandardsConfig
+from app.schemas.standards import StandardsConfig, load_standards_file
 
 STANDARDS_DIR = ROOT / "standards"
 ACTIVE_STANDARDS = STANDARDS_DIR / "active.json"
 
 def load_standards() -> StandardsConfig:
-    STANDARDS_DIR.mkdir(exist_ok=True)
-    if ACTIVE_STANDARDS.exists():
-        try:
-            return StandardsConfig(**json.loads(ACTIVE_STANDARDS.read_text()))
-        except Exception:
-            pass
+    """Active standards, parsed once per file version. Shared instance: treat as read-only."""
+    cfg = load_standards_file(ACTIVE_STANDARDS, use_defaults=False)
+    if cfg is not None:
+        return cfg
+    # Missing or invalid: replace it with the defaults
     cfg = StandardsConfig()
-    ACTIVE_STANDARDS.write_text(json.dumps(cfg.model_dump(), indent=2))
+    ACTIVE_STANDARDS.write_bytes(fastjson.dumps_pretty(cfg.model_dump()))
     return cfg
 
 @app.post("/standards/upload")
 async def standards_upload(config: UploadFile = File(None), titleblock: UploadFile = File(None)):
-    STANDARDS_DIR.mkdir(exist_ok=True)
     result = {}
     if config is not None:
         text = config.file.read().decode("utf-8", errors="ignore")
         try:
-            cfg_json = json.loads(text)
+            cfg_json = fastjson.loads(text)
         except Exception:
             # fallback: simple key:value parser
             cfg_json = {}
@@ -1067,16 +1182,15 @@ async def standards_upload(config: UploadFile = File(None), titleblock: UploadFi
                     cfg_json[k.strip()] = v.strip()
             if "layers" not in cfg_json:
                 cfg_json = {"layers": {"annotations": "E-ANNO-TEXT"}}
-        ACTIVE_STANDARDS.write_text(json.dumps(cfg_json, indent=2))
+        ACTIVE_STANDARDS.write_bytes(fastjson.dumps_pretty(cfg_json))
         result["config"] = "saved"
     if titleblock is not None:
         tb_name = titleblock.filename
         tb_path = STANDARDS_DIR / tb_name
         with tb_path.open("wb") as f:
             f.write(titleblock.file.read())
-        cfg = load_standards()
-        cfg.titleblock = tb_name
-        ACTIVE_STANDARDS.write_text(json.dumps(cfg.model_dump(), indent=2))
+        cfg = load_standards().model_copy(update={"titleblock": tb_name})
+        ACTIVE_STANDARDS.write_bytes(fastjson.dumps_pretty(cfg.model_dump()))
         result["titleblock"] = tb_name
     if not result:
         raise HTTPException(400, "No files uploaded.")
@@ -1089,7 +1203,24 @@ def standards_get():
 
 
 from fastapi import Body
-import csv, io
+
+_CSV_QUOTE_RE = re.compile(r'[,"\r\n]')
+
+def _csv_field(value) -> str:
+    """One CSV field, quoted only when needed (same output as csv.writer's QUOTE_MINIMAL)."""
+    if value is None:
+        return ""
+    text = value if type(value) is str else str(value)
+    if _CSV_QUOTE_RE.search(text):
+        return '"' + text.replace('"', '""') + '"'
+    return text
+
+def _panel_schedule_csv(rows) -> bytes:
+    """UTF-8 "Panel,Load Name,kVA" CSV (CRLF line endings) from (panel, name, kva) rows."""
+    return "".join(
+        ["Panel,Load Name,kVA\r\n"]
+        + [f"{_csv_field(pnl)},{_csv_field(name)},{_csv_field(kva)}\r\n" for pnl, name, kva in rows]
+    ).encode("utf-8")
 
 @app.post("/cad/panel_schedule_csv")
 def cad_panel_schedule_csv(req: OneLineRequest = Body(...)):
@@ -1098,13 +1229,7 @@ def cad_panel_schedule_csv(req: OneLineRequest = Body(...)):
     by_panel = {}
     for ld in req.loads:
         by_panel.setdefault(ld.panel, []).append(ld)
-    csv_buf = io.StringIO()
-    writer = csv.writer(csv_buf)
-    writer.writerow(["Panel", "Load Name", "kVA"])
-    for pnl, loads in by_panel.items():
-        for ld in loads:
-            writer.writerow([pnl, ld.name, ld.kva])
-    content = csv_buf.getvalue().encode("utf-8")
+    content = _panel_schedule_csv((pnl, ld.name, ld.kva) for pnl, loads in by_panel.items() for ld in loads)
     out_path = OUT / _short_filename('panel_schedule', 'csv')
     with open(out_path, "wb") as f:
         f.write(content)
@@ -1119,11 +1244,11 @@ from app.export.pdf_from_dxf import dxf_to_pdf
 def export_pdf(file: str, session: str | None = None):
     # convert an existing DXF in OUT directory to a PDF with same stem
     dxf_path = OUT / file
-    if not dxf_path.exists() or not dxf_path.suffix.lower() in [".dxf"]:
+    if not dxf_path.exists() or dxf_path.suffix.lower() != ".dxf":
         raise HTTPException(400, "Provide a DXF file name that exists in /outputs/list.")
     pdf_name = Path(file).with_suffix(".pdf").name
     pdf_path = OUT / pdf_name
-    dxf_to_pdf(dxf_path, pdf_path)
+    _run_cad(dxf_to_pdf, dxf_path, pdf_path)
     return {"message": "PDF generated.", "file": pdf_name}
 
 
@@ -1175,6 +1300,10 @@ def _write_summary_docx(plan: dict, out_dir: Path, session: str | None = None) -
     doc.save(str(out_path))
     return out_path
 
+# Office files are already deflate-compressed zip containers and PDFs carry compressed
+# streams, so a second deflate pass costs time for next to no size gain
+_ZIP_STORED_SUFFIXES = (".xlsx", ".xlsm", ".docx", ".pdf", ".zip")
+
 @app.post("/export/build_zip")
 def export_build_zip(payload: dict):
     """
@@ -1195,9 +1324,10 @@ def export_build_zip(payload: dict):
     outputs = payload.get("outputs") or ["dxf","pdf"]
     session = payload.get("session")
 
-    OUT.mkdir(parents=True, exist_ok=True)
 
     generated = []
+    # Artifacts whose bytes are still in hand go into the zip without a re-read
+    in_memory = {}
 
     if intent == "one_line":
         req = OneLineRequest(**{
@@ -1209,12 +1339,12 @@ def export_build_zip(payload: dict):
         })
         dxf_name = _short_filename('one_line', 'dxf', session)
         dxf_path = OUT / dxf_name
-        generate_one_line_dxf(req, dxf_path)
+        _run_cad(generate_one_line_dxf, req, dxf_path)
         generated.append(dxf_name)
         if "pdf" in outputs:
             from app.export.pdf_from_dxf import dxf_to_pdf
             pdf_name = dxf_name.replace(".dxf",".pdf")
-            dxf_to_pdf(dxf_path, OUT / pdf_name)
+            _run_cad(dxf_to_pdf, dxf_path, OUT / pdf_name)
             generated.append(pdf_name)
 
     elif intent == "power_plan":
@@ -1225,12 +1355,12 @@ def export_build_zip(payload: dict):
         })
         dxf_name = _short_filename('power_plan', 'dxf', session)
         dxf_path = OUT / dxf_name
-        generate_power_plan_dxf(req, dxf_path)
+        _run_cad(generate_power_plan_dxf, req, dxf_path)
         generated.append(dxf_name)
         if "pdf" in outputs:
             from app.export.pdf_from_dxf import dxf_to_pdf
             pdf_name = dxf_name.replace(".dxf",".pdf")
-            dxf_to_pdf(dxf_path, OUT / pdf_name)
+            _run_cad(dxf_to_pdf, dxf_path, OUT / pdf_name)
             generated.append(pdf_name)
 
     elif intent == "lighting_plan":
@@ -1241,12 +1371,12 @@ def export_build_zip(payload: dict):
         })
         dxf_name = _short_filename('lighting_plan', 'dxf', session)
         dxf_path = OUT / dxf_name
-        generate_lighting_plan_dxf(req, dxf_path)
+        _run_cad(generate_lighting_plan_dxf, req, dxf_path)
         generated.append(dxf_name)
         if "pdf" in outputs:
             from app.export.pdf_from_dxf import dxf_to_pdf
             pdf_name = dxf_name.replace(".dxf",".pdf")
-            dxf_to_pdf(dxf_path, OUT / pdf_name)
+            _run_cad(dxf_to_pdf, dxf_path, OUT / pdf_name)
             generated.append(pdf_name)
     
     elif intent == "panel_schedule":
@@ -1255,15 +1385,11 @@ def export_build_zip(payload: dict):
         
         # Get image files from task uploads directory
         image_files = []
-        if uploads_dir and uploads_dir.exists():
-            image_files = [p.name for p in uploads_dir.iterdir() 
-                          if p.is_file() and p.suffix.lower() in [".jpg",".jpeg",".png",".tif",".tiff",".bmp"]]
+        if uploads_dir:
+            image_files = _list_files(uploads_dir, IMAGE_SUFFIXES)
         
         if image_files:
-            all_lines = []
-            for img_name in image_files:
-                lines = ocr_image_to_lines(uploads_dir / img_name)
-                all_lines.extend(lines)
+            all_lines = ocr_images_to_lines([uploads_dir / img_name for img_name in image_files])
             
             circuits = parse_circuits_from_lines(all_lines, plan.get("number_of_ckts"))
             panel_specs_ocr = extract_panel_specs(all_lines)
@@ -1339,15 +1465,11 @@ def export_build_zip(payload: dict):
     # Optional CSV panel schedule if present in plan
     if "panel_schedule" in plan and isinstance(plan["panel_schedule"], dict):
         by_panel = plan["panel_schedule"]
-        import csv, io
-        csv_buf = io.StringIO()
-        writer = csv.writer(csv_buf)
-        writer.writerow(["Panel", "Load Name", "kVA"])
-        for pnl, loads in by_panel.items():
-            for ld in loads:
-                writer.writerow([pnl, ld.get("name",""), ld.get("kva","")])
         csv_name = _short_filename('panel_schedule', 'csv', session)
-        (OUT / csv_name).write_text(csv_buf.getvalue(), encoding="utf-8")
+        in_memory[csv_name] = _panel_schedule_csv(
+            (pnl, ld.get("name",""), ld.get("kva","")) for pnl, loads in by_panel.items() for ld in loads
+        )
+        (OUT / csv_name).write_bytes(in_memory[csv_name])
         generated.append(csv_name)
 
     # Create summary DOCX
@@ -1362,14 +1484,25 @@ def export_build_zip(payload: dict):
     
     with _zipfile.ZipFile(zip_path, "w", _zipfile.ZIP_DEFLATED, compresslevel=6) as z:
         for name in generated:
+            if name in in_memory:
+                z.writestr(name, in_memory[name])
+                continue
             file_path = OUT / name
-            if file_path.exists():
+            if not file_path.exists():
+                continue
+            lower = name.lower()
+            if lower.endswith(_ZIP_STORED_SUFFIXES):
+                z.write(file_path, arcname=name, compress_type=_zipfile.ZIP_STORED)
+            elif lower.endswith(".dxf"):
+                z.write(file_path, arcname=name, compresslevel=1)
+            else:
                 z.write(file_path, arcname=name)
 
     return {"message": "Build package ready.", "zip": zip_name, "artifacts": generated}
 
 
 # ---- Session helpers ----
+@lru_cache(maxsize=2048)
 def _session_prefix(session: str|None) -> str:
     if not session:
         return ""
@@ -1411,7 +1544,7 @@ def _short_filename(file_type: str, extension: str, session: str | None = None)
 
 
 # ---- Panel OCR → Excel ----
-from app.skills.ocr_panel import ocr_image_to_lines, parse_circuits_from_lines, extract_panel_specs
+from app.skills.ocr_panel import ocr_images_to_lines, parse_circuits_from_lines, extract_panel_specs
 from app.utils.excel_template import find_template, apply_template_to_data
 import openpyxl
 
@@ -1447,17 +1580,17 @@ def panel_ocr_to_excel(payload: dict):
     files = payload.get("files")
     if not files:
         # use all images in task uploads directory
-        files = [p.name for p in uploads_dir.iterdir() if p.is_file() and p.suffix.lower() in [".jpg",".jpeg",".png",".tif",".tiff",".bmp"]]
+        files = _list_files(uploads_dir, IMAGE_SUFFIXES)
     if not files:
         raise HTTPException(400, "No image files found in task uploads. Upload photos first.")
 
-    all_lines = []
+    paths = []
     for name in files:
         path = uploads_dir / name
         if not path.exists():
             raise HTTPException(400, f"Missing file: {name}")
-        lines = ocr_image_to_lines(path)
-        all_lines.extend(lines)
+        paths.append(path)
+    all_lines = ocr_images_to_lines(paths)
 
     panel_specs = extract_panel_specs(all_lines)
     
@@ -1484,7 +1617,6 @@ def panel_ocr_to_excel(payload: dict):
         template_path = find_template(uploads_dir, "")
 
     # Build Excel with template or basic format
-    OUT.mkdir(parents=True, exist_ok=True)
     name = _short_filename('panel_schedule', 'xlsx', session)
     output_path = OUT / name
     
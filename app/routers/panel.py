@@ -6,6 +6,7 @@ from pydantic import BaseModel, Field, ValidationError
 from pathlib import Path
 import tempfile, shutil, zipfile, os
 import logging
+import anyio
 
 logger = logging.getLogger(__name__)
 
@@ -143,7 +144,8 @@ def export_zip(
                 from docx.enum.text import WD_ALIGN_PARAGRAPH
                 import json
                 
-                review_data = run_gpt_preflight(ir)
+                # This sync route runs in a worker thread; run the async review on the server loop
+                review_data = anyio.from_thread.run(run_gpt_preflight, ir)
                 
                 # Save JSON and TXT to backend directory (not visible to user in outputs)
                 from app.main import get_task_directories
@@ -1,7 +1,11 @@
 
 # app/schemas/standards.py
-from pydantic import BaseModel
-from typing import Dict, Optional
+import logging
+from pathlib import Path
+from pydantic import BaseModel, ValidationError
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
 
 class StandardsConfig(BaseModel):
     # Optional symbol library mapping (tag type -> DXF file path)
@@ -28,4 +32,38 @@ class StandardsConfig(BaseModel):
     dim_style: Optional[str] = "Standard"
 
     # Optional: Titleblock DXF file (relative path under /standards or absolute)
-    titleblock: Optional[str] = None
\ No newline at end of file
+    titleblock: Optional[str] = None
+
+
+# cfg_path -> (st_mtime_ns, parsed config). Generators only read the config, so one
+# parsed instance is shared until the file changes on disk.
+_STANDARDS_CACHE: Dict[Path, Tuple[int, StandardsConfig]] = {}
+
+def load_standards_file(cfg_path: Path, use_defaults: bool = True) -> Optional[StandardsConfig]:
+    """
+    Parse a standards JSON file, reusing the last result while its mtime is unchanged.
+    Falls back to defaults (logged, not cached) if the file is missing or invalid,
+    or returns None in that case when use_defaults is False.
+    Treat the returned config as read-only.
+    """
+    try:
+        mtime = cfg_path.stat().st_mtime_ns
+    except OSError:
+        return StandardsConfig() if use_defaults else None
+    cached = _STANDARDS_CACHE.get(cfg_path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    try:
+        # Parsed and validated in one pass by pydantic-core, straight from the raw bytes
+        cfg = StandardsConfig.model_validate_json(cfg_path.read_bytes())
+    except ValidationError as e:
+        if any(err["type"] == "json_invalid" for err in e.errors()):
+            logger.warning(f"Standards file is not valid JSON: {cfg_path}. Error: {e}. Using defaults.")
+        else:
+            logger.warning(f"Standards file does not match expected schema: {cfg_path}. Error: {e}. Using defaults.")
+        return StandardsConfig() if use_defaults else None
+    except Exception as e:
+        logger.error(f"Unexpected error loading standards from {cfg_path}: {e}. Using defaults.")
+        return StandardsConfig() if use_defaults else None
+    _STANDARDS_CACHE[cfg_path] = (mtime, cfg)
+    return cfg
@@ -1,6 +1,8 @@
 
 from pathlib import Path
-from typing import List, Tuple, Dict, Optional
+from typing import List, Tuple, Dict, Optional, Sequence
+from concurrent.futures import ThreadPoolExecutor
+import os
 import re
 import logging
 import pytesseract
@@ -9,6 +11,15 @@ import io
 
 logger = logging.getLogger(__name__)
 
+# Images are OCR'd in parallel, one tesseract process per image, so each process runs
+# single-threaded rather than spreading OpenMP threads over every core (the tesseract
+# docs' advice for parallel runs). Subprocesses inherit it; an explicit setting wins.
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+# One pool for every caller, so concurrent requests share a core-sized budget of
+# tesseract processes instead of each starting its own.
+_OCR_POOL = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="ocr")
+
 def ocr_image_to_lines(image_path: Path, use_preprocessing: bool = True, save_debug: bool = False) -> List[str]:
     """
     Extract text lines from an image using Tesseract OCR.
@@ -45,6 +56,18 @@ def ocr_image_to_lines(image_path: Path, use_preprocessing: bool = True, save_de
         logger.error(f"Error during OCR processing of {image_path}: {e.__class__.__name__}: {e}")
         raise
 
+def ocr_images_to_lines(image_paths: Sequence[Path]) -> List[str]:
+    """
+    OCR several images concurrently and return their lines concatenated in input order.
+
+    Preprocessing (OpenCV) and the tesseract subprocess both run outside the GIL,
+    so a multi-image upload costs roughly one image's wall time per core. Work goes
+    through the shared _OCR_POOL, which caps tesseract processes across all requests.
+    """
+    if len(image_paths) <= 1:
+        return [ln for path in image_paths for ln in ocr_image_to_lines(path)]
+    return [ln for lines in _OCR_POOL.map(ocr_image_to_lines, image_paths) for ln in lines]
+
 # Enhanced regex to capture all circuit parameters
 # Matches patterns like: "1 - Lighting - 2.5kVA - 20A 1P" or "2  Receptacles  1.8  15A  1P"
 CIRCUIT_RE = re.compile(
@@ -9,7 +9,7 @@ import logging
 
 from app.schemas.panel_ir import PanelScheduleIR, HeaderBlock, CircuitRecord, NameValuePair, LEFT_LABELS, RIGHT_LABELS
 from app.skills.ocr_enhanced import OCRExtractionResult, extract_panel_specs_enhanced, parse_circuits_with_confidence
-from app.skills.ocr_panel import ocr_image_to_lines
+from app.skills.ocr_panel import ocr_images_to_lines
 
 logger = logging.getLogger(__name__)
 
@@ -35,10 +35,7 @@ def ocr_to_ir(
     """
     
     # Step 1: OCR all images
-    all_lines = []
-    for img_path in image_paths:
-        lines = ocr_image_to_lines(img_path)
-        all_lines.extend(lines)
+    all_lines = ocr_images_to_lines(image_paths)
     
     logger.info(f"OCR extracted {len(all_lines)} total lines from {len(image_paths)} images")
     
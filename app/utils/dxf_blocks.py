@@ -3,8 +3,9 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Dict, Optional, Tuple
 import logging
+import threading
 
 import ezdxf
 from ezdxf.addons import Importer
@@ -20,6 +21,23 @@ def _as_path(path_like: str | Path) -> Path:
     return p.expanduser().resolve() if not p.is_absolute() else p
 
 
+# Parsed source DXFs (titleblocks, symbols) keyed by path -> (st_mtime_ns, Drawing).
+# Importer only reads from the source document, so one parse serves every generation
+# until the file changes; the lock keeps concurrent imports from sharing it mid-read.
+_SOURCE_DOCS: Dict[Path, Tuple[int, Drawing]] = {}
+_SOURCE_LOCK = threading.Lock()
+
+
+def _read_source_doc(src_path: Path) -> Drawing:
+    mtime = src_path.stat().st_mtime_ns
+    cached = _SOURCE_DOCS.get(src_path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    src_doc = ezdxf.readfile(str(src_path))
+    _SOURCE_DOCS[src_path] = (mtime, src_doc)
+    return src_doc
+
+
 def import_dxf_as_block(
     target_doc: Drawing,
     dxf_path: str | Path,
@@ -43,17 +61,19 @@ def import_dxf_as_block(
         if block_name and block_name in target_doc.blocks:
             return block_name
 
-        src_doc: Drawing = ezdxf.readfile(str(src_path))
-
-        # Import all BLOCK definitions into the target.
-        imp = Importer(src_doc, target_doc)
-        names = list(src_doc.blocks.names())
-        if names:
-            imp.import_blocks(names)
-            imp.finalize()
-        else:
-            # No block definitions present in source DXF
-            return None
+        with _SOURCE_LOCK:
+            src_doc = _read_source_doc(src_path)
+
+            # Import all BLOCK definitions into the target.
+            imp = Importer(src_doc, target_doc)
+            # BlocksSection has no names(); skip the *Model_Space/*Paper_Space layout blocks
+            names = [blk.name for blk in src_doc.blocks if not blk.name.startswith("*")]
+            if names:
+                imp.import_blocks(names)
+                imp.finalize()
+            else:
+                # No block definitions present in source DXF
+                return None
 
         # Decide which name to return/prioritize
         if block_name and block_name in target_doc.blocks:
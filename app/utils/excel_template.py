@@ -7,6 +7,8 @@ from openpyxl.worksheet.worksheet import Worksheet
 from openpyxl.styles import Font, Fill, Alignment, Border
 from copy import copy
 
+from app.utils.ttl_cache import TTLCache
+
 logger = logging.getLogger(__name__)
 
 
@@ -53,15 +55,31 @@ def find_template(bucket_dir: Path, session_prefix: str = "") -> Optional[Path]:
     return None
 
 
+# template path -> (st_mtime_ns, extracted parameters). Mostly pays off for the default
+# template, which every new task starts from; bounded because uploaded templates live in
+# per-task folders that come and go.
+_PARAMETERS_CACHE = TTLCache(maxsize=32)
+
+
 def extract_template_parameters(template_path: Path) -> Dict[str, str]:
     """
     Extract parameter names and default values from template.
     Reads labels from A2-A9 (left side) and N2-N9 (right side).
     Reads default values from B2-B9 (left values) and O2-O9 (right values).
+    Results are cached per file version; callers get their own copy.
     
     Returns:
         Dict mapping parameter names to their default values (empty string if no default)
     """
+    try:
+        mtime = template_path.stat().st_mtime_ns
+    except OSError as e:
+        logger.error(f"Failed to extract parameters from template: {e}")
+        return {}
+    cached = _PARAMETERS_CACHE.get(template_path)
+    if cached is not None and cached[0] == mtime:
+        return dict(cached[1])
+    
     try:
         wb = openpyxl.load_workbook(template_path)
         ws = wb.active
@@ -89,7 +107,8 @@ def extract_template_parameters(template_path: Path) -> Dict[str, str]:
                     parameters[param_name] = default_value
         
         logger.info(f"Extracted {len(parameters)} parameters with defaults from template")
-        return parameters
+        _PARAMETERS_CACHE.put(template_path, (mtime, parameters))
+        return dict(parameters)
         
     except Exception as e:
         logger.error(f"Failed to extract parameters from template: {e}")
@@ -0,0 +1,44 @@
+# app/utils/fastjson.py
+# JSON encoding/decoding on hot paths (LLM responses, task state): orjson when
+# installed, stdlib json otherwise.
+from __future__ import annotations
+
+import json
+from typing import Any
+
+try:
+    import orjson
+
+    # orjson.JSONDecodeError subclasses json.JSONDecodeError, so either can be caught
+    JSONDecodeError = orjson.JSONDecodeError
+
+    def loads(s: str | bytes) -> Any:
+        return orjson.loads(s)
+
+    def dumps(obj: Any) -> str:
+        try:
+            # Non-str keys are stringified like json.dumps does
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+        except TypeError:
+            # Values orjson refuses (e.g. ints beyond 64 bits) still serialize as before
+            return json.dumps(obj)
+
+    def dumps_pretty(obj: Any) -> bytes:
+        """UTF-8 JSON indented by two spaces, for small config files on disk."""
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            return json.dumps(obj, indent=2).encode("utf-8")
+
+except ImportError:
+    JSONDecodeError = json.JSONDecodeError
+
+    def loads(s: str | bytes) -> Any:
+        return json.loads(s)
+
+    def dumps(obj: Any) -> str:
+        return json.dumps(obj)
+
+    def dumps_pretty(obj: Any) -> bytes:
+        """UTF-8 JSON indented by two spaces, for small config files on disk."""
+        return json.dumps(obj, indent=2).encode("utf-8")
@@ -0,0 +1,49 @@
+# app/utils/ttl_cache.py
+# Small thread-safe LRU cache with optional per-entry expiry, used for LLM results
+# and hot task-state lookups.
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+
+class TTLCache:
+    """
+    Small thread-safe LRU cache. Entries optionally expire after ttl_s seconds.
+    """
+
+    def __init__(self, maxsize: int, ttl_s: Optional[float] = None):
+        self._maxsize = maxsize
+        self._ttl_s = ttl_s
+        self._data: "OrderedDict[Any, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key: Any, value: Any) -> None:
+        expires_at = time.monotonic() + self._ttl_s if self._ttl_s is not None else float("inf")
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            if len(self._data) > self._maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Any) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
@@ -0,0 +1,34 @@
+"""
+Tests for the in-memory task store in app.db.
+"""
+from app.db import _LRUStore
+
+
+def test_memory_store_evicts_oldest_finished_sessions_only():
+    store = _LRUStore(maxsize=2)
+    store["a"] = {"status": "active"}
+    store["b"] = {"status": "completed"}
+    store["c"] = {"status": "completed"}
+    # "a" is oldest but active, so the finished "b" goes instead
+    assert store.get("a") is not None
+    assert store.get("b") is None
+
+    store.get("c")  # refresh "c"
+    store["d"] = {"status": "active"}
+    assert store.get("c") is None
+    assert [t["status"] for t in store.values()] == ["active", "active"]
+
+    # Nothing finished left to evict: active tasks are kept past maxsize
+    store["e"] = {"status": "active"}
+    assert len(store.values()) == 3
+
+
+def test_active_task_with_bad_parameters_json_is_none(monkeypatch):
+    from app import db
+    monkeypatch.setattr(db, "DATABASE_ENABLED", True)
+    monkeypatch.setattr(db, "SessionLocal", object())
+    db._TASK_CACHE.put("s1", ("one_line", "{not json", "2026-01-01T00:00:00"))
+    try:
+        assert db.get_active_task("s1") is None
+    finally:
+        db._TASK_CACHE.pop("s1")
@@ -0,0 +1,28 @@
+"""
+Tests for importing symbol/titleblock blocks from external DXF files.
+"""
+import ezdxf
+
+from app.utils import dxf_blocks
+
+
+def test_source_dxf_is_parsed_once_across_documents(monkeypatch, tmp_path):
+    src = ezdxf.new()
+    src.blocks.new(name="REC").add_circle((0, 0), radius=0.1)
+    src_path = tmp_path / "REC.dxf"
+    src.saveas(src_path)
+
+    reads = []
+    real_readfile = ezdxf.readfile
+
+    def counting_readfile(path, *args, **kwargs):
+        reads.append(path)
+        return real_readfile(path, *args, **kwargs)
+
+    monkeypatch.setattr(dxf_blocks.ezdxf, "readfile", counting_readfile)
+
+    for _ in range(3):
+        doc = ezdxf.new()
+        assert dxf_blocks.import_dxf_as_block(doc, src_path, "REC") == "REC"
+        assert dxf_blocks.insert_block(doc.modelspace(), "REC", insert=(1, 1))
+    assert len(reads) == 1
@@ -0,0 +1,35 @@
+"""
+Tests for template parameter extraction in app.utils.excel_template.
+"""
+import os
+import shutil
+from pathlib import Path
+
+from openpyxl import load_workbook
+
+from app.utils import excel_template
+
+DEFAULT_TEMPLATE = Path(__file__).parents[1] / "templates" / "default_panelboard_template.xlsx"
+
+
+def test_template_parameters_are_cached_per_file_version(tmp_path, monkeypatch):
+    tpl = tmp_path / "panel_template.xlsx"
+    shutil.copy(DEFAULT_TEMPLATE, tpl)
+
+    loads = []
+    real_load = excel_template.openpyxl.load_workbook
+    monkeypatch.setattr(excel_template.openpyxl, "load_workbook", lambda p: loads.append(p) or real_load(p))
+
+    first = excel_template.extract_template_parameters(tpl)
+    first["MUTATED"] = "x"
+    second = excel_template.extract_template_parameters(tpl)
+    assert "MUTATED" not in second
+    assert len(loads) == 1
+
+    # Editing the template is picked up on the next call
+    wb = load_workbook(tpl)
+    wb.active["A2"] = "SYSTEM VOLTAGE"
+    wb.save(tpl)
+    os.utime(tpl, ns=(0, 10**9))  # distinct mtime even on coarse-grained filesystems
+    assert "SYSTEM VOLTAGE" in excel_template.extract_template_parameters(tpl)
+    assert len(loads) == 2
@@ -0,0 +1,80 @@
+"""
+Tests for the Batch API planner in app.ai.llm_batch, using an in-memory fake client.
+"""
+import json
+from types import SimpleNamespace
+
+from app.ai import llm, llm_batch
+
+
+class FakeBatchClient:
+    def __init__(self):
+        self.uploads = []
+        self.batches_created = 0
+        self.files = SimpleNamespace(create=self._upload, content=self._content)
+        self.batches = SimpleNamespace(create=self._create, retrieve=self._retrieve)
+
+    def _upload(self, file, purpose):
+        self.uploads.append([json.loads(line) for line in file[1].decode().splitlines()])
+        return SimpleNamespace(id="file-in")
+
+    def _create(self, input_file_id, endpoint, completion_window):
+        self.batches_created += 1
+        return SimpleNamespace(id="batch-1")
+
+    def _retrieve(self, batch_id):
+        return SimpleNamespace(status="completed", output_file_id="file-out", error_file_id=None)
+
+    def _content(self, file_id):
+        rows = []
+        for req in self.uploads[-1]:
+            command = req["body"]["messages"][1]["content"]
+            project = "BAD" if "broken" in command else "P1"
+            content = "not json" if project == "BAD" else json.dumps({"task": "one_line", "project": project})
+            rows.append({
+                "custom_id": req["custom_id"],
+                "response": {"status_code": 200, "body": {"choices": [{"message": {"content": content}}]}},
+            })
+        return SimpleNamespace(content="\n".join(json.dumps(r) for r in rows).encode())
+
+
+def test_plan_batch_returns_plans_in_order_and_resumes(monkeypatch, tmp_path):
+    fake = FakeBatchClient()
+    monkeypatch.setattr(llm, "_get_client", lambda: fake)
+    checkpoint = tmp_path / "plans.jsonl"
+    bucket = tmp_path / "bucket"
+    bucket.mkdir()
+
+    plans = llm_batch.plan_from_prompt_batch(
+        ["one line for P1", "broken request"], str(bucket), checkpoint, poll_s=0
+    )
+    assert plans[0] == {"task": "one_line", "project": "P1"}
+    assert plans[1]["notes"].startswith("Keyword-based fallback")   # bad reply
+    assert fake.batches_created == 1
+    assert len(fake.uploads[0]) == 2
+
+    # Re-running with the same inputs serves the good plan from the checkpoint and
+    # only retries the failed request
+    again = llm_batch.plan_from_prompt_batch(
+        ["one line for P1", "broken request"], str(bucket), checkpoint, poll_s=0
+    )
+    assert again == plans
+    assert fake.batches_created == 2
+    assert len(fake.uploads[1]) == 1
+    assert "broken request" in fake.uploads[1][0]["body"]["messages"][1]["content"]
+
+
+def test_plan_batch_rerun_with_new_inputs_submits_new_batch(monkeypatch, tmp_path):
+    fake = FakeBatchClient()
+    monkeypatch.setattr(llm, "_get_client", lambda: fake)
+    checkpoint = tmp_path / "plans.jsonl"
+    bucket = tmp_path / "bucket"
+    bucket.mkdir()
+
+    llm_batch.plan_from_prompt_batch(["one line for P1"], str(bucket), checkpoint, poll_s=0)
+    plans = llm_batch.plan_from_prompt_batch(
+        ["one line for P1", "power plan for P2"], str(bucket), checkpoint, poll_s=0
+    )
+    assert plans == [{"task": "one_line", "project": "P1"}] * 2
+    assert fake.batches_created == 2
+    assert len(fake.uploads[1]) == 1
@@ -146,6 +146,18 @@ def test_preprocessing_feature_flags():
     print("✓ Feature flag testing successful")
 
 
+def test_multi_image_ocr_keeps_input_order():
+    """Test that concurrent OCR of several images returns lines in upload order"""
+    from unittest import mock
+    from app.skills import ocr_panel
+
+    fake = lambda path: [f"{path.stem} line 1", f"{path.stem} line 2"]
+    with mock.patch.object(ocr_panel, "ocr_image_to_lines", side_effect=fake):
+        lines = ocr_panel.ocr_images_to_lines([Path("a.png"), Path("b.png"), Path("c.png")])
+
+    assert lines == ["a line 1", "a line 2", "b line 1", "b line 2", "c line 1", "c line 2"]
+
+
 if __name__ == "__main__":
     print("="*80)
     print("OCR IMPROVEMENTS TEST SUITE")
@@ -158,6 +170,7 @@ if __name__ == "__main__":
         ("AI Circuit Extraction", test_ai_circuit_extraction),
         ("Tesseract Configuration", test_tesseract_config),
         ("Preprocessing Feature Flags", test_preprocessing_feature_flags),
+        ("Multi-Image OCR Order", test_multi_image_ocr_keeps_input_order),
     ]
     
     passed = 0
@@ -0,0 +1,102 @@
+"""
+Tests for the warm LibreOffice converter in app.export.office_pool, with the `uno`
+bindings and the soffice process replaced by fakes.
+"""
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from app.export import office_pool
+
+
+class FakeProc:
+    def __init__(self, args, **kwargs):
+        self.args = args
+        self.killed = False
+
+    def poll(self):
+        return 0 if self.killed else None
+
+    def kill(self):
+        self.killed = True
+
+    terminate = kill
+
+    def wait(self, timeout=None):
+        return 0
+
+
+class FakeDoc:
+    def __init__(self, release):
+        self.release = release
+        self.stored = []
+
+    def storeToURL(self, url, props):
+        # A hung conversion blocks until the office is killed, then the bridge errors out
+        if not self.release.wait(timeout=5):
+            raise RuntimeError("bridge never dropped")
+        if office_pool._PROC.killed:
+            raise RuntimeError("DisposedException")
+        self.stored.append((url, props[0].Value))
+
+    def close(self, deliver):
+        pass
+
+
+@pytest.fixture
+def fake_office(monkeypatch, tmp_path):
+    procs, release = [], threading.Event()
+    doc = FakeDoc(release)
+    desktop = SimpleNamespace(loadComponentFromURL=lambda url, frame, flags, props: doc)
+    ctx = SimpleNamespace(ServiceManager=SimpleNamespace(createInstanceWithContext=lambda name, c: desktop))
+    resolver = SimpleNamespace(resolve=lambda url: ctx)
+    local_ctx = SimpleNamespace(ServiceManager=SimpleNamespace(createInstanceWithContext=lambda name, c: resolver))
+    fake_uno = SimpleNamespace(getComponentContext=lambda: local_ctx, systemPathToFileUrl=lambda p: "file://" + p)
+
+    def popen(args, **kwargs):
+        procs.append(FakeProc(args))
+        return procs[-1]
+
+    monkeypatch.setattr(office_pool, "uno", fake_uno)
+    monkeypatch.setattr(office_pool, "PropertyValue", lambda: SimpleNamespace(), raising=False)
+    monkeypatch.setattr(office_pool.subprocess, "Popen", popen)
+    monkeypatch.setattr(office_pool, "_listening", lambda: True)
+    monkeypatch.setattr(office_pool, "_SOFFICE", "soffice")
+    monkeypatch.setattr(office_pool, "_PROC", None)
+    monkeypatch.setattr(office_pool, "_DESKTOP", None)
+    monkeypatch.setattr(office_pool, "_PROFILE", tmp_path / "profile")
+    return SimpleNamespace(procs=procs, release=release, doc=doc)
+
+
+def test_convert_uses_own_profile_and_port(fake_office, tmp_path):
+    fake_office.release.set()
+    out = office_pool.convert_to_pdf(tmp_path / "in.xlsx", tmp_path / "out.pdf")
+    assert out == tmp_path / "out.pdf"
+    assert fake_office.doc.stored == [("file://" + str(out.resolve()), "calc_pdf_Export")]
+
+    args = fake_office.procs[0].args
+    assert f"-env:UserInstallation={(tmp_path / 'profile').as_uri()}" in args
+    assert any(a.startswith("--accept=socket,") and f"port={office_pool._PORT};" in a for a in args)
+
+    # The office stays up for the next conversion
+    office_pool.convert_to_pdf(tmp_path / "in.xlsx", tmp_path / "out.pdf")
+    assert len(fake_office.procs) == 1
+
+
+def test_hung_conversion_times_out_and_restarts_office(fake_office, monkeypatch, tmp_path):
+    # Killing the office is what unblocks the hung UNO call
+    kill = office_pool._kill_office
+
+    def kill_and_release():
+        kill()
+        fake_office.release.set()
+
+    monkeypatch.setattr(office_pool, "_kill_office", kill_and_release)
+    with pytest.raises(TimeoutError):
+        office_pool.convert_to_pdf(tmp_path / "in.xlsx", tmp_path / "out.pdf", timeout_s=0.1)
+    assert fake_office.procs[0].killed
+    assert not office_pool._LOCK.locked()
+
+    office_pool.convert_to_pdf(tmp_path / "in.xlsx", tmp_path / "out.pdf")
+    assert len(fake_office.procs) == 2
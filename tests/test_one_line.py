@@ -0,0 +1,14 @@
+"""
+Tests for the one-line DXF generator in app.cad.one_line.
+"""
+from app.cad.one_line import _chain_segments
+
+
+def test_chain_segments_joins_shared_endpoints():
+    """Segments meeting at a free end are chained; an interior meeting point starts a new chain"""
+    tap = (2.6, 4.0)
+    fan = [(tap, (4.6, 3.75)), (tap, (4.6, 2.55)), (tap, (4.6, 1.35))]
+    assert _chain_segments(fan) == [[(4.6, 2.55), tap, (4.6, 3.75)], [tap, (4.6, 1.35)]]
+
+    run = [((0, 0), (1, 0)), ((1, 0), (1, 1)), ((5, 5), (6, 6)), ((2, 1), (1, 1))]
+    assert _chain_segments(run) == [[(0, 0), (1, 0), (1, 1), (2, 1)], [(5, 5), (6, 6)]]
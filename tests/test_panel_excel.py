@@ -0,0 +1,38 @@
+"""
+Tests for template handling in app.io.panel_excel.
+"""
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+from openpyxl import load_workbook
+
+from app.io import panel_excel
+
+TEMPLATE_XLSX = Path(__file__).parents[1] / "templates" / "panelboard_template.xlsx"
+
+
+def test_template_is_validated_once_per_file_version(tmp_path, monkeypatch):
+    tpl = tmp_path / "tpl.xlsx"
+    shutil.copy(TEMPLATE_XLSX, tpl)
+
+    checks = []
+    real_assert = panel_excel._assert_template
+    monkeypatch.setattr(panel_excel, "_assert_template", lambda ws: checks.append(ws) or real_assert(ws))
+
+    first = panel_excel._load_template(tpl)
+    second = panel_excel._load_template(tpl)
+    assert first is not second  # every export fills its own workbook
+    assert len(checks) == 1
+
+    # A template that no longer matches the sentinels is rejected, not cached
+    wb = load_workbook(tpl)
+    wb.active["A2"] = "NOT VOLTAGE"
+    wb.save(tpl)
+    os.utime(tpl, ns=(0, 10**9))  # distinct mtime even on coarse-grained filesystems
+    with pytest.raises(ValueError):
+        panel_excel._load_template(tpl)
+    with pytest.raises(ValueError):
+        panel_excel._load_template(tpl)
+    assert len(checks) == 3
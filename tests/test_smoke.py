@@ -37,4 +37,27 @@ def test_pdf_export_if_dxf_exists():
     # Either we succeed (200) or, if something changed, surface a clear error
     assert r.status_code == 200, r.text
     pdf_name = Path(dxf).with_suffix(".pdf").name
-    assert (OUT / pdf_name).exists()
\ No newline at end of file
+    assert (OUT / pdf_name).exists()
+def test_broken_cad_pool_is_replaced(monkeypatch):
+    from concurrent.futures import Future
+    from concurrent.futures.process import BrokenProcessPool
+    import app.main as main
+
+    class FakePool:
+        def __init__(self, broken):
+            self.broken = broken
+        def submit(self, fn, *args):
+            f = Future()
+            if self.broken:
+                f.set_exception(BrokenProcessPool("worker died"))
+            else:
+                f.set_result(fn(*args))
+            return f
+        def shutdown(self, wait=True, cancel_futures=False):
+            pass
+
+    broken, fresh = FakePool(True), FakePool(False)
+    monkeypatch.setattr(main, "_CAD_POOL", broken)
+    monkeypatch.setattr(main, "_new_cad_pool", lambda: fresh)
+    assert main._run_cad(sum, [1, 2]) == 3
+    assert main._CAD_POOL is fresh
@@ -0,0 +1,33 @@
+"""
+Tests for the mtime-cached standards loader used by the CAD generators.
+"""
+import json
+import os
+
+from app.schemas.standards import StandardsConfig, load_standards_file
+
+
+def test_standards_file_is_reparsed_only_when_it_changes(tmp_path):
+    cfg_path = tmp_path / "active.json"
+    cfg_path.write_text(json.dumps({"layers": {"annotations": "A-TEXT"}}))
+
+    first = load_standards_file(cfg_path)
+    assert first.layers == {"annotations": "A-TEXT"}
+    assert load_standards_file(cfg_path) is first
+
+    cfg_path.write_text(json.dumps({"layers": {"annotations": "B-TEXT"}}))
+    os.utime(cfg_path, ns=(0, 10**9))  # distinct mtime even on coarse-grained filesystems
+    assert load_standards_file(cfg_path).layers == {"annotations": "B-TEXT"}
+
+
+def test_missing_or_invalid_standards_fall_back_to_defaults(tmp_path):
+    assert load_standards_file(tmp_path / "missing.json") == StandardsConfig()
+    bad = tmp_path / "bad.json"
+    bad.write_text("{not json")
+    assert load_standards_file(bad) == StandardsConfig()
+    wrong = tmp_path / "wrong.json"
+    wrong.write_text(json.dumps({"layers": ["E-ANNO-TEXT"]}))
+    assert load_standards_file(wrong) == StandardsConfig()
+    # Callers that handle the fallback themselves can ask for None instead
+    assert load_standards_file(tmp_path / "missing.json", use_defaults=False) is None
+    assert load_standards_file(bad, use_defaults=False) is None
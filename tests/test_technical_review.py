@@ -108,3 +108,87 @@ def test_checklist_has_minimum_required_items():
         assert len(item) > 20, "Each checklist item should be descriptive"
     
     print(f"\n✓ Checklist has {len(checklist)} technical review items")
+
+
+def test_batch_review_demultiplexes_by_index():
+    """Batched AI review results are mapped back to panels by their [index] marker"""
+    from app.ai.gpt_preflight import _split_batch_results
+    
+    content = (
+        '{"results": ['
+        '{"index": 2, "ok_to_build": true, "summary": "second"},'
+        '{"index": 1, "ok_to_build": false, "warnings": ["MCB exceeds bus"]}'
+        ']}'
+    )
+    reviews = _split_batch_results(content, 3)
+    
+    assert [r["summary"] for r in reviews[:2]] == ["", "second"]
+    assert reviews[0]["warnings"] == ["MCB exceeds bus"]
+    assert reviews[1]["ok_to_build"] is True
+    # Panel 3 was missing from the response: it gets a failing placeholder review
+    assert reviews[2]["ok_to_build"] is False
+    assert reviews[2]["warnings"]
+    # Guardrail fields are always present
+    for r in reviews:
+        assert "index" not in r
+        assert {"items", "warnings", "recommendations", "system_analysis", "summary", "ok_to_build"} <= set(r)
+    
+    # Non-JSON responses degrade to placeholders rather than raising
+    assert all(r["ok_to_build"] is False for r in _split_batch_results("not json", 2))
+
+
+def _fake_review_client(responses, calls):
+    """AsyncOpenAI stand-in returning (content, finish_reason) pairs in order"""
+    from types import SimpleNamespace
+
+    async def create(**kwargs):
+        calls.append(kwargs)
+        content, finish_reason = responses.pop(0)
+        msg = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=msg, finish_reason=finish_reason)])
+
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+
+def test_truncated_review_is_reported_not_parsed(monkeypatch):
+    """A review cut off at the output limit says so instead of 'non-JSON'; batches fall back to single reviews"""
+    import asyncio
+    from app.ai import gpt_preflight
+    # Prompt content is irrelevant here; any object stands in for the IR
+    ir = object()
+    monkeypatch.setattr(gpt_preflight, "build_checklist", lambda ir: ["Check MCB"])
+    monkeypatch.setattr(gpt_preflight, "summarize_for_gpt", lambda ir: "PANEL")
+    calls = []
+    responses = [('{"items": [{"check": "MCB', "length")]
+    monkeypatch.setattr(gpt_preflight, "_get_client", lambda: _fake_review_client(responses, calls))
+
+    review = asyncio.run(gpt_preflight.run_gpt_preflight(ir))
+    assert review["ok_to_build"] is False
+    assert "truncated" in review["warnings"][0]
+    assert "max_tokens" not in calls[0]
+
+    responses += [('{"results": [{"index": 1', "length"), ('{"summary": "one"}', "stop"), ('{"summary": "two"}', "stop")]
+    reviews = asyncio.run(gpt_preflight.run_gpt_preflight_batch([ir, ir]))
+    assert [r["summary"] for r in reviews] == ["one", "two"]
+    assert len(calls) == 4
+
+
+def test_single_review_prompt_is_unchanged(monkeypatch):
+    """The single-panel prompt keeps its original text: indented body, checklist items joined with '- '"""
+    import asyncio
+    from app.ai import gpt_preflight
+    monkeypatch.setattr(gpt_preflight, "build_checklist", lambda ir: ["Check A.", "Check B."])
+    monkeypatch.setattr(gpt_preflight, "summarize_for_gpt", lambda ir: "PANEL")
+    calls = []
+    monkeypatch.setattr(gpt_preflight, "_get_client", lambda: _fake_review_client([("{}", "stop")], calls))
+
+    asyncio.run(gpt_preflight.run_gpt_preflight(object()))
+    user = calls[0]["messages"][1]["content"]
+    assert user.startswith(
+        "Perform a comprehensive ELECTRICAL ENGINEERING REVIEW of this panel schedule.\n"
+        "      Focus on technical correctness, safety, and code compliance.\n\n"
+        "      ### PANEL DATA\n      PANEL\n\n"
+        "      ### TECHNICAL REVIEW CHECKLIST\n      - \nCheck A.- Check B.\n\n"
+        "      ### OUTPUT FORMAT (strict JSON):\n      {\n        \"items\": ["
+    )
+    assert user.endswith("      IMPORTANT: Set ok_to_build=false if ANY critical electrical safety issues exist.")
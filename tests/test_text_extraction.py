@@ -0,0 +1,279 @@
+"""
+Tests for the regex-based voice/text extractors in app.ai.llm.
+These run without an OpenAI key and pin down the conversational parsing rules.
+"""
+from app.ai.llm import (
+    extract_panel_specs_from_text,
+    extract_circuit_from_text,
+    _keyword_based_fallback,
+)
+
+
+def test_panel_specs_full_sentence():
+    """All header fields are extracted from a single sentence"""
+    specs = extract_panel_specs_from_text(
+        "480/277V 3 phase 4 wire, main bus amps 400, MLO, surface mount, "
+        "fed from MDP located in room 101"
+    )
+    assert specs == {
+        'voltage': '480/277V',
+        'phase': '3',
+        'wire': '4',
+        'main_bus_amps': '400',
+        'main_breaker': 'MLO',
+        'mounting': 'SURFACE',
+        'feed': 'MDP located in room 101',
+        'location': 'Room 101',
+    }
+
+
+def test_panel_specs_word_forms_and_case():
+    """Spelled-out phase values and mixed case are normalized"""
+    specs = extract_panel_specs_from_text(
+        "Three phase, wire is 4, bus amps: 225A, mcb 200A, flush mounted, location: Electrical Room 2"
+    )
+    assert specs == {
+        'phase': '3',
+        'wire': '4',
+        'main_bus_amps': '225',
+        'main_breaker': '200A',
+        'mounting': 'FLUSH',
+        'location': 'Electrical Room 2',
+    }
+
+    specs = extract_panel_specs_from_text("the voltage is 208 volts, single phase 3W, main breaker 100AF/70AT")
+    assert specs == {'voltage': '208V', 'phase': '1', 'wire': '3', 'main_breaker': '100AF/70AT'}
+
+
+def test_panel_specs_mlo_takes_priority_over_breaker():
+    """MLO wins even when a breaker rating is also mentioned"""
+    specs = extract_panel_specs_from_text("main breaker 225A, actually make it main lug only")
+    assert specs['main_breaker'] == 'MLO'
+
+
+def test_panel_specs_no_match():
+    assert extract_panel_specs_from_text("hello there") == {}
+
+
+def test_circuit_extraction():
+    """Circuit number, breaker, poles, load and description are parsed"""
+    data = extract_circuit_from_text("circuit 1 is a 20A/1P breaker and feeds and exhaust fan at 8A")
+    assert data == {
+        'circuit_numbers': '1',
+        'pole_spaces': [1],
+        'breaker_amps': 20,
+        'poles': 1,
+        'load_amps': 8.0,
+        'description': 'EXHAUST FAN',
+    }
+
+    data = extract_circuit_from_text(
+        "circuit 3,5 is a 30A/2P circuit that feeds a cold water pump in the basement and the full load is 18A"
+    )
+    assert data['pole_spaces'] == [3, 5]
+    assert data['poles'] == 2
+    assert data['breaker_amps'] == 30
+    assert data['load_amps'] == 18.0
+    assert data['description'] == 'COLD WATER PUMP IN THE BASEMENT'
+
+    data = extract_circuit_from_text("ckt 7 is lighting and draws 12.5 amps")
+    assert data == {'circuit_numbers': '7', 'pole_spaces': [7], 'load_amps': 12.5, 'description': 'LIGHTING'}
+
+    assert extract_circuit_from_text("no circuit here") == {}
+
+
+def test_extractors_accept_prelowered_text():
+    """Callers that already lowercased the text can pass it in; results are unchanged"""
+    text = "Circuit 9 is a 20A/1P breaker feeding a Rooftop Unit at 480V 3 phase"
+    assert extract_circuit_from_text(text, text.lower()) == extract_circuit_from_text(text)
+    assert extract_panel_specs_from_text(text, text.lower()) == extract_panel_specs_from_text(text)
+
+
+def test_keyword_fallback_plan():
+    """Fallback planner detects task, circuit count and panel name"""
+    plan = _keyword_based_fallback("create a panel schedule with 42 circuits, panel name is PP-TEST1", [])
+    assert plan["task"] == "panel_schedule"
+    assert plan["number_of_ckts"] == 42
+    assert plan["panel_name"] == "PP-TEST1"
+
+    plan = _keyword_based_fallback("lighting plan for panel called lp-2", [])
+    assert plan["task"] == "lighting_plan"
+    assert plan["panel_name"] == "LP-2"
+
+
+def test_summarize_intent_caches_llm_replies(monkeypatch):
+    """Identical prompts reuse the LLM confirmation; fallbacks are not cached"""
+    from types import SimpleNamespace
+    from app.ai import llm
+
+    calls = []
+
+    def fake_chat(**kwargs):
+        calls.append(kwargs)
+        if len(calls) == 1:
+            raise RuntimeError("LLM down")
+        msg = SimpleNamespace(content="Understood.")
+        return SimpleNamespace(choices=[SimpleNamespace(message=msg)])
+
+    llm._SUMMARY_CACHE.clear()
+    monkeypatch.setattr(llm, "_chat_with_retries", fake_chat)
+
+    assert llm._summarize_intent_llm("make a one line") == "Got it."      # fallback, not cached
+    assert llm._summarize_intent_llm("make a one line") == "Understood."
+    assert llm._summarize_intent_llm("make a one line") == "Understood."
+    assert len(calls) == 2
+    llm._SUMMARY_CACHE.clear()
+
+
+def test_circuit_llm_extraction_caches_parsed_replies(monkeypatch):
+    """Repeated utterances reuse the parsed extraction; failures are not cached"""
+    from types import SimpleNamespace
+    from app.ai import llm
+
+    replies = [RuntimeError("boom"), '{"circuit_numbers": "3,5", "pole_spaces": [3, 5]}']
+
+    def fake_chat(**kwargs):
+        reply = replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        msg = SimpleNamespace(content=reply)
+        return SimpleNamespace(choices=[SimpleNamespace(message=msg)])
+
+    llm._CIRCUIT_CACHE.clear()
+    monkeypatch.setattr(llm, "_HAS_KEY", True)
+    monkeypatch.setattr(llm, "_chat_with_retries", fake_chat)
+
+    assert llm.extract_circuit_from_text_llm("circuit 3,5 is a pump") == {}
+    first = llm.extract_circuit_from_text_llm("circuit 3,5 is a pump")
+    first["pole_spaces"].append(7)
+    assert llm.extract_circuit_from_text_llm("circuit 3,5 is a pump") == {
+        "circuit_numbers": "3,5", "pole_spaces": [3, 5]
+    }
+    assert replies == []
+    llm._CIRCUIT_CACHE.clear()
+
+
+def test_summarize_intent_is_local_by_default():
+    """The confirmation is answered locally unless AI_SUMMARY_USE_LLM opts in"""
+    from app.ai import llm
+
+    assert not llm.settings.AI_SUMMARY_USE_LLM
+    assert llm.summarize_intent is llm._summarize_intent_local
+    assert llm.summarize_intent("make a one line") == "Got it."
+
+
+def test_plan_from_prompt_caches_parsed_plans(monkeypatch, tmp_path):
+    """Identical text + bucket contents reuse the parsed plan; callers get independent copies"""
+    from types import SimpleNamespace
+    from openai import NOT_GIVEN
+    from app.ai import llm
+
+    calls = []
+
+    def fake_create(**kwargs):
+        calls.append(kwargs)
+        msg = SimpleNamespace(content='{"task": "one_line", "project": "P1", "loads": []}')
+        return SimpleNamespace(choices=[SimpleNamespace(message=msg)])
+
+    fake_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=fake_create)))
+    llm._PLAN_CACHE.clear()
+    monkeypatch.setattr(llm, "_get_client", lambda: fake_client)
+
+    first = llm._plan_from_prompt_llm("one line please", str(tmp_path))
+    first["loads"].append("mutated")
+    second = llm._plan_from_prompt_llm("one line please", str(tmp_path))
+    assert second == {"task": "one_line", "project": "P1", "loads": []}
+    assert len(calls) == 1
+    assert calls[0]["max_tokens"] is NOT_GIVEN   # plans are not capped
+
+    # A new file in the bucket changes the key
+    (tmp_path / "site.pdf").write_bytes(b"")
+    llm._plan_from_prompt_llm("one line please", str(tmp_path))
+    assert len(calls) == 2
+    llm._PLAN_CACHE.clear()
+
+
+def test_truncated_plan_is_reported_not_cached(monkeypatch, tmp_path):
+    """A plan cut off at the token limit falls back with a note saying so, and isn't cached"""
+    from types import SimpleNamespace
+    from app.ai import llm
+
+    def fake_create(**kwargs):
+        msg = SimpleNamespace(content='{"task": "power_plan", "rooms": [')
+        return SimpleNamespace(choices=[SimpleNamespace(message=msg, finish_reason="length")])
+
+    fake_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=fake_create)))
+    llm._PLAN_CACHE.clear()
+    monkeypatch.setattr(llm, "_get_client", lambda: fake_client)
+
+    plan = llm._plan_from_prompt_llm("power plan for the office", str(tmp_path))
+    assert "cut off at the output token limit" in plan["notes"]
+    assert llm._PLAN_CACHE.get(llm._plan_cache_key("power plan for the office", [])) is None
+
+
+def test_plan_from_prompt_retries_transient_errors(monkeypatch, tmp_path):
+    """A dropped connection is retried instead of going straight to the keyword fallback"""
+    from types import SimpleNamespace
+    import httpx
+    from openai import APIConnectionError
+    from app.ai import llm
+
+    calls = []
+
+    def fake_create(**kwargs):
+        calls.append(kwargs)
+        if len(calls) == 1:
+            raise APIConnectionError(request=httpx.Request("POST", "https://api.test"))
+        msg = SimpleNamespace(content='{"task": "power_plan", "project": "P2"}')
+        return SimpleNamespace(choices=[SimpleNamespace(message=msg)])
+
+    fake_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=fake_create)))
+    llm._PLAN_CACHE.clear()
+    monkeypatch.setattr(llm, "_get_client", lambda: fake_client)
+    monkeypatch.setattr(llm.time, "sleep", lambda s: None)
+
+    plan = llm._plan_from_prompt_llm("power plan please", str(tmp_path))
+    assert plan == {"task": "power_plan", "project": "P2"}
+    assert len(calls) == 2
+    assert calls[1]["temperature"] == 0
+    llm._PLAN_CACHE.clear()
+
+
+def test_list_bucket_refreshes_when_directory_changes(tmp_path):
+    import os
+    from app.ai import llm
+
+    (tmp_path / "a.txt").write_text("a")
+    (tmp_path / "sub").mkdir()
+    assert llm._list_bucket(str(tmp_path)) == ["a.txt"]
+    assert llm._list_bucket(str(tmp_path)) == ["a.txt"]
+
+    (tmp_path / "b.txt").write_text("b")
+    os.utime(tmp_path, ns=(0, 10**9))  # force a distinct mtime on coarse-grained filesystems
+    assert sorted(llm._list_bucket(str(tmp_path))) == ["a.txt", "b.txt"]
+    assert llm._list_bucket(str(tmp_path / "missing")) == []
+
+
+def test_plan_and_extract_circuit_prefers_regex(monkeypatch, tmp_path):
+    """The LLM circuit extractor only runs when the regex finds nothing"""
+    import asyncio
+    from app.ai import llm
+
+    llm_calls = []
+
+    async def fake_plan(user_text, bucket_dir):
+        return {"task": "panel_schedule", "project": "P1"}
+
+    async def fake_llm_extract(user_text):
+        llm_calls.append(user_text)
+        return {"circuit_numbers": "7"}
+
+    monkeypatch.setattr(llm, "plan_from_prompt_async", fake_plan)
+    monkeypatch.setattr(llm, "extract_circuit_from_text_llm_async", fake_llm_extract)
+
+    plan, circuit = asyncio.run(llm.plan_and_extract_circuit("circuit 1 is a 20A/1P breaker", str(tmp_path)))
+    assert plan["task"] == "panel_schedule"
+    assert circuit["pole_spaces"] == [1] and llm_calls == []
+
+    plan, circuit = asyncio.run(llm.plan_and_extract_circuit("the seventh one is a pump", str(tmp_path)))
+    assert circuit == {"circuit_numbers": "7"} and len(llm_calls) == 1
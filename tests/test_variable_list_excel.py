@@ -0,0 +1,30 @@
+"""
+Tests for the panel schedule variable list in app.io.variable_list_excel.
+"""
+from app.io.variable_list_excel import _row_plan, HIGH_CONF_FILL, LOW_CONF_FILL
+
+
+def test_row_plan_orders_circuits_and_skips_continuations():
+    circuits = {
+        "10": {"description": "PUMP", "breaker_amps": 30, "poles": 2, "load_amps": 12, "load_type": "MTR"},
+        "2": {"description": "LIGHTS", "breaker_amps": 20, "poles": 1},
+        "12": {"is_continuation": True},
+    }
+    confidence = {
+        "voltage": {"effective_confidence": 0.95},
+        "circuit_10_load": {"effective_confidence": 0.3},
+    }
+    rows = _row_plan("LP-1", {"voltage": "208V"}, circuits, confidence)
+
+    titles = [values for values, _ in rows if isinstance(values, str)]
+    assert titles == ["PANEL IDENTIFICATION", "PANEL SPECIFICATIONS", "CIRCUIT DATA"]
+
+    by_name = {values[0]: (values, fill) for values, fill in rows if not isinstance(values, str)}
+    assert by_name["Voltage"] == (("Voltage", "208V", "95%", "NA"), HIGH_CONF_FILL)
+    assert by_name["Number of Circuits"][0][1] == "3"
+    assert by_name["Pole Space 10 Load Amps"] == (("Pole Space 10 Load Amps", "12A", "30%", "MTR"), LOW_CONF_FILL)
+    assert "Pole Space 2 Load Amps" not in by_name
+    assert not any(name.startswith("Pole Space 12") for name in by_name)
+
+    circuit_names = [name for name in by_name if name.startswith("Pole Space")]
+    assert circuit_names[0] == "Pole Space 2 Description"